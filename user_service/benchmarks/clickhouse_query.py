@@ -0,0 +1,47 @@
+"""
+Cost of building ClickHouse queries: pypika tree per call vs cached templates:
+    python -m benchmarks.clickhouse_query --number 100000
+"""
+
+import argparse
+import logging
+from timeit import timeit
+from uuid import uuid4
+
+from pypika import Query, Table
+from src.infrastructure.database.gateways.clickhouse_query import (
+    ClickHouseQueryCompiler, ClickHouseQuerySpec)
+
+FILTERS = {"first_name": "Иван", "last_name": "Петров", "age": 31}
+
+
+def build_inline(filters: dict) -> str:
+    table = Table("users")
+    query = Query.from_(table).select("*")
+    for key, value in filters.items():
+        query = query.where(table[key] == value)
+    return str(query)
+
+
+def bench(number: int) -> None:
+    compiler = ClickHouseQueryCompiler()
+    cases = {
+        "select by uuid": {"uuid": str(uuid4())},
+        "select by 3 fields": FILTERS,
+    }
+    for name, filters in cases.items():
+        spec = ClickHouseQuerySpec(filters=filters)
+        inline = timeit(lambda: build_inline(filters), number=number)
+        cached = timeit(lambda: compiler.select(table="users", spec=spec), number=number)
+        logging.info(
+            f"{name:20} pypika per call {inline / number * 1e6:7.2f} us "
+            f"cached template {cached / number * 1e6:7.2f} us ({inline / cached:.0f}x)",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    bench(args.number)
@@ -0,0 +1,88 @@
+"""
+Payload size and encode/decode time of the broker codecs for user and order events:
+    python -m benchmarks.codecs --number 100000
+
+Locally the schema codec gives payloads of about 47% of the JSON size,
+but encodes about 7x and decodes about 9x slower than orjson
+(user_registered: 121 B, 2.5 us / 3.8 us vs 255 B, 0.37 us / 0.43 us).
+JSON stays the default content type.
+"""
+
+import argparse
+import logging
+from datetime import datetime
+from timeit import timeit
+from uuid import uuid4
+
+from src.domain.user.events import USER_REGISTERED, register_user_events
+from src.infrastructure.amqp.codecs import (JSON_CONTENT_TYPE,
+                                            SCHEMA_CONTENT_TYPE, EventSchema,
+                                            codec_registry, schema_codec)
+
+ORDER_CREATED = schema_codec.register(
+    EventSchema(
+        name="bench_order_created",
+        schema_id=1000,
+        fields=[
+            ("uuid", "uuid"),
+            ("user_uuid", "uuid"),
+            ("created_at", "datetime"),
+            ("items", "int"),
+            ("total", "float"),
+            ("is_paid", "bool"),
+            ("address", "str"),
+            ("comment", "str"),
+        ],
+    ),
+)
+
+EVENTS = {
+    USER_REGISTERED.name: {
+        "uuid": uuid4(),
+        "created_at": datetime.now(),
+        "age": 31,
+        "is_verified": False,
+        "login": "ivan_petrov",
+        "email": "ivan.petrov@example.com",
+        "first_name": "Иван",
+        "last_name": "Петров",
+        "phone_number": "+79986661488",
+    },
+    ORDER_CREATED.name: {
+        "uuid": uuid4(),
+        "user_uuid": uuid4(),
+        "created_at": datetime.now(),
+        "items": 3,
+        "total": 1499.9,
+        "is_paid": True,
+        "address": "Москва, ул. Тверская, д. 1, кв. 1",
+        "comment": "",
+    },
+}
+
+
+def bench(number: int) -> None:
+    for name, event in EVENTS.items():
+        for content_type in codec_registry.content_types:
+            codec = codec_registry.get(content_type)
+            schema = name if content_type == SCHEMA_CONTENT_TYPE else None
+            payload = codec.encode(event, schema=schema)
+            view = memoryview(payload)
+            encode = timeit(lambda: codec.encode(event, schema=schema), number=number)
+            decode = timeit(lambda: codec.decode(view), number=number)
+            logging.info(
+                f"{name:22} {content_type:28} {len(payload):5} B "
+                f"encode {encode / number * 1e6:6.2f} us decode {decode / number * 1e6:6.2f} us",
+            )
+        baseline = len(codec_registry.get(JSON_CONTENT_TYPE).encode(event))
+        compact = len(schema_codec.encode(event, schema=name))
+        logging.info(f"{name:22} schema payload is {compact / baseline:.0%} of json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    register_user_events()
+    bench(args.number)
@@ -0,0 +1,69 @@
+"""
+Throughput of transactional sends: one message per transaction vs batched transactions.
+
+Requires a running broker from settings.yml:
+    python -m benchmarks.kafka_transactions --messages 5000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import logging
+from time import perf_counter
+
+from src.infrastructure.amqp.broker.kafka import KafkaProducer
+from src.infrastructure.server.config import settings
+
+
+def _producer(suffix: str) -> KafkaProducer:
+    return KafkaProducer(
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        acks="all",
+        transactional_id_prefix=f"{settings.KAFKA.transactional_id}-bench-{suffix}",
+        linger_ms=settings.KAFKA.linger_ms,
+        max_batch_size=settings.KAFKA.max_batch_size,
+        compression_type=settings.KAFKA.compression_type,
+        logging_config="warning",
+    )
+
+
+async def one_per_transaction(topic: str, messages: int) -> float:
+    producer = _producer("single")
+    await producer.connect()
+    started = perf_counter()
+    for number in range(messages):
+        async with producer.transaction() as batch:
+            batch.add({"number": number}, topic=topic)
+    elapsed = perf_counter() - started
+    await producer.disconnect()
+    return messages / elapsed
+
+
+async def batched_transactions(topic: str, messages: int, batch_size: int) -> float:
+    producer = _producer("batch")
+    await producer.connect()
+    started = perf_counter()
+    for offset in range(0, messages, batch_size):
+        async with producer.transaction() as batch:
+            for number in range(offset, min(offset + batch_size, messages)):
+                batch.add({"number": number}, topic=topic)
+    elapsed = perf_counter() - started
+    await producer.disconnect()
+    return messages / elapsed
+
+
+async def main(topic: str, messages: int, batch_size: int) -> None:
+    single = await one_per_transaction(topic, messages)
+    batched = await batched_transactions(topic, messages, batch_size)
+    logging.info(f"one message per transaction: {single:10.1f} msg/s")
+    logging.info(f"{batch_size} messages per transaction: {batched:10.1f} msg/s ({batched / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topic", default="bench_transactions")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(args.topic, args.messages, args.batch_size))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from src.application.service.query_router import QueryRouter
+from src.infrastructure.database.gateways.alchemy_gateway import AlchemyGateway
+from src.infrastructure.database.gateways.clickhouse_gateway import \
+    ClickHouseManager
+from src.infrastructure.database.gateways.clickhouse_replicator import \
+    ClickHouseReplicator
+from src.infrastructure.server.provider import Provider
+
+
+class MetricsRouter:
+    api_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+    clickhouse_client: ClickHouseManager = Depends(Provider.clickhouse_manager)
+    query_router_client: QueryRouter = Depends(Provider.user_query_router)
+    postgres_client: AlchemyGateway = Depends(Provider.alchemy_manager)
+    replicator_client: ClickHouseReplicator = Depends(Provider.clickhouse_replicator)
+
+    @staticmethod
+    @api_router.get("", response_model=dict)
+    async def get_metrics(
+        clickhouse=clickhouse_client,
+        query_router=query_router_client,
+        postgres=postgres_client,
+        replicator=replicator_client,
+    ) -> dict:
+        return {
+            "postgres": postgres.metrics,
+            "clickhouse": clickhouse.metrics,
+            "query_router": query_router.stats.snapshot(),
+            "replication_lag": await replicator.lag(),
+        }
@@ -1,14 +1,18 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi_filter import FilterDepends
 from pydantic import BaseModel
+from src.application.service.analytics import UserAnalyticsService
 from src.application.service.user import UserReadService, UserWriteService
-from src.domain.user.models import (CreateUser, LoginUser, UpdateUser,
-                                    UserFilter, UserReturnData,
-                                    UserTokenResult)
+from src.domain.user.models import (CreateUser, DailyRegistrations, LoginUser,
+                                    RoleMembership, UpdateUser, UserFilter,
+                                    UserReturnData, UserTokenResult)
 from src.infrastructure.base.base_model import BaseResultModel
+from src.infrastructure.server.config import settings
 
 
 class UserRouter:
@@ -18,14 +22,63 @@ class UserRouter:
     filters: UserFilter = FilterDepends(UserFilter)
     read_service_client: UserReadService = Depends(UserReadService)
     write_service_client: UserWriteService = Depends(UserWriteService)
+    analytics_service_client: UserAnalyticsService = Depends(UserAnalyticsService)
 
     @staticmethod
     @api_router.get("/find", response_model=List[output_model])
     async def get_users(
+        response: Response,
         filters=filters,
+        limit: int = Query(
+            default=settings.PAGINATION.default_page_size,
+            ge=1,
+            le=settings.PAGINATION.max_page_size,
+        ),
+        cursor: Optional[str] = None,
         service=read_service_client,
     ) -> List[output_model]:
-        return await service.find(filters=filters)
+        users, next_cursor = await service.find(filters=filters, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers[settings.PAGINATION.cursor_header] = next_cursor
+        return users
+
+    @staticmethod
+    @api_router.get("/find/stream", response_class=StreamingResponse)
+    async def stream_users(
+        filters=filters,
+        service=read_service_client,
+    ) -> StreamingResponse:
+        return StreamingResponse(
+            service.stream(filters=filters),
+            media_type="application/x-ndjson",
+        )
+
+    @staticmethod
+    @api_router.get("/export", response_class=StreamingResponse)
+    async def export_users(
+        filters=filters,
+        service=read_service_client,
+    ) -> StreamingResponse:
+        return StreamingResponse(
+            service.export(filters=filters),
+            media_type="application/x-ndjson",
+        )
+
+    @staticmethod
+    @api_router.get("/analytics/registrations", response_model=List[DailyRegistrations])
+    async def get_registrations(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        service=analytics_service_client,
+    ) -> List[DailyRegistrations]:
+        return await service.registrations(date_from=date_from, date_to=date_to)
+
+    @staticmethod
+    @api_router.get("/analytics/roles", response_model=List[RoleMembership])
+    async def get_role_membership(
+        service=analytics_service_client,
+    ) -> List[RoleMembership]:
+        return await service.role_membership()
 
     @staticmethod
     @api_router.get("/is_auth", response_model=BaseResultModel)
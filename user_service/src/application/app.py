@@ -1,14 +1,27 @@
+from src.api.routers.metrics_router import MetricsRouter
 from src.api.routers.user_router import UserRouter
 from src.application.background import background_process
+from src.domain.user.events import register_user_events
+from src.infrastructure.server.caller import bind_caller
 from src.infrastructure.server.config import settings
 from src.infrastructure.server.provider import Provider
 from src.infrastructure.server.server import ApiServer
 
 user_service = ApiServer(
     name=settings.NAME,
-    routers=[UserRouter.api_router],
-    start_callbacks=[background_process.start],
-    stop_callbacks=[background_process.close],
+    routers=[UserRouter.api_router, MetricsRouter.api_router],
+    start_callbacks=[
+        register_user_events,
+        background_process.start,
+        Provider.alchemy_manager().warm_up,
+        Provider.alchemy_manager().start,
+    ],
+    stop_callbacks=[
+        background_process.close,
+        Provider.clickhouse_manager().close,
+        Provider.alchemy_manager().close,
+    ],
+    middlewares=[bind_caller],
     engine=Provider.alchemy_manager()._engine,
     session_maker=Provider.alchemy_manager()._async_session_factory,
 ).app
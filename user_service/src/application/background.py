@@ -1,20 +1,40 @@
-from asyncio import Task, run
+from asyncio import Task, create_task, run
 from multiprocessing import Process
 
+from src.application.tasks.broker_metrics_task import broker_metrics_task
 from src.application.tasks.generate_ch_tables_task import create_tables_task
+from src.application.tasks.register_task import register_task
+from src.application.tasks.replication_task import replication_task
+from src.application.tasks.user_rpc_task import user_rpc_task
+from src.domain.user.events import register_user_events
 from src.infrastructure.server.config import settings
+from src.infrastructure.server.provider import Provider
 from src.infrastructure.utils.asyncio_utils import safe_gather, scheduled_task
 
 
 async def _start_background_tasks():
+    alchemy_manager = Provider.alchemy_manager()
+    await alchemy_manager.start()
     tasks: list[Task] = [
-        scheduled_task(create_tables_task(), settings.REPEAT_TIMEOUT),
+        scheduled_task(
+            create_tables_task,
+            settings.REPEAT_TIMEOUT,
+            timeout=settings.CLICKHOUSE.schema_sync_timeout,
+        ),
+        scheduled_task(broker_metrics_task, settings.KAFKA.metrics_interval),
+        create_task(user_rpc_task()),
+        create_task(replication_task()),
+        create_task(register_task()),
     ]
-    await safe_gather(*tasks)
+    try:
+        await safe_gather(*tasks)
+    finally:
+        await alchemy_manager.close()
 
 
 def start_background_tasks():
+    register_user_events()
     run(_start_background_tasks())
 
 
-background_process = Process(target=start_background_tasks)
+background_process = Process(target=start_background_tasks, name="background")
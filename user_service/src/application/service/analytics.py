@@ -0,0 +1,64 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import Depends
+from src.domain.user.models import DailyRegistrations, RoleMembership
+from src.infrastructure.database.gateways.clickhouse_gateway import \
+    ClickHouseManager
+from src.infrastructure.database.models import UserRole
+from src.infrastructure.database.models.clickhouse import USER_REGISTRATIONS
+from src.infrastructure.server.provider import Provider
+
+
+class UserAnalyticsService:
+    def __init__(
+        self,
+        clickhouse_repository: ClickHouseManager = Depends(Provider.clickhouse_manager),
+    ):
+        self.clickhouse = clickhouse_repository
+        self.database = clickhouse_repository.database
+
+    async def registrations(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> List[DailyRegistrations]:
+        conditions, params = [], {}
+        if date_from:
+            conditions.append("day >= %(date_from)s")
+            params["date_from"] = date_from
+        if date_to:
+            conditions.append("day <= %(date_to)s")
+            params["date_to"] = date_to
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = await self.clickhouse.query(
+            "SELECT day, uniqExactMerge(registered), uniqExactIfMerge(verified) "
+            f"FROM {self.database}.{USER_REGISTRATIONS.name} {where}GROUP BY day ORDER BY day",
+            params,
+            table=USER_REGISTRATIONS.source,
+        )
+        return [
+            DailyRegistrations(
+                day=day,
+                registered=registered,
+                verified=verified,
+                verified_ratio=verified / registered if registered else 0.0,
+            )
+            for day, registered, verified in rows
+        ]
+
+    async def role_membership(self) -> List[RoleMembership]:
+        """
+        Counted from the latest live version of every membership at query
+        time, so removed roles and deleted users drop out
+        """
+        memberships = await self.clickhouse.live_source(UserRole.__tablename__)
+        roles = await self.clickhouse.live_source("roles")
+        rows = await self.clickhouse.query(
+            "SELECT members.role_uuid, roles.name, members.users FROM "
+            f"(SELECT role_uuid, count() AS users FROM {memberships} GROUP BY role_uuid) AS members "
+            f"LEFT JOIN (SELECT uuid, name FROM {roles}) AS roles "
+            "ON roles.uuid = members.role_uuid ORDER BY members.users DESC",
+            table=UserRole.__tablename__,
+        )
+        return [RoleMembership(role_uuid=role_uuid, name=name or None, users=users) for role_uuid, name, users in rows]
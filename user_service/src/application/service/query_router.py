@@ -0,0 +1,133 @@
+import logging
+from time import monotonic
+from typing import Any, NamedTuple, Optional
+
+from redis.asyncio import Redis
+from src.infrastructure.base.base_metrics import RoutingStats
+from src.infrastructure.database.gateways.clickhouse_gateway import \
+    ClickHouseManager
+from src.infrastructure.database.models import Base
+from src.infrastructure.server.caller import current_caller
+
+POSTGRES = "postgres"
+CLICKHOUSE = "clickhouse"
+
+_EQUALITY = ("eq", "neq", "in", "not_in")
+
+
+class QueryRoute(NamedTuple):
+    target: str
+    reason: str
+    estimated_rows: Optional[float] = None
+
+
+class QueryRouter:
+    """
+    Chooses between Postgres and the ClickHouse mirror for a filtered read.
+
+    Filters on unique columns and reads by a caller that wrote less than
+    `freshness_window` seconds ago stay on Postgres. Otherwise the result
+    size is estimated from the mirror: equality and membership lookups use
+    the column's distinct count, ranges and prefixes use the fixed
+    `selectivity` placeholders below, which the mirror keeps no statistics
+    for. Wide scans go to ClickHouse.
+    """
+
+    selectivity: dict[str, float] = {
+        "gt": 0.3,
+        "gte": 0.3,
+        "lt": 0.3,
+        "lte": 0.3,
+        "prefix": 0.1,
+    }
+
+    def __init__(
+        self,
+        model: type[Base],
+        clickhouse: ClickHouseManager,
+        redis_client: Redis,
+        oltp_max_rows: int = 1000,
+        freshness_window: int = 30,
+        stats_ttl: int = 60,
+    ) -> None:
+        self.table = model.__tablename__
+        self.unique = {column.name for column in model.__table__.columns if column.unique or column.primary_key}
+        self.clickhouse = clickhouse
+        self.redis_client = redis_client
+        self.oltp_max_rows = oltp_max_rows
+        self.freshness_window = freshness_window
+        self.stats_ttl = stats_ttl
+        self.stats = RoutingStats()
+        self._statistics: dict[str, tuple[float, int]] = {}
+
+    def _write_key(self, caller: str) -> str:
+        return f"query_router:last_write:{self.table}:{caller}"
+
+    async def record_write(self) -> None:
+        if (caller := current_caller()) is None:
+            return
+        try:
+            await self.redis_client.set(name=self._write_key(caller), value=1, ex=self.freshness_window)
+        except Exception as e:
+            logging.error(f"Не удалось отметить запись в {self.table}: {e}")
+
+    async def _recently_written(self) -> bool:
+        if (caller := current_caller()) is None:
+            return False
+        return bool(await self.redis_client.exists(self._write_key(caller)))
+
+    async def _statistic(self, name: str, expression: str) -> int:
+        if (entry := self._statistics.get(name)) is None or monotonic() - entry[0] > self.stats_ttl:
+            ((value,),) = await self.clickhouse.pool.execute(
+                f"SELECT {expression} FROM {self.clickhouse.database}.{self.table}",
+            )
+            entry = self._statistics[name] = (monotonic(), int(value))
+        return entry[1]
+
+    async def _total_rows(self) -> int:
+        return await self._statistic("count()", "count()")
+
+    async def _distinct(self, filters: dict[str, Any]) -> dict[str, int]:
+        columns = {key.partition("__")[0] for key in filters if (key.partition("__")[2] or "eq") in _EQUALITY}
+        return {column: await self._statistic(column, f'uniq("{column}")') for column in columns}
+
+    def estimate(self, filters: dict[str, Any], total_rows: int, distinct: dict[str, int]) -> float:
+        rows = float(total_rows)
+        for key, value in filters.items():
+            column, _, lookup = key.partition("__")
+            lookup = lookup or "eq"
+            if lookup in _EQUALITY:
+                matched = 1.0 / max(distinct.get(column, 1), 1)
+                if lookup in ("in", "not_in"):
+                    matched = min(1.0, matched * len(value))
+                selectivity = 1.0 - matched if lookup in ("neq", "not_in") else matched
+            else:
+                selectivity = self.selectivity.get(lookup, 1.0)
+            rows *= selectivity
+        return rows
+
+    async def route(self, filters: dict[str, Any], pinned: Optional[str] = None) -> QueryRoute:
+        """
+        `pinned` is the backend that served the previous page, pages of one
+        listing never switch backends because the two order ties and
+        timestamps at different precision
+        """
+        if pinned in (POSTGRES, CLICKHOUSE):
+            return QueryRoute(pinned, "cursor")
+        if any(key in self.unique for key in filters):
+            return QueryRoute(POSTGRES, "unique")
+        if any(key.partition("__")[0] in self.unique for key in filters):
+            return QueryRoute(POSTGRES, "narrow")
+        try:
+            if await self._recently_written():
+                return QueryRoute(POSTGRES, "fresh")
+            estimated_rows = self.estimate(filters, await self._total_rows(), await self._distinct(filters))
+        except Exception as e:
+            logging.error(f"Не удалось оценить запрос к {self.table}: {e}")
+            return QueryRoute(POSTGRES, "fallback")
+        if estimated_rows <= self.oltp_max_rows:
+            return QueryRoute(POSTGRES, "selective", estimated_rows)
+        return QueryRoute(CLICKHOUSE, "wide", estimated_rows)
+
+    def observe(self, route: QueryRoute, latency: float) -> None:
+        self.stats.observe(route.target, route.reason, latency)
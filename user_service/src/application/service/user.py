@@ -1,15 +1,22 @@
+import logging
 import time
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, List, Optional
 from uuid import UUID
 
+import orjson
 from fastapi import Depends
 from src.application.service.auth import AuthHandler
+from src.application.service.query_router import (CLICKHOUSE, POSTGRES,
+                                                  QueryRoute, QueryRouter)
 from src.domain.user.interface import UserReadRepository, UserWriteRepository
 from src.domain.user.models import (CreateUser, LoginUser, UpdateUser,
-                                    UserReturnData, UserTokenResult)
+                                    UserCursor, UserReturnData,
+                                    UserTokenResult)
 from src.infrastructure.base.base_model import BaseResultModel
 from src.infrastructure.database.gateways.clickhouse_gateway import \
     ClickHouseManager
+from src.infrastructure.database.gateways.clickhouse_query import \
+    ClickHouseQuerySpec
 from src.infrastructure.database.models import User
 from src.infrastructure.exceptions.token_exceptions import Unauthorized
 from src.infrastructure.exceptions.user_exceptions import (UserNotFound,
@@ -23,19 +30,81 @@ class UserReadService:
         read_repository: UserReadRepository = Depends(Provider.user_read_registry),
         clickhouse_repository: ClickHouseManager = Depends(Provider.clickhouse_manager),
         auth_handler: AuthHandler = Depends(Provider.auth_handler),
+        query_router: QueryRouter = Depends(Provider.user_query_router),
     ):
         self.read_repo = read_repository
         self.auth_repo = auth_handler
         self.clickhouse = clickhouse_repository
+        self.query_router = query_router
         self.model_name = str(User.__tablename__)
+        self.columns = [
+            column.name for column in User.__table__.columns if column.name not in User.__clickhouse__.excluded
+        ]
 
     async def get(self, data: UUID) -> Optional[UserReturnData]:
         if result := await self.read_repo.get(user_uuid=data):
             return result
         raise UserNotFound
 
-    async def find(self, filters: Any = None) -> Optional[List[UserReturnData]]:
-        return await self.read_repo.find(filters=filters)
+    async def _find_in_clickhouse(
+        self,
+        filters: Any = None,
+        limit: Optional[int] = None,
+        after: Optional[UserCursor] = None,
+    ) -> List[dict]:
+        rows = await self.clickhouse.select_objects(
+            table=self.model_name,
+            filters=filters,
+            columns=self.columns,
+            order_by=["created_at", "uuid"],
+            limit=limit,
+            after=[after.created_at, after.uuid] if after else None,
+            final=True,
+        )
+        return [dict(zip(self.columns, row)) for row in rows]
+
+    async def find(
+        self,
+        filters: Any = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[UserReturnData], Optional[str]]:
+        after = UserCursor.decode(cursor) if cursor else None
+        route = await self.query_router.route(
+            ClickHouseQuerySpec.from_filter(filters).filters,
+            pinned=after.backend if after else None,
+        )
+        started = time.perf_counter()
+        if route.target == CLICKHOUSE:
+            try:
+                result = await self._find_in_clickhouse(filters=filters, limit=limit, after=after)
+            except Exception as e:
+                logging.error(f"Запрос пользователей в Clickhouse не выполнен: {e}")
+                route = QueryRoute(POSTGRES, "fallback", route.estimated_rows)
+                result = await self.read_repo.find(filters=filters, limit=limit, after=after)
+        else:
+            result = await self.read_repo.find(filters=filters, limit=limit, after=after)
+        self.query_router.observe(route, time.perf_counter() - started)
+        if len(result) < limit:
+            return result, None
+        next_cursor = UserCursor.model_validate(result[-1], from_attributes=True)
+        return result, next_cursor.model_copy(update={"backend": route.target}).encode()
+
+    async def stream(self, filters: Any = None) -> AsyncIterator[bytes]:
+        async for users in self.read_repo.stream(filters=filters):
+            yield b"".join(
+                UserReturnData.model_validate(user, from_attributes=True).model_dump_json().encode()
+                + b"\n"
+                for user in users
+            )
+
+    async def export(self, filters: Any = None) -> AsyncIterator[bytes]:
+        async for block in self.clickhouse.stream_objects(
+            table=self.model_name,
+            filters=filters,
+            columns=self.columns,
+        ):
+            yield b"".join(orjson.dumps(dict(zip(self.columns, row))) + b"\n" for row in block)
 
 
 class UserWriteService:
@@ -46,26 +115,36 @@ class UserWriteService:
             Provider.user_write_registry,
         ),
         auth_handler: AuthHandler = Depends(Provider.auth_handler),
+        query_router: QueryRouter = Depends(Provider.user_query_router),
     ):
         self.read_repo = read_repository
         self.write_repo = write_repository
         self.auth_repo = auth_handler
+        self.query_router = query_router
 
     async def register(self, data: CreateUser) -> Optional[UserReturnData]:
         _salted_pass = self.auth_repo.encode_pass(data.password, data.login)
         processed_data = data.model_dump()
         processed_data["password"] = _salted_pass
-        return await self.write_repo.create(**processed_data)
+        result = await self.write_repo.create(**processed_data)
+        await self.query_router.record_write()
+        return result
 
     async def edit_user(
         self, data: UpdateUser, user_uuid: UUID
     ) -> Optional[UserReturnData]:
         processed_data = data.model_dump()
         processed_data["uuid"] = user_uuid
-        return await self.write_repo.update(**processed_data)
+        result = await self.write_repo.update(**processed_data)
+        await self.query_router.record_write()
+        return result
 
     async def delete_user(self, user_uuid: UUID) -> Optional[UserReturnData]:
-        return await self.write_repo.delete(user_uuid=user_uuid)
+        # The mirror learns about the delete from the tombstone the
+        # replicator copies, a mutation here would only duplicate it
+        result = await self.write_repo.delete(user_uuid=user_uuid)
+        await self.query_router.record_write()
+        return result
 
     async def login_user(self, data: LoginUser) -> UserTokenResult:
         user = await self.read_repo.get_by_login(login=data.login)
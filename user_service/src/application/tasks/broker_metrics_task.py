@@ -0,0 +1,23 @@
+import logging
+
+from src.infrastructure.server.provider import Provider
+
+
+def broker_metrics() -> dict:
+    """
+    Counters of the Kafka clients of the background process, which
+    the API's /metrics does not see
+    """
+    return {
+        "rpc_server": Provider.rpc_consumer_client().rpc_stats.snapshot(),
+        "failure_router": Provider.failure_router().snapshot(),
+        "duplicates": Provider.dedup_store().duplicates,
+        "producers": {
+            "rpc": Provider.rpc_producer_client().metrics,
+            "retry": Provider.retry_producer_client().metrics,
+        },
+    }
+
+
+async def broker_metrics_task() -> None:
+    logging.info(f"Метрики брокера: {broker_metrics()}")
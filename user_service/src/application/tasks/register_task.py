@@ -0,0 +1,45 @@
+import logging
+
+from aiokafka.structs import ConsumerRecord
+from src.application.service.user import UserWriteService
+from src.application.tasks.retry_task import retry_consumers_task
+from src.domain.user.models import CreateUser
+from src.infrastructure.amqp.broker.idempotency import IdempotentHandler
+from src.infrastructure.amqp.broker.kafka import KafkaConsumer
+from src.infrastructure.server.config import settings
+from src.infrastructure.server.provider import Provider
+from src.infrastructure.utils.asyncio_utils import safe_gather
+
+
+async def register_user(msg: ConsumerRecord) -> None:
+    service = UserWriteService(
+        read_repository=Provider.user_read_registry(),
+        write_repository=Provider.user_write_registry(),
+        auth_handler=Provider.auth_handler(),
+        clickhouse_repository=Provider.clickhouse_manager(),
+        query_router=Provider.user_query_router(),
+    )
+    await service.register(CreateUser.model_validate(KafkaConsumer.deserialize_record(msg)))
+
+
+async def register_task() -> None:
+    """
+    Registers users from the register topic. Failed records go through
+    the retry tiers of the topic, which are consumed here as well.
+    """
+    topic = settings.KAFKA.topics.register_topic
+    producer = Provider.retry_producer_client()
+    consumer = Provider.consumer_client()
+    router = Provider.failure_router()
+    on_message = IdempotentHandler(register_user, store=Provider.dedup_store())
+    await producer.connect()
+    await consumer.connect()
+    logging.info(f"Запущен обработчик {topic}")
+    try:
+        await safe_gather(
+            consumer.init_consuming(on_message),
+            retry_consumers_task(topic, on_message, router),
+        )
+    finally:
+        await consumer.disconnect()
+        await producer.disconnect()
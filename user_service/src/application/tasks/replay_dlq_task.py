@@ -0,0 +1,40 @@
+"""
+Republishes records from the dead-letter topic of `--topic` back to it:
+    python -m src.application.tasks.replay_dlq_task --topic register --limit 100
+"""
+
+import argparse
+import asyncio
+from typing import Optional
+
+from src.infrastructure.amqp.broker.kafka import KafkaConsumer
+from src.infrastructure.amqp.broker.retry import DeadLetterReplayer
+from src.infrastructure.server.config import settings
+from src.infrastructure.server.provider import Provider
+
+
+async def replay_dlq(topic: str, limit: Optional[int] = None) -> int:
+    producer = Provider.retry_producer_client()
+    consumer = KafkaConsumer(
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        topics=[Provider.failure_router().dead_letter_topic(topic)],
+        logging_config=settings.LOG_LEVEL,
+        group_id=f"{settings.KAFKA.group_id}.dlq_replay",
+        auto_offset_reset="earliest",
+    )
+    await producer.connect()
+    await consumer.connect()
+    try:
+        return await DeadLetterReplayer(consumer=consumer, producer=producer).replay(limit=limit)
+    finally:
+        await consumer.disconnect()
+        await producer.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topic", required=True)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(replay_dlq(args.topic, args.limit))
@@ -0,0 +1,16 @@
+import logging
+from asyncio import sleep
+
+from src.infrastructure.server.config import settings
+from src.infrastructure.server.provider import Provider
+
+
+async def replication_task() -> None:
+    replicator = Provider.clickhouse_replicator()
+    logging.info("Репликация Postgres в Clickhouse запущена")
+    while True:
+        try:
+            await replicator.run()
+        except Exception as e:
+            logging.error(f"Ошибка репликации в Clickhouse: {e}")
+        await sleep(settings.CLICKHOUSE.replication.interval)
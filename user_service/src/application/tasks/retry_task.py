@@ -0,0 +1,40 @@
+import logging
+from typing import Awaitable, Union
+
+from src.infrastructure.amqp.broker.kafka import KafkaConsumer
+from src.infrastructure.amqp.broker.retry import FailureRouter
+from src.infrastructure.server.config import settings
+from src.infrastructure.utils.asyncio_utils import safe_gather
+
+
+async def _consume_tier(
+    topic: str,
+    on_message: Union[callable, Awaitable],
+    router: FailureRouter,
+) -> None:
+    consumer = KafkaConsumer(
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        topics=[topic],
+        logging_config=settings.LOG_LEVEL,
+        group_id=f"{settings.KAFKA.group_id}.{topic}",
+        failure_router=router,
+        auto_offset_reset="earliest",
+    )
+    await consumer.connect()
+    logging.info(f"Запущен обработчик повторов {topic}")
+    try:
+        await consumer.init_retry_consuming(on_message)
+    finally:
+        await consumer.disconnect()
+
+
+async def retry_consumers_task(
+    topic: str,
+    on_message: Union[callable, Awaitable],
+    router: FailureRouter,
+) -> None:
+    await safe_gather(
+        *[_consume_tier(retry_topic, on_message, router) for retry_topic in router.retry_topics(topic)],
+        parallelism_size=len(router.delays),
+    )
@@ -0,0 +1,32 @@
+import logging
+from typing import Optional
+from uuid import UUID
+
+from src.domain.user.models import UserReturnData
+from src.infrastructure.server.config import settings
+from src.infrastructure.server.provider import Provider
+
+
+async def get_user(request: dict) -> Optional[dict]:
+    user = await Provider.user_read_registry().get(user_uuid=UUID(request["uuid"]))
+    if not user:
+        return None
+    return UserReturnData.model_validate(user, from_attributes=True).model_dump(mode="json")
+
+
+async def user_rpc_task() -> None:
+    producer = Provider.rpc_producer_client()
+    consumer = Provider.rpc_consumer_client()
+    await producer.connect()
+    await consumer.connect()
+    logging.info("RPC сервер пользователей запущен")
+    try:
+        await consumer.rpc_response(
+            on_request=get_user,
+            producer_client=producer,
+            max_in_flight=settings.KAFKA.rpc.max_in_flight,
+            timeout=settings.KAFKA.rpc.timeout,
+        )
+    finally:
+        await consumer.disconnect()
+        await producer.disconnect()
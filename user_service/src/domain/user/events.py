@@ -0,0 +1,41 @@
+from src.infrastructure.amqp.codecs import (EventSchema, SchemaCodec,
+                                            schema_codec)
+
+USER_REGISTERED = EventSchema(
+    name="user_registered",
+    schema_id=1,
+    fields=[
+        ("uuid", "uuid"),
+        ("created_at", "datetime"),
+        ("age", "int"),
+        ("is_verified", "bool"),
+        ("login", "str"),
+        ("email", "str"),
+        ("first_name", "str"),
+        ("last_name", "str"),
+        ("phone_number", "str"),
+    ],
+)
+
+USER_UPDATED = EventSchema(
+    name="user_updated",
+    schema_id=2,
+    fields=[
+        ("uuid", "uuid"),
+        ("updated_at", "datetime"),
+        ("age", "int"),
+        ("is_verified", "bool"),
+        ("login", "str"),
+        ("email", "str"),
+        ("first_name", "str"),
+        ("last_name", "str"),
+        ("phone_number", "str"),
+    ],
+)
+
+USER_EVENTS = (USER_REGISTERED, USER_UPDATED)
+
+
+def register_user_events(codec: SchemaCodec = schema_codec) -> None:
+    for schema in USER_EVENTS:
+        codec.register(schema)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Optional
+from typing import Any, AsyncIterator, Generic, Optional
 
 from src.domain.user import table_type
 
@@ -17,7 +17,11 @@ class UserReadRepository(ABC, Generic[table_type]):
         raise NotImplementedError
 
     @abstractmethod
-    async def find(self, filters: Optional[Any] = None) -> Any:
+    async def find(self, filters: Optional[Any] = None, **kwargs) -> Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(self, filters: Optional[Any] = None, **kwargs) -> AsyncIterator[list]:
         raise NotImplementedError
 
 
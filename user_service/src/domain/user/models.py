@@ -1,10 +1,12 @@
-from datetime import datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
 from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from src.infrastructure.base.patched_filter import PatchedFilter
 from src.infrastructure.database.models import User
+from src.infrastructure.exceptions.user_exceptions import InvalidCursor
 
 
 class LoginUser(BaseModel):
@@ -44,13 +46,29 @@ class CreateUser(UpdateUser):
     password: str
 
 
-class UserReturnData(CreateUser, UpdateUser):
+class UserReturnData(UpdateUser):
     uuid: UUID
     is_verified: bool
     created_at: datetime
     updated_at: datetime
 
 
+class UserCursor(BaseModel):
+    created_at: datetime
+    uuid: UUID
+    backend: Optional[str] = None
+
+    def encode(self) -> str:
+        return urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> "UserCursor":
+        try:
+            return cls.model_validate_json(urlsafe_b64decode(value.encode()))
+        except ValueError:
+            raise InvalidCursor
+
+
 class UserFilter(PatchedFilter):
     uuid: Optional[UUID] = None
     first_name: Optional[str] = None
@@ -58,7 +76,26 @@ class UserFilter(PatchedFilter):
     login: Optional[str] = None
     email: Optional[EmailStr] = None
     age: Optional[int] = None
+    age__gte: Optional[int] = None
+    age__lte: Optional[int] = None
+    login__in: Optional[list[str]] = None
+    created_at__gte: Optional[datetime] = None
+    created_at__lte: Optional[datetime] = None
     phone_number: Optional[str] = None
+    order_by: Optional[list[str]] = None
 
     class Constants(PatchedFilter.Constants):
         model = User
+
+
+class DailyRegistrations(BaseModel):
+    day: date
+    registered: int
+    verified: int
+    verified_ratio: float
+
+
+class RoleMembership(BaseModel):
+    role_uuid: UUID
+    name: Optional[str] = None
+    users: int
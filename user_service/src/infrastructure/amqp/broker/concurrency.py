@@ -0,0 +1,147 @@
+import logging
+from asyncio import CancelledError, Queue, Semaphore, Task, create_task, gather
+from heapq import heappop, heappush
+from typing import Awaitable, Callable, Iterable, Optional
+
+from aiokafka import ConsumerRebalanceListener
+from aiokafka.structs import ConsumerRecord, TopicPartition
+
+
+class OffsetTracker:
+    """
+    Tracks offsets of one partition that are handled out of order
+    and returns the next offset that is safe to commit
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: list[int] = []
+        self._completed: set[int] = set()
+        self._next: Optional[int] = None
+        self.committed: Optional[int] = None
+
+    def start(self, offset: int) -> None:
+        heappush(self._in_flight, offset)
+        self._next = offset + 1
+
+    def complete(self, offset: int) -> None:
+        self._completed.add(offset)
+
+    def committable(self) -> Optional[int]:
+        while self._in_flight and self._in_flight[0] in self._completed:
+            self._completed.discard(heappop(self._in_flight))
+        if self._in_flight:
+            return self._in_flight[0]
+        return self._next
+
+
+class PartitionWorkerPool:
+    """
+    Runs a handler for each partition in its own workers.
+
+    Inside a partition records with the same key go to the same worker,
+    so per-key order is kept while different keys and partitions are
+    processed concurrently.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[ConsumerRecord], Awaitable],
+        concurrency: int,
+        workers_per_partition: int = 1,
+        queue_size: int = 100,
+    ) -> None:
+        self.handler = handler
+        self.workers_per_partition = workers_per_partition
+        self.queue_size = queue_size
+        self.trackers: dict[TopicPartition, OffsetTracker] = {}
+        self._semaphore = Semaphore(concurrency)
+        self._queues: dict[tuple[TopicPartition, int], Queue] = {}
+        self._workers: dict[tuple[TopicPartition, int], Task] = {}
+
+    def _slot(self, msg: ConsumerRecord) -> int:
+        if self.workers_per_partition == 1:
+            return 0
+        if msg.key is None:
+            return msg.offset % self.workers_per_partition
+        return hash(msg.key) % self.workers_per_partition
+
+    def _queue(self, tp: TopicPartition, slot: int) -> Queue:
+        if (tp, slot) not in self._queues:
+            queue = Queue(maxsize=self.queue_size)
+            self._queues[(tp, slot)] = queue
+            self._workers[(tp, slot)] = create_task(self._work(tp, queue))
+        return self._queues[(tp, slot)]
+
+    async def _work(self, tp: TopicPartition, queue: Queue) -> None:
+        while True:
+            msg = await queue.get()
+            try:
+                async with self._semaphore:
+                    await self.handler(msg)
+            except Exception as e:
+                logging.error(f"Ошибка обработчика партиции {tp}: {e}")
+            finally:
+                self.trackers[tp].complete(msg.offset)
+                queue.task_done()
+
+    async def submit(self, msg: ConsumerRecord) -> None:
+        tp = TopicPartition(msg.topic, msg.partition)
+        self.trackers.setdefault(tp, OffsetTracker()).start(msg.offset)
+        await self._queue(tp, self._slot(msg)).put(msg)
+
+    def committable(self) -> dict[TopicPartition, int]:
+        offsets = {}
+        for tp, tracker in self.trackers.items():
+            offset = tracker.committable()
+            if offset is not None and offset != tracker.committed:
+                offsets[tp] = offset
+        return offsets
+
+    def mark_committed(self, offsets: dict[TopicPartition, int]) -> None:
+        for tp, offset in offsets.items():
+            if tp in self.trackers:
+                self.trackers[tp].committed = offset
+
+    async def drain(self, partitions: Optional[Iterable[TopicPartition]] = None) -> None:
+        partitions = set(partitions) if partitions is not None else None
+        await gather(
+            *[
+                queue.join()
+                for (tp, _), queue in self._queues.items()
+                if partitions is None or tp in partitions
+            ],
+        )
+
+    async def release(self, partitions: Iterable[TopicPartition]) -> None:
+        partitions = set(partitions)
+        for key in [key for key in self._workers if key[0] in partitions]:
+            worker = self._workers.pop(key)
+            self._queues.pop(key)
+            worker.cancel()
+            try:
+                await worker
+            except CancelledError:
+                pass
+        for tp in partitions:
+            self.trackers.pop(tp, None)
+
+    async def close(self) -> None:
+        await self.release({tp for tp, _ in self._workers})
+
+
+class PartitionRevokeListener(ConsumerRebalanceListener):
+    """
+    Lets the consumer finish and commit revoked partitions before a rebalance
+    """
+
+    def __init__(
+        self,
+        on_revoked: Callable[[set[TopicPartition]], Awaitable],
+    ) -> None:
+        self._on_revoked = on_revoked
+
+    async def on_partitions_revoked(self, revoked: set[TopicPartition]) -> None:
+        await self._on_revoked(revoked)
+
+    async def on_partitions_assigned(self, assigned: set[TopicPartition]) -> None:
+        logging.info(f"Назначены партиции: {assigned}")
@@ -0,0 +1,42 @@
+from typing import Optional
+
+from aiokafka.structs import ConsumerRecord
+
+MESSAGE_ID_HEADER = "message_id"
+CONTENT_TYPE_HEADER = "content-type"
+CORRELATION_ID_HEADER = "correlation_id"
+REPLY_TO_HEADER = "reply_to"
+DEADLINE_HEADER = "deadline"
+RPC_ERROR_HEADER = "rpc_error"
+RPC_STATUS_HEADER = "rpc_status"
+RETRY_ATTEMPT_HEADER = "retry_attempt"
+NOT_BEFORE_HEADER = "retry_not_before"
+ORIGINAL_TOPIC_HEADER = "original_topic"
+ORIGINAL_PARTITION_HEADER = "original_partition"
+ORIGINAL_OFFSET_HEADER = "original_offset"
+ERROR_HEADER = "error"
+FAILED_AT_HEADER = "failed_at"
+
+RPC_OK = b"ok"
+RPC_NOT_FOUND = b"not_found"
+RPC_ERROR = b"error"
+RPC_EXPIRED = b"expired"
+
+FAILURE_HEADERS = frozenset(
+    (
+        RETRY_ATTEMPT_HEADER,
+        NOT_BEFORE_HEADER,
+        ORIGINAL_TOPIC_HEADER,
+        ORIGINAL_PARTITION_HEADER,
+        ORIGINAL_OFFSET_HEADER,
+        ERROR_HEADER,
+        FAILED_AT_HEADER,
+    ),
+)
+
+
+def get_header(msg: ConsumerRecord, name: str) -> Optional[bytes]:
+    for key, value in msg.headers or ():
+        if key == name:
+            return value
+    return None
@@ -0,0 +1,122 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, NoReturn, Optional, Union
+
+from aiokafka.structs import ConsumerRecord
+from redis.asyncio import Redis
+from src.infrastructure.amqp.broker.headers import (MESSAGE_ID_HEADER,
+                                                    get_header)
+from src.infrastructure.exceptions.mq_exceptions import MessageInProgress
+
+PROCESSING = "processing"
+DONE = "done"
+
+
+class DedupStore:
+    """
+    Remembers processed message ids: a bounded in-process LRU in front
+    of a Redis key with TTL shared by all consumers of the group.
+
+    A claim writes a short-lived `processing` marker, the id is marked
+    `done` with the long TTL only after the handler succeeded, so a record
+    whose consumer died mid-handler is processed again once the marker
+    expires. `duplicates` counts the claims of messages already done.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        prefix: str = "dedup",
+        ttl: int = 86400,
+        processing_ttl: int = 300,
+        local_size: int = 100_000,
+    ) -> NoReturn:
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.processing_ttl = processing_ttl
+        self.local_size = local_size
+        self.duplicates = 0
+        self._local: OrderedDict[str, None] = OrderedDict()
+
+    def _key(self, message_id: str) -> str:
+        return f"{self.prefix}:{message_id}"
+
+    def _remember(self, message_id: str) -> None:
+        self._local[message_id] = None
+        self._local.move_to_end(message_id)
+        if len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def claim(self, message_id: str) -> bool:
+        """
+        True when the caller should process the message, False when it is
+        already done. Raises MessageInProgress while another consumer holds
+        the processing marker.
+        """
+        if message_id in self._local:
+            self._local.move_to_end(message_id)
+            self.duplicates += 1
+            return False
+        if await self.redis_client.set(
+            name=self._key(message_id),
+            value=PROCESSING,
+            ex=self.processing_ttl,
+            nx=True,
+        ):
+            return True
+        state = await self.redis_client.get(self._key(message_id))
+        if state is None:
+            return await self.claim(message_id)
+        if state in (DONE, DONE.encode("utf-8")):
+            self._remember(message_id)
+            self.duplicates += 1
+            return False
+        raise MessageInProgress(data=message_id)
+
+    async def complete(self, message_id: str) -> None:
+        await self.redis_client.set(name=self._key(message_id), value=DONE, ex=self.ttl)
+        self._remember(message_id)
+
+    async def release(self, message_id: str) -> None:
+        self._local.pop(message_id, None)
+        await self.redis_client.delete(self._key(message_id))
+
+
+class IdempotentHandler:
+    """
+    Wraps a consumer handler and skips records that were already processed.
+
+    The id is taken from the `message_id` header set by KafkaProducer,
+    records without it fall back to their coordinates. A record that is
+    still being processed by another consumer raises MessageInProgress,
+    so it goes through the consumer's retries instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        on_message: Union[callable, Awaitable],
+        store: DedupStore,
+        header: str = MESSAGE_ID_HEADER,
+    ) -> NoReturn:
+        self.on_message = on_message
+        self.store = store
+        self.header = header
+
+    def message_id(self, msg: ConsumerRecord) -> str:
+        if message_id := get_header(msg, self.header):
+            return message_id.decode("utf-8")
+        return f"{msg.topic}:{msg.partition}:{msg.offset}"
+
+    async def __call__(self, msg: ConsumerRecord) -> Optional[Any]:
+        message_id = self.message_id(msg)
+        if not await self.store.claim(message_id):
+            logging.info(f"Пропущен дубликат сообщения {message_id}")
+            return None
+        try:
+            result = await self.on_message(msg)
+        except Exception:
+            await self.store.release(message_id)
+            raise
+        await self.store.complete(message_id)
+        return result
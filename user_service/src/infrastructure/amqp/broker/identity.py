@@ -0,0 +1,25 @@
+import socket
+from multiprocessing import current_process
+from typing import Any
+
+from src.infrastructure.server.config import settings
+
+
+def worker_identity() -> str:
+    """
+    Identity that survives restarts, so a restarted worker reuses its
+    transactional ids and reply topic and fences its zombie: WORKER_ID
+    from settings/env (e.g. a StatefulSet ordinal or worker index),
+    otherwise the host name, which is stable for StatefulSet pods,
+    followed by the name of the process. The API runs in MainProcess and
+    the background tasks in the `background` process, so the processes
+    of one worker never share an id.
+    """
+    worker_id = settings.get("WORKER_ID")
+    if worker_id is None:
+        worker_id = socket.gethostname()
+    return f"{worker_id}-{current_process().name}"
+
+
+def transactional_id_for(prefix: str, *parts: Any) -> str:
+    return "-".join([prefix, worker_identity(), *map(str, parts)])
@@ -1,12 +1,62 @@
 import logging
 import uuid
-from asyncio import (AbstractEventLoop, Future, TimeoutError, get_event_loop,
-                     sleep, wait_for)
-from typing import Any, Awaitable, List, NoReturn, Optional, Self, Union
+from asyncio import (AbstractEventLoop, CancelledError, Event, Future, Lock,
+                     Semaphore, Task, gather, get_event_loop, sleep, wait_for)
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from time import perf_counter, time
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Awaitable, Iterable,
+                    List, NoReturn, Optional, Self, Union)
 
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+from aiokafka.partitioner import DefaultPartitioner
+from aiokafka.producer.message_accumulator import BatchBuilder
+from aiokafka.structs import ConsumerRecord, RecordMetadata, TopicPartition
+from src.infrastructure.amqp.broker.concurrency import (
+    PartitionRevokeListener, PartitionWorkerPool)
+from src.infrastructure.amqp.broker.headers import (CONTENT_TYPE_HEADER,
+                                                    CORRELATION_ID_HEADER,
+                                                    DEADLINE_HEADER,
+                                                    MESSAGE_ID_HEADER,
+                                                    NOT_BEFORE_HEADER,
+                                                    REPLY_TO_HEADER, RPC_ERROR,
+                                                    RPC_ERROR_HEADER,
+                                                    RPC_EXPIRED, RPC_NOT_FOUND,
+                                                    RPC_OK, RPC_STATUS_HEADER,
+                                                    get_header)
+from src.infrastructure.amqp.broker.identity import transactional_id_for
+from src.infrastructure.base.base_metrics import (BatchStats, DeliveryStats,
+                                                  RpcServerStats)
 from src.infrastructure.base.mixin.broker_mixin import BrokerSerializeMixin
 
+if TYPE_CHECKING:
+    from src.infrastructure.amqp.broker.retry import FailureRouter
+
+
+class TransactionalBatch:
+    def __init__(self) -> None:
+        self.messages: list[tuple[str, Union[str, bytes, list, dict], Optional[bytes]]] = []
+        self.offsets: dict[TopicPartition, int] = {}
+        self.group_id: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def add(
+        self,
+        message: Union[str, bytes, list, dict],
+        topic: str,
+        key: Optional[bytes] = None,
+    ) -> None:
+        self.messages.append((topic, message, key))
+
+    def add_offsets(self, offsets: dict[TopicPartition, int], group_id: str) -> None:
+        if self.group_id and self.group_id != group_id:
+            raise ValueError("Offsets of one transaction must belong to one consumer group")
+        self.group_id = group_id
+        for tp, offset in offsets.items():
+            self.offsets[tp] = max(offset, self.offsets.get(tp, 0))
+
 
 class KafkaProducer(BrokerSerializeMixin):
     def __init__(
@@ -14,22 +64,39 @@ class KafkaProducer(BrokerSerializeMixin):
         host: str,
         port: int,
         acks: str,
-        transactional_id: Any,
+        transactional_id: Any = None,
         loop: Optional[AbstractEventLoop] = None,
         topics: Optional[List[str]] = None,
         logging_config: Optional[str] = None,
+        linger_ms: int = 0,
+        max_batch_size: int = 16384,
+        compression_type: Optional[str] = None,
+        max_in_flight_bytes: int = 32 * 1024 * 1024,
+        transactional_id_prefix: Optional[str] = None,
     ) -> NoReturn:
         self.host = host
         self.port = port
         self.loop = loop if loop else get_event_loop()
         self.topics = topics if topics else []
         self.logging_config = logging_config.upper() if logging_config else logging.INFO
-        self._response_queue = {}
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self._in_flight_bytes = 0
+        self._window_released = Event()
+        self._metrics: dict[str, DeliveryStats] = defaultdict(DeliveryStats)
+        self._batches: dict[str, BatchStats] = defaultdict(BatchStats)
+        self._partitioner = DefaultPartitioner()
+        self._transaction_lock = Lock()
+        if transactional_id_prefix:
+            transactional_id = transactional_id_for(transactional_id_prefix)
+        self.transactional_id = transactional_id
         self.__producer = AIOKafkaProducer(
             bootstrap_servers=f"{host}:{port}",
             loop=self.loop,
             acks=acks,
             transactional_id=transactional_id,
+            linger_ms=linger_ms,
+            max_batch_size=max_batch_size,
+            compression_type=compression_type,
         )
 
     async def __aenter__(self) -> Self:
@@ -70,44 +137,180 @@ class KafkaProducer(BrokerSerializeMixin):
         )
         logging.info("Сообщение отправлено")
 
-    async def transactional_send_message(
+    @property
+    def in_flight_bytes(self) -> int:
+        return self._in_flight_bytes
+
+    @property
+    def metrics(self) -> dict[str, dict]:
+        return {
+            topic: {**stats.snapshot(), "batches": self._batches[topic].snapshot() if topic in self._batches else None}
+            for topic, stats in self._metrics.items()
+        }
+
+    async def _acquire_window(self, size: int) -> None:
+        while self._in_flight_bytes and self._in_flight_bytes + size > self.max_in_flight_bytes:
+            self._window_released.clear()
+            await self._window_released.wait()
+        self._in_flight_bytes += size
+
+    def _release_window(self, size: int) -> None:
+        self._in_flight_bytes -= size
+        self._window_released.set()
+
+    def _delivered(self, topic: str, size: int, started: float, future: Future, records: int = 1) -> None:
+        self._release_window(size)
+        failed = future.cancelled() or future.exception() is not None
+        self._metrics[topic].observe(size=size, latency=perf_counter() - started, failed=failed, records=records)
+
+    def _batch_delivered(self, topic: str, records: int, size: int, started: float, future: Future) -> None:
+        self._delivered(topic, size, started, future, records=records)
+        if not future.cancelled() and future.exception() is None:
+            self._batches[topic].observe(records, perf_counter() - started, payload=size)
+
+    @staticmethod
+    def _headers(headers: Optional[list[tuple[str, bytes]]], content_type: Optional[str]) -> list[tuple[str, bytes]]:
+        headers = list(headers or [])
+        if content_type:
+            headers.append((CONTENT_TYPE_HEADER, content_type.encode("utf-8")))
+        if not any(header == MESSAGE_ID_HEADER for header, _ in headers):
+            headers.append((MESSAGE_ID_HEADER, uuid.uuid4().hex.encode("utf-8")))
+        return headers
+
+    async def _send(
         self,
         message: Union[str, bytes, list, dict],
         topic: str,
-    ) -> None:
-        await self._init_logger()
+        key: Optional[bytes] = None,
+        headers: Optional[list[tuple[str, bytes]]] = None,
+        content_type: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> Future:
+        value = self.serialize_message(message, content_type=content_type, schema=schema)
+        size = len(value) if value else 0
+        headers = self._headers(headers, content_type)
+        await self._acquire_window(size)
+        started = perf_counter()
         try:
-            async with self:
-                await self.simple_send_message(
-                    topic=topic,
-                    message=self.serialize_message(message),
-                )
-                logging.info("Сообщение отправлено и транзакция зафиксирована")
-        except Exception as e:
-            await self.__producer.abort_transaction()
-            logging.error(f"Ошибка при отправке сообщения: {e}, транзакция откатана")
-
-    async def rpc_request(
-        self, message: Union[str, bytes, dict], topic: str, timeout: float = 10.0
-    ) -> Any:
-        correlation_id = str(uuid.uuid4())
-        rpc_message = self.serialize_message(
-            {"message": message, "correlation_id": correlation_id}
+            future = await self.__producer.send(
+                topic=topic,
+                value=value,
+                key=key,
+                headers=headers,
+            )
+        except Exception:
+            self._release_window(size)
+            raise
+        self._metrics[topic].sent += 1
+        future.add_done_callback(lambda done: self._delivered(topic, size, started, done))
+        return future
+
+    async def send(
+        self,
+        message: Union[str, bytes, list, dict],
+        topic: str,
+        key: Optional[bytes] = None,
+        headers: Optional[list[tuple[str, bytes]]] = None,
+        content_type: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> Future:
+        return await self._send(
+            message,
+            topic=topic,
+            key=key,
+            headers=headers,
+            content_type=content_type,
+            schema=schema,
         )
 
-        future = Future()
-        self._response_queue[correlation_id] = future
+    async def _send_batch(self, batch: BatchBuilder, topic: str, partition: int) -> Future:
+        batch.close()
+        size, records = batch.size(), batch.record_count()
+        await self._acquire_window(size)
+        started = perf_counter()
+        try:
+            future = await self.__producer.send_batch(batch, topic, partition=partition)
+        except Exception:
+            self._release_window(size)
+            raise
+        self._metrics[topic].sent += records
+        future.add_done_callback(lambda done: self._batch_delivered(topic, records, size, started, done))
+        return future
 
-        await self.simple_send_message(rpc_message, topic)
+    async def send_many(
+        self,
+        messages: Iterable[Union[str, bytes, list, dict]],
+        topic: str,
+        key: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> list[RecordMetadata]:
+        """
+        Packs the messages into record batches of up to `max_batch_size`
+        bytes and submits each one whole, returns the metadata of every
+        batch. Batches of a keyed call go to the key's partition, unkeyed
+        ones are spread over the partitions batch by batch.
+        """
+        partitions = sorted(await self.__producer.partitions_for(topic))
+        futures = []
+        batch = self.__producer.create_batch()
+        for message in messages:
+            record = {
+                "key": key,
+                "value": self.serialize_message(message, content_type=content_type, schema=schema),
+                "timestamp": None,
+                "headers": self._headers(None, content_type),
+            }
+            if batch.append(**record) is None:
+                futures.append(await self._send_batch(batch, topic, self._partitioner(key, partitions, partitions)))
+                batch = self.__producer.create_batch()
+                batch.append(**record)
+        if batch.record_count():
+            futures.append(await self._send_batch(batch, topic, self._partitioner(key, partitions, partitions)))
+        return await gather(*futures)
+
+    async def flush(self) -> None:
+        await self.__producer.flush()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[TransactionalBatch]:
+        batch = TransactionalBatch()
+        yield batch
+        if not batch.messages and not batch.offsets:
+            return
+        async with self._transaction_lock:
+            async with self:
+                futures = [
+                    await self._send(message, topic=topic, key=key)
+                    for topic, message, key in batch.messages
+                ]
+                if batch.offsets:
+                    await self.__producer.send_offsets_to_transaction(
+                        batch.offsets,
+                        batch.group_id,
+                    )
+            await gather(*futures)
 
+    async def transactional_send_many(
+        self,
+        messages: Iterable[Union[str, bytes, list, dict]],
+        topic: str,
+    ) -> None:
+        await self._init_logger()
         try:
-            response = await wait_for(future, timeout)
-            return response
-        except TimeoutError:
-            logging.error("RPC запрос не получил ответ в течение времени ожидания")
-            return None
-        finally:
-            self._response_queue.pop(correlation_id, None)
+            async with self.transaction() as batch:
+                for message in messages:
+                    batch.add(message, topic=topic)
+            logging.info("Сообщения отправлены и транзакция зафиксирована")
+        except Exception as e:
+            logging.error(f"Ошибка при отправке сообщений: {e}, транзакция откатана")
+
+    async def transactional_send_message(
+        self,
+        message: Union[str, bytes, list, dict],
+        topic: str,
+    ) -> None:
+        await self.transactional_send_many([message], topic=topic)
 
 
 class KafkaConsumer(BrokerSerializeMixin):
@@ -119,6 +322,11 @@ class KafkaConsumer(BrokerSerializeMixin):
         loop: Optional[AbstractEventLoop] = None,
         topics: Optional[List[str]] = None,
         logging_config: Optional[str] = None,
+        group_id: Optional[str] = None,
+        enable_auto_commit: bool = False,
+        commit_interval: float = 5.0,
+        failure_router: Optional["FailureRouter"] = None,
+        auto_offset_reset: str = "latest",
     ) -> NoReturn:
         self.host = host
         self.port = port
@@ -126,10 +334,18 @@ class KafkaConsumer(BrokerSerializeMixin):
         self.loop = loop if loop else get_event_loop()
         self.topics = topics if topics else []
         self.logging_config = logging_config.upper() if logging_config else logging.INFO
+        self.group_id = group_id
+        self.commit_interval = commit_interval
+        self.failure_router = failure_router
+        self.rpc_stats = RpcServerStats()
+        self._worker_pool: Optional[PartitionWorkerPool] = None
         self.__consumer = AIOKafkaConsumer(
             *topics,
             bootstrap_servers=f"{host}:{port}",
             loop=self.loop,
+            group_id=group_id,
+            enable_auto_commit=enable_auto_commit,
+            auto_offset_reset=auto_offset_reset,
         )
 
     async def _init_logger(self) -> None:
@@ -139,7 +355,10 @@ class KafkaConsumer(BrokerSerializeMixin):
     async def connect(self) -> None:
         await self._init_logger()
         await self.__consumer.start()
-        self.__consumer.subscribe(self.topics)
+        self.__consumer.subscribe(
+            self.topics,
+            listener=PartitionRevokeListener(self._on_partitions_revoked),
+        )
         logging.info("Инициализация kafka прошла успешно")
 
     async def disconnect(self) -> None:
@@ -147,49 +366,329 @@ class KafkaConsumer(BrokerSerializeMixin):
         await self.__consumer.stop()
         logging.info("Отключение kafka прошла успешно")
 
-    async def init_consuming(self, on_message: Union[callable, Awaitable]) -> None:
-        await self._init_logger()
-        async for msg in self.__consumer:
-            for attempt in range(self.retry):
-                try:
-                    await on_message(msg)
-                    await self.__consumer.commit()
-                    logging.info("Сообщение получено")
-                    break
-                except Exception as e:
-                    logging.error(
-                        f"Ошибка при обработке сообщения: {e}. Попытка {attempt + 1} из {self.retry}"
-                    )
-                    await sleep(0.1)
-            else:
+    @staticmethod
+    def offsets_to_commit(messages: Iterable[ConsumerRecord]) -> dict[TopicPartition, int]:
+        offsets: dict[TopicPartition, int] = {}
+        for msg in messages:
+            tp = TopicPartition(msg.topic, msg.partition)
+            offsets[tp] = max(msg.offset + 1, offsets.get(tp, 0))
+        return offsets
+
+    async def commit(self, offsets: Optional[dict[TopicPartition, int]] = None) -> None:
+        await self.__consumer.commit(offsets)
+
+    async def iterate(self, idle_timeout_ms: int = 5000) -> AsyncIterator[ConsumerRecord]:
+        while fetched := await self.__consumer.getmany(timeout_ms=idle_timeout_ms):
+            for messages in fetched.values():
+                for msg in messages:
+                    yield msg
+
+    async def _process(self, msg: ConsumerRecord, on_message: Union[callable, Awaitable]) -> bool:
+        attempts = 1 if self.failure_router else self.retry
+        for attempt in range(attempts):
+            try:
+                await on_message(msg)
+                logging.info("Сообщение получено")
+                return True
+            except Exception as e:
                 logging.error(
-                    f"Не удалось обработать сообщение после {self.retry} попыток"
+                    f"Ошибка при обработке сообщения: {e}. Попытка {attempt + 1} из {attempts}",
                 )
+                if self.failure_router:
+                    await self.failure_router.route(msg, e)
+                    return True
+                await sleep(0.1)
+        logging.error(
+            f"Не удалось обработать сообщение после {self.retry} попыток",
+        )
+        return False
 
-    async def rpc_response(
+    async def _commit_completed(self) -> None:
+        if not self._worker_pool:
+            return
+        offsets = self._worker_pool.committable()
+        if offsets:
+            await self.__consumer.commit(offsets)
+            self._worker_pool.mark_committed(offsets)
+
+    async def _on_partitions_revoked(self, revoked: set[TopicPartition]) -> None:
+        if not self._worker_pool or not revoked:
+            return
+        await self._worker_pool.drain(revoked)
+        await self._commit_completed()
+        await self._worker_pool.release(revoked)
+
+    async def _commit_periodically(self) -> None:
+        while True:
+            await sleep(self.commit_interval)
+            try:
+                await self._commit_completed()
+            except Exception as e:
+                logging.error(f"Ошибка фиксации смещений: {e}")
+
+    async def init_consuming(
         self,
-        on_request: Union[callable, Awaitable],
-        producer_client: KafkaProducer = None,
+        on_message: Union[callable, Awaitable],
+        concurrency: Optional[int] = None,
+        workers_per_partition: int = 1,
+        queue_size: int = 100,
     ) -> None:
+        await self._init_logger()
+        if concurrency:
+            await self._consume_concurrently(
+                on_message,
+                concurrency=concurrency,
+                workers_per_partition=workers_per_partition,
+                queue_size=queue_size,
+            )
+            return
         async for msg in self.__consumer:
+            if await self._process(msg, on_message):
+                await self.__consumer.commit()
+
+    async def _consume_concurrently(
+        self,
+        on_message: Union[callable, Awaitable],
+        concurrency: int,
+        workers_per_partition: int,
+        queue_size: int,
+    ) -> None:
+        self._worker_pool = PartitionWorkerPool(
+            handler=lambda msg: self._process(msg, on_message),
+            concurrency=concurrency,
+            workers_per_partition=workers_per_partition,
+            queue_size=queue_size,
+        )
+        committer = self.loop.create_task(self._commit_periodically())
+        try:
+            async for msg in self.__consumer:
+                await self._worker_pool.submit(msg)
+        finally:
+            committer.cancel()
             try:
-                data = self.deserialize_message(msg.value)
-                correlation_id = data.get("correlation_id")
-                request = data.get("message")
+                await committer
+            except CancelledError:
+                pass
+            await self._worker_pool.drain()
+            await self._commit_completed()
+            await self._worker_pool.close()
+            self._worker_pool = None
 
-                if not correlation_id:
-                    logging.warning("Пропущен запрос без correlation_id")
-                    continue
+    @staticmethod
+    def _retry_delay(msg: ConsumerRecord) -> float:
+        if not_before := get_header(msg, NOT_BEFORE_HEADER):
+            return max(int(not_before) / 1000 - time(), 0)
+        return 0
 
-                response = await on_request(request)
-                response_data = self.serialize_message(
-                    {"response": response, "correlation_id": correlation_id}
-                )
+    async def init_retry_consuming(self, on_message: Union[callable, Awaitable], poll_timeout_ms: int = 1000) -> None:
+        """
+        Consumes a retry tier. A record that is not due yet pauses its
+        partition, which is rewound to the record and resumed once the
+        record is due, so the consumer keeps polling and stays in its group
+        however long the tier's delay is.
+        """
+        await self._init_logger()
+        resume_at: dict[TopicPartition, float] = {}
+        while True:
+            now = time()
+            due = {tp for tp, at in resume_at.items() if at <= now}
+            resume_at = {tp: at for tp, at in resume_at.items() if tp not in due}
+            self.__consumer.resume(*(due & self.__consumer.assignment()))
+            timeout_ms = poll_timeout_ms
+            if resume_at:
+                timeout_ms = max(min(timeout_ms, int((min(resume_at.values()) - now) * 1000)), 0)
+            fetched = await self.__consumer.getmany(timeout_ms=timeout_ms)
+            for tp, messages in fetched.items():
+                for msg in messages:
+                    if delay := self._retry_delay(msg):
+                        self.__consumer.seek(tp, msg.offset)
+                        self.__consumer.pause(tp)
+                        resume_at[tp] = time() + delay
+                        break
+                    if await self._process(msg, on_message):
+                        await self.__consumer.commit({tp: msg.offset + 1})
+
+    @staticmethod
+    def _split_by_bytes(records: list[ConsumerRecord], max_bytes: int) -> list[list[ConsumerRecord]]:
+        chunks, chunk, size = [], [], 0
+        for msg in records:
+            if chunk and size + msg.serialized_value_size > max_bytes:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append(msg)
+            size += msg.serialized_value_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
-                await producer_client.simple_send_message(
-                    response_data, topic=msg.topic
+    async def _process_batch(
+        self,
+        records: list[ConsumerRecord],
+        on_batch: Union[callable, Awaitable],
+    ) -> None:
+        attempts = self.retry if len(records) == 1 and not self.failure_router else 1
+        for attempt in range(attempts):
+            try:
+                await on_batch([self.deserialize_record(msg) for msg in records])
+                return
+            except Exception as e:
+                error = e
+                logging.error(
+                    f"Ошибка при обработке пачки из {len(records)} сообщений: {e}. "
+                    f"Попытка {attempt + 1} из {attempts}",
                 )
+                if len(records) == 1 and attempt + 1 < attempts:
+                    await sleep(0.1)
+        if len(records) == 1:
+            msg = records[0]
+            if self.failure_router:
+                await self.failure_router.route(msg, error)
+                return
+            logging.error(
+                f"Пропущено сообщение {msg.topic}:{msg.partition}:{msg.offset} "
+                f"после {self.retry} попыток",
+            )
+            return
+        middle = len(records) // 2
+        await self._process_batch(records[:middle], on_batch)
+        await self._process_batch(records[middle:], on_batch)
+
+    async def init_batch_consuming(
+        self,
+        on_batch: Union[callable, Awaitable],
+        max_records: int = 500,
+        max_bytes: int = 1024 * 1024,
+        max_wait_ms: int = 500,
+    ) -> None:
+        await self._init_logger()
+        while True:
+            fetched = await self.__consumer.getmany(
+                timeout_ms=max_wait_ms,
+                max_records=max_records,
+            )
+            records = [msg for messages in fetched.values() for msg in messages]
+            if not records:
+                continue
+            for chunk in self._split_by_bytes(records, max_bytes):
+                await self._process_batch(chunk, on_batch)
+            await self.__consumer.commit(self.offsets_to_commit(records))
+            logging.info(f"Обработана пачка из {len(records)} сообщений")
+
+    async def lag(self) -> int:
+        lag = 0
+        for tp in self.__consumer.assignment():
+            highwater = self.__consumer.highwater(tp)
+            if highwater is not None:
+                lag += max(highwater - await self.__consumer.position(tp), 0)
+        return lag
+
+    @staticmethod
+    async def _reply(
+        producer_client: KafkaProducer,
+        msg: ConsumerRecord,
+        status: bytes,
+        response: Any = b"",
+        error: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> None:
+        correlation_id = get_header(msg, CORRELATION_ID_HEADER)
+        headers = [(CORRELATION_ID_HEADER, correlation_id), (RPC_STATUS_HEADER, status)]
+        if error:
+            headers.append((RPC_ERROR_HEADER, error.encode("utf-8")))
+        await producer_client.send(
+            response,
+            topic=get_header(msg, REPLY_TO_HEADER).decode("utf-8"),
+            key=correlation_id,
+            headers=headers,
+            content_type=content_type,
+        )
 
+    async def _respond(
+        self,
+        msg: ConsumerRecord,
+        on_request: Union[callable, Awaitable],
+        producer_client: KafkaProducer,
+        raw: bool,
+        timeout: float,
+        content_type: Optional[str] = None,
+    ) -> None:
+        """
+        Sends exactly one reply per request: the handler result with status
+        `ok`, an empty body with `not_found` when the handler returned None,
+        `error` with the rpc_error header, or `expired` past the deadline
+        """
+        correlation_id = get_header(msg, CORRELATION_ID_HEADER)
+        deadline = get_header(msg, DEADLINE_HEADER)
+        remaining = min(int(deadline) / 1000 - time(), timeout) if deadline else timeout
+        status, response, error = RPC_OK, b"", None
+        if remaining <= 0:
+            self.rpc_stats.expired += 1
+            logging.debug(f"Пропущен просроченный RPC запрос {correlation_id}")
+            status = RPC_EXPIRED
+        else:
+            started = perf_counter()
+            try:
+                request = msg.value if raw else self.deserialize_record(msg)
+                response = await wait_for(on_request(request), remaining)
+            except TimeoutError:
+                self.rpc_stats.expired += 1
+                logging.warning(f"RPC запрос {correlation_id} не обработан до истечения срока")
+                status = RPC_EXPIRED
             except Exception as e:
+                self.rpc_stats.failed += 1
                 logging.error(f"Ошибка обработки RPC запроса: {e}")
-                await sleep(0.1)
+                status, error = RPC_ERROR, str(e)
+            finally:
+                self.rpc_stats.latency.observe(perf_counter() - started)
+            if status == RPC_OK and response is None:
+                status, response = RPC_NOT_FOUND, b""
+
+        try:
+            if status == RPC_OK:
+                try:
+                    await self._reply(producer_client, msg, status, response, content_type=content_type)
+                except Exception as e:
+                    self.rpc_stats.failed += 1
+                    logging.error(f"Ошибка отправки RPC ответа: {e}")
+                    await self._reply(producer_client, msg, RPC_ERROR, error=str(e))
+            else:
+                await self._reply(producer_client, msg, status, error=error)
+            self.rpc_stats.handled += 1
+        except Exception as e:
+            logging.error(f"Ошибка отправки RPC ответа: {e}")
+
+    async def rpc_response(
+        self,
+        on_request: Union[callable, Awaitable],
+        producer_client: KafkaProducer = None,
+        raw: bool = False,
+        max_in_flight: int = 100,
+        timeout: float = 10.0,
+        content_type: Optional[str] = None,
+    ) -> None:
+        semaphore = Semaphore(max_in_flight)
+        tasks: set[Task] = set()
+
+        def _done(task: Task) -> None:
+            tasks.discard(task)
+            self.rpc_stats.in_flight -= 1
+            semaphore.release()
+
+        try:
+            async for msg in self.__consumer:
+                if not get_header(msg, CORRELATION_ID_HEADER) or not get_header(msg, REPLY_TO_HEADER):
+                    logging.warning("Пропущен запрос без correlation_id или reply_to")
+                    continue
+                self.rpc_stats.waiting += 1
+                try:
+                    await semaphore.acquire()
+                finally:
+                    self.rpc_stats.waiting -= 1
+                self.rpc_stats.in_flight += 1
+                task = self.loop.create_task(
+                    self._respond(msg, on_request, producer_client, raw, timeout, content_type),
+                )
+                tasks.add(task)
+                task.add_done_callback(_done)
+        finally:
+            await gather(*tasks, return_exceptions=True)
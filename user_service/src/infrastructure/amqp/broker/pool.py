@@ -0,0 +1,56 @@
+from zlib import crc32
+
+from src.infrastructure.amqp.broker.identity import transactional_id_for
+from src.infrastructure.amqp.broker.kafka import KafkaProducer
+from src.infrastructure.utils.asyncio_utils import safe_gather
+
+
+class KafkaProducerPool:
+    """
+    Several transactional producers of one worker.
+
+    Each producer gets its own transactional id, a topic/partition is
+    always served by the same producer so transactions on different
+    topics don't wait for each other.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        acks: str,
+        transactional_id_prefix: str,
+        size: int = 4,
+        **producer_options,
+    ) -> None:
+        self.producers = [
+            KafkaProducer(
+                host=host,
+                port=port,
+                acks=acks,
+                transactional_id=transactional_id_for(transactional_id_prefix, number),
+                **producer_options,
+            )
+            for number in range(size)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.producers)
+
+    def for_topic(self, topic: str, partition: int | None = None) -> KafkaProducer:
+        index = crc32(f"{topic}:{partition}".encode("utf-8")) % len(self.producers)
+        return self.producers[index]
+
+    async def connect(self) -> None:
+        await safe_gather(*[producer.connect() for producer in self.producers])
+
+    async def disconnect(self) -> None:
+        await safe_gather(*[producer.disconnect() for producer in self.producers])
+
+    @property
+    def metrics(self) -> dict[str, dict]:
+        result: dict[str, dict] = {}
+        for producer in self.producers:
+            for topic, stats in producer.metrics.items():
+                result[topic] = stats
+        return result
@@ -0,0 +1,113 @@
+import logging
+from time import time
+from typing import NoReturn, Optional
+
+from aiokafka.structs import ConsumerRecord
+from src.infrastructure.amqp.broker.headers import (ERROR_HEADER,
+                                                    FAILED_AT_HEADER,
+                                                    FAILURE_HEADERS,
+                                                    NOT_BEFORE_HEADER,
+                                                    ORIGINAL_OFFSET_HEADER,
+                                                    ORIGINAL_PARTITION_HEADER,
+                                                    ORIGINAL_TOPIC_HEADER,
+                                                    RETRY_ATTEMPT_HEADER,
+                                                    get_header)
+from src.infrastructure.amqp.broker.kafka import KafkaConsumer, KafkaProducer
+
+
+class FailureRouter:
+    """
+    Moves failed records to retry topics with growing delays and,
+    after the last tier, to the dead-letter topic.
+
+    For a source topic `register` and delays [5, 30] the tiers are
+    `register.retry.5s`, `register.retry.30s` and `register.dlq`.
+    """
+
+    def __init__(
+        self,
+        producer: KafkaProducer,
+        delays: list[int],
+        retry_suffix: str = "retry",
+        dead_letter_suffix: str = "dlq",
+    ) -> NoReturn:
+        self.producer = producer
+        self.delays = delays
+        self.retry_suffix = retry_suffix
+        self.dead_letter_suffix = dead_letter_suffix
+        self.routed = 0
+        self.dead_lettered = 0
+
+    def retry_topics(self, topic: str) -> list[str]:
+        return [f"{topic}.{self.retry_suffix}.{delay}s" for delay in self.delays]
+
+    def dead_letter_topic(self, topic: str) -> str:
+        return f"{topic}.{self.dead_letter_suffix}"
+
+    def snapshot(self) -> dict:
+        return {"routed": self.routed, "dead_lettered": self.dead_lettered}
+
+    async def route(self, msg: ConsumerRecord, error: Exception) -> None:
+        attempt = int(get_header(msg, RETRY_ATTEMPT_HEADER) or 0)
+        original_topic = (get_header(msg, ORIGINAL_TOPIC_HEADER) or msg.topic.encode("utf-8")).decode("utf-8")
+        headers = [(key, value) for key, value in msg.headers or () if key not in FAILURE_HEADERS]
+        headers.extend(
+            [
+                (RETRY_ATTEMPT_HEADER, str(attempt + 1).encode("utf-8")),
+                (ORIGINAL_TOPIC_HEADER, original_topic.encode("utf-8")),
+                (
+                    ORIGINAL_PARTITION_HEADER,
+                    get_header(msg, ORIGINAL_PARTITION_HEADER) or str(msg.partition).encode("utf-8"),
+                ),
+                (
+                    ORIGINAL_OFFSET_HEADER,
+                    get_header(msg, ORIGINAL_OFFSET_HEADER) or str(msg.offset).encode("utf-8"),
+                ),
+                (ERROR_HEADER, repr(error).encode("utf-8")),
+                (FAILED_AT_HEADER, str(int(time() * 1000)).encode("utf-8")),
+            ],
+        )
+        if attempt < len(self.delays):
+            topic = self.retry_topics(original_topic)[attempt]
+            not_before = int((time() + self.delays[attempt]) * 1000)
+            headers.append((NOT_BEFORE_HEADER, str(not_before).encode("utf-8")))
+            self.routed += 1
+        else:
+            topic = self.dead_letter_topic(original_topic)
+            self.dead_lettered += 1
+
+        delivery = await self.producer.send(msg.value, topic=topic, key=msg.key, headers=headers)
+        await delivery
+        logging.warning(f"Сообщение {msg.topic}:{msg.partition}:{msg.offset} перенаправлено в {topic}")
+
+
+class DeadLetterReplayer:
+    """
+    Republishes dead-lettered records to their original topic
+    """
+
+    def __init__(self, consumer: KafkaConsumer, producer: KafkaProducer) -> NoReturn:
+        self.consumer = consumer
+        self.producer = producer
+        self.replayed = 0
+
+    async def replay(self, limit: Optional[int] = None, idle_timeout_ms: int = 5000) -> int:
+        async for msg in self.consumer.iterate(idle_timeout_ms=idle_timeout_ms):
+            original_topic = get_header(msg, ORIGINAL_TOPIC_HEADER)
+            if not original_topic:
+                logging.warning(f"Пропущено сообщение без {ORIGINAL_TOPIC_HEADER}: {msg.offset}")
+                continue
+            headers = [(key, value) for key, value in msg.headers or () if key not in FAILURE_HEADERS]
+            delivery = await self.producer.send(
+                msg.value,
+                topic=original_topic.decode("utf-8"),
+                key=msg.key,
+                headers=headers,
+            )
+            await delivery
+            await self.consumer.commit(self.consumer.offsets_to_commit([msg]))
+            self.replayed += 1
+            if limit and self.replayed >= limit:
+                break
+        logging.info(f"Переотправлено сообщений из DLQ: {self.replayed}")
+        return self.replayed
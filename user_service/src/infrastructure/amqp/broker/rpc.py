@@ -0,0 +1,167 @@
+import logging
+import uuid
+from asyncio import (AbstractEventLoop, CancelledError, Future, Task,
+                     get_event_loop, sleep, wait_for)
+from time import time
+from typing import Any, NoReturn, Optional, Union
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.structs import ConsumerRecord
+from src.infrastructure.amqp.broker.headers import (CORRELATION_ID_HEADER,
+                                                    DEADLINE_HEADER,
+                                                    REPLY_TO_HEADER, RPC_ERROR,
+                                                    RPC_ERROR_HEADER,
+                                                    RPC_EXPIRED, RPC_NOT_FOUND,
+                                                    RPC_STATUS_HEADER,
+                                                    get_header)
+from src.infrastructure.amqp.broker.identity import worker_identity
+from src.infrastructure.amqp.broker.kafka import KafkaProducer
+from src.infrastructure.base.mixin.broker_mixin import BrokerSerializeMixin
+from src.infrastructure.exceptions.mq_exceptions import RpcRemoteError
+
+
+class KafkaRpcClient(BrokerSerializeMixin):
+    """
+    Request/reply over Kafka.
+
+    Every worker listens on its own reply topic, named after its
+    `worker_identity` so a restart reuses it, replies are matched to
+    pending futures by the correlation id header. The rpc_status header
+    tells a result from not found, a remote error or an expired request.
+    `producer` must not be transactional.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        producer: KafkaProducer,
+        reply_topic_prefix: str = "rpc_replies",
+        timeout: float = 10.0,
+        assignment_timeout: float = 30.0,
+        loop: Optional[AbstractEventLoop] = None,
+    ) -> NoReturn:
+        self.host = host
+        self.port = port
+        self.producer = producer
+        self.timeout = timeout
+        self.assignment_timeout = assignment_timeout
+        self.loop = loop if loop else get_event_loop()
+        self.reply_topic = f"{reply_topic_prefix}.{worker_identity()}"
+        self._pending: dict[bytes, Future] = {}
+        self._listener: Optional[Task] = None
+        self.__consumer = AIOKafkaConsumer(
+            self.reply_topic,
+            bootstrap_servers=f"{host}:{port}",
+            loop=self.loop,
+            auto_offset_reset="latest",
+            enable_auto_commit=False,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def _assigned(self) -> None:
+        while not self.__consumer.assignment():
+            await sleep(0.1)
+        for tp in self.__consumer.assignment():
+            await self.__consumer.position(tp)
+
+    async def connect(self) -> None:
+        """
+        Returns once the reply partitions are assigned and their offsets
+        resolved, so no reply to a request sent afterwards is skipped
+        """
+        await self.__consumer.start()
+        await wait_for(self._assigned(), self.assignment_timeout)
+        self._listener = self.loop.create_task(self._listen())
+        logging.info(f"RPC клиент слушает {self.reply_topic}")
+
+    async def disconnect(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except CancelledError:
+                pass
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        await self.__consumer.stop()
+        logging.info("Отключение RPC клиента прошло успешно")
+
+    def _fail_pending(self, error: BaseException) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def _listen(self) -> None:
+        try:
+            async for msg in self.__consumer:
+                self._resolve(msg)
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"RPC клиент перестал получать ответы из {self.reply_topic}: {e}")
+            self._fail_pending(e)
+
+    def _resolve(self, msg: ConsumerRecord) -> None:
+        correlation_id = get_header(msg, CORRELATION_ID_HEADER)
+        future = self._pending.pop(correlation_id, None)
+        if future is None or future.done():
+            logging.debug(f"Пропущен ответ без ожидающего запроса: {correlation_id}")
+            return
+        status = get_header(msg, RPC_STATUS_HEADER)
+        error = get_header(msg, RPC_ERROR_HEADER)
+        if status == RPC_ERROR or error:
+            future.set_exception(RpcRemoteError(data=error.decode("utf-8") if error else None))
+        elif status == RPC_EXPIRED:
+            future.set_exception(TimeoutError())
+        else:
+            future.set_result(msg)
+
+    async def request(
+        self,
+        message: Union[str, bytes, list, dict],
+        topic: str,
+        timeout: Optional[float] = None,
+        key: Optional[bytes] = None,
+        raw: bool = False,
+        content_type: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> Any:
+        if self._listener is None or self._listener.done():
+            raise ConnectionError(f"RPC клиент не слушает {self.reply_topic}")
+        timeout = timeout or self.timeout
+        deadline = time() + timeout
+        correlation_id = uuid.uuid4().hex.encode("utf-8")
+        future = self.loop.create_future()
+        self._pending[correlation_id] = future
+        try:
+            await self.producer.send(
+                message,
+                topic=topic,
+                key=key,
+                headers=[
+                    (CORRELATION_ID_HEADER, correlation_id),
+                    (REPLY_TO_HEADER, self.reply_topic.encode("utf-8")),
+                    (DEADLINE_HEADER, str(int(deadline * 1000)).encode("utf-8")),
+                ],
+                content_type=content_type,
+                schema=schema,
+            )
+            response = await wait_for(future, max(deadline - time(), 0))
+        except TimeoutError:
+            logging.error("RPC запрос не получил ответ в течение времени ожидания")
+            return None
+        finally:
+            self._pending.pop(correlation_id, None)
+
+        if get_header(response, RPC_STATUS_HEADER) == RPC_NOT_FOUND or response.value is None:
+            return None
+        if raw:
+            return response.value
+        return self.deserialize_record(response)
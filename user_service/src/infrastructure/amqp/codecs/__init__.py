@@ -0,0 +1,16 @@
+from .registry import (JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE,
+                       SCHEMA_CONTENT_TYPE, Codec, CodecRegistry, SchemaCodec,
+                       codec_registry, schema_codec)
+from .schema import EventSchema
+
+__all__: tuple[str] = (
+    "JSON_CONTENT_TYPE",
+    "MSGPACK_CONTENT_TYPE",
+    "SCHEMA_CONTENT_TYPE",
+    "Codec",
+    "CodecRegistry",
+    "EventSchema",
+    "SchemaCodec",
+    "codec_registry",
+    "schema_codec",
+)
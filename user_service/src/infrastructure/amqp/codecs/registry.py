@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Optional, Union
+from uuid import UUID
+
+import msgpack
+from orjson import dumps, loads
+from src.infrastructure.amqp.codecs.schema import SCHEMA_ID, EventSchema
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+SCHEMA_CONTENT_TYPE = "application/x-event-schema"
+
+
+class Codec(ABC):
+    content_type: str
+
+    @abstractmethod
+    def encode(self, message: Any, schema: Optional[str] = None) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def decode(self, payload: Union[bytes, memoryview]) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, message: Any, schema: Optional[str] = None) -> bytes:
+        return dumps(message)
+
+    def decode(self, payload: Union[bytes, memoryview]) -> Any:
+        return loads(payload)
+
+
+class MsgpackCodec(Codec):
+    content_type = MSGPACK_CONTENT_TYPE
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        if isinstance(value, UUID):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Unsupported type {type(value)}")
+
+    def encode(self, message: Any, schema: Optional[str] = None) -> bytes:
+        return msgpack.packb(message, default=self._default, use_bin_type=True)
+
+    def decode(self, payload: Union[bytes, memoryview]) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+
+class SchemaCodec(Codec):
+    """
+    Binary codec for registered EventSchema layouts. Payloads are about
+    half the size of JSON, but encoding and decoding are several times
+    slower than orjson (see benchmarks/codecs.py), so JSON stays the
+    default and this codec is opt-in per message via content_type.
+    """
+
+    content_type = SCHEMA_CONTENT_TYPE
+
+    def __init__(self) -> None:
+        self._by_name: dict[str, EventSchema] = {}
+        self._by_id: dict[int, EventSchema] = {}
+
+    def register(self, schema: EventSchema) -> EventSchema:
+        if self._by_id.get(schema.schema_id, schema) is not schema:
+            raise ValueError(f"Schema id {schema.schema_id} is already registered")
+        self._by_name[schema.name] = schema
+        self._by_id[schema.schema_id] = schema
+        return schema
+
+    def encode(self, message: Any, schema: Optional[str] = None) -> bytes:
+        return self._by_name[schema].encode(message)
+
+    def decode(self, payload: Union[bytes, memoryview]) -> Any:
+        (schema_id,) = SCHEMA_ID.unpack_from(payload)
+        return self._by_id[schema_id].decode(payload)
+
+
+class CodecRegistry:
+    def __init__(self, *codecs: Codec) -> None:
+        self._codecs: dict[str, Codec] = {}
+        for codec in codecs:
+            self.register(codec)
+
+    def register(self, codec: Codec) -> None:
+        self._codecs[codec.content_type] = codec
+
+    def get(self, content_type: str) -> Codec:
+        try:
+            return self._codecs[content_type]
+        except KeyError:
+            raise ValueError(f"Unknown content type {content_type}")
+
+    @property
+    def content_types(self) -> list[str]:
+        return list(self._codecs)
+
+
+schema_codec = SchemaCodec()
+codec_registry = CodecRegistry(JsonCodec(), MsgpackCodec(), schema_codec)
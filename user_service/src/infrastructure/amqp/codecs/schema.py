@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+from struct import Struct
+from typing import Any, Union
+from uuid import UUID
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+SCHEMA_ID = Struct("<H")
+
+_FIXED_FORMATS: dict[str, str] = {
+    "uuid": "16s",
+    "int": "q",
+    "float": "d",
+    "bool": "?",
+    "datetime": "q",
+    "str": "I",
+}
+
+
+def _encode_datetime(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _decode_datetime(value: int) -> datetime:
+    return (_EPOCH + timedelta(microseconds=value)).replace(tzinfo=None)
+
+
+class EventSchema:
+    """
+    Compact binary layout of a fixed event shape.
+
+    Payload: schema id (uint16), one struct with every fixed-size field
+    and the lengths of the strings, then the utf-8 bytes of the strings.
+    Naive datetimes are treated as UTC.
+    """
+
+    def __init__(self, name: str, schema_id: int, fields: list[tuple[str, str]]) -> None:
+        self.name = name
+        self.schema_id = schema_id
+        self.fields = fields
+        self.strings = [field for field, kind in fields if kind == "str"]
+        self._struct = Struct("<" + "".join(_FIXED_FORMATS[kind] for _, kind in fields))
+
+    def encode(self, message: dict) -> bytes:
+        fixed, strings = [], []
+        for field, kind in self.fields:
+            value = message[field]
+            if kind == "uuid":
+                value = (value if isinstance(value, UUID) else UUID(str(value))).bytes
+            elif kind == "datetime":
+                value = _encode_datetime(
+                    value if isinstance(value, datetime) else datetime.fromisoformat(value),
+                )
+            elif kind == "str":
+                encoded = value.encode("utf-8")
+                strings.append(encoded)
+                value = len(encoded)
+            fixed.append(value)
+        return b"".join(
+            (SCHEMA_ID.pack(self.schema_id), self._struct.pack(*fixed), *strings),
+        )
+
+    def decode(self, payload: Union[bytes, memoryview]) -> dict:
+        view = memoryview(payload)
+        values = self._struct.unpack_from(view, SCHEMA_ID.size)
+        position = SCHEMA_ID.size + self._struct.size
+        message: dict[str, Any] = {}
+        for (field, kind), value in zip(self.fields, values):
+            if kind == "uuid":
+                value = UUID(bytes=value)
+            elif kind == "datetime":
+                value = _decode_datetime(value)
+            elif kind == "str":
+                value, position = str(view[position:position + value], "utf-8"), position + value
+            message[field] = value
+        return message
@@ -0,0 +1,217 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class LatencyStats(BaseModel):
+    """
+    Accumulated latency of an operation, seconds
+    """
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+
+class BatchStats(BaseModel):
+    """
+    Counters of flushed batches, `payload` is their size in bytes
+    where the batch has one
+    """
+
+    batches: int = 0
+    messages: int = 0
+    payload: int = 0
+    latency: LatencyStats = Field(default_factory=LatencyStats)
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.messages / self.batches if self.batches else 0.0
+
+    @property
+    def avg_batch_bytes(self) -> float:
+        return self.payload / self.batches if self.batches else 0.0
+
+    def observe(self, size: int, latency: float, payload: int = 0) -> None:
+        self.batches += 1
+        self.messages += size
+        self.payload += payload
+        self.latency.observe(latency)
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "avg_batch_size": self.avg_batch_size,
+            "avg_batch_bytes": self.avg_batch_bytes,
+            "avg_flush_latency": self.latency.avg,
+            "max_flush_latency": self.latency.max,
+        }
+
+
+class DeliveryStats(BaseModel):
+    """
+    Delivery of produced records, latency is measured per send() call
+    or per submitted batch up to the broker acknowledgement
+    """
+
+    sent: int = 0
+    delivered: int = 0
+    failed: int = 0
+    bytes: int = 0
+    latency: LatencyStats = Field(default_factory=LatencyStats)
+
+    @property
+    def in_flight(self) -> int:
+        return self.sent - self.delivered - self.failed
+
+    def observe(self, size: int, latency: float, failed: bool = False, records: int = 1) -> None:
+        if failed:
+            self.failed += records
+            return
+        self.delivered += records
+        self.bytes += size
+        self.latency.observe(latency)
+
+    def snapshot(self) -> dict:
+        return {
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "bytes": self.bytes,
+            "avg_delivery_latency": self.latency.avg,
+            "max_delivery_latency": self.latency.max,
+        }
+
+
+class RpcServerStats(BaseModel):
+    """
+    State of an RPC responder
+    """
+
+    waiting: int = 0
+    in_flight: int = 0
+    handled: int = 0
+    failed: int = 0
+    expired: int = 0
+    latency: LatencyStats = Field(default_factory=LatencyStats)
+
+    @property
+    def queue_depth(self) -> int:
+        return self.waiting + self.in_flight
+
+    def snapshot(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "handled": self.handled,
+            "failed": self.failed,
+            "expired": self.expired,
+            "avg_handler_latency": self.latency.avg,
+            "max_handler_latency": self.latency.max,
+        }
+
+
+class PoolStats(BaseModel):
+    """
+    Usage of a connection pool
+    """
+
+    size: int = 0
+    in_use: int = 0
+    checkouts: int = 0
+    timeouts: int = 0
+    overflow: int = 0
+    failed_health_checks: int = 0
+    wait: LatencyStats = Field(default_factory=LatencyStats)
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "overflow": self.overflow,
+            "failed_health_checks": self.failed_health_checks,
+            "avg_wait": self.wait.avg,
+            "max_wait": self.wait.max,
+        }
+
+
+class ReplicationStats(BaseModel):
+    """
+    Progress of a table replicated into ClickHouse
+    """
+
+    rows: int = 0
+    deleted: int = 0
+    batches: int = 0
+    watermark: Optional[datetime] = None
+    observed_at: Optional[datetime] = None
+    caught_up_at: Optional[datetime] = None
+    latency: LatencyStats = Field(default_factory=LatencyStats)
+
+    @property
+    def lag(self) -> Optional[float]:
+        """
+        Age of the newest replicated change while a run is still copying
+        rows, 0 once the run has caught up with the source
+        """
+        if self.watermark is None:
+            return None
+        if self.caught_up_at is not None and self.caught_up_at >= self.observed_at:
+            return 0.0
+        return (datetime.now() - self.watermark).total_seconds()
+
+    def observe(self, size: int, watermark: datetime, latency: float) -> None:
+        self.rows += size
+        self.batches += 1
+        self.watermark = watermark
+        self.observed_at = datetime.now()
+        self.latency.observe(latency)
+
+    def snapshot(self) -> dict:
+        return {
+            "rows": self.rows,
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "watermark": self.watermark,
+            "lag": self.lag,
+            "avg_batch_latency": self.latency.avg,
+            "max_batch_latency": self.latency.max,
+        }
+
+
+class RoutingStats(BaseModel):
+    """
+    Decisions of a query router and latency of each backend
+    """
+
+    decisions: dict[str, int] = Field(default_factory=dict)
+    latency: dict[str, LatencyStats] = Field(default_factory=dict)
+
+    def observe(self, target: str, reason: str, latency: float) -> None:
+        decision = f"{target}:{reason}"
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+        self.latency.setdefault(target, LatencyStats()).observe(latency)
+
+    def snapshot(self) -> dict:
+        return {
+            "decisions": dict(self.decisions),
+            "latency": {
+                target: {"count": stats.count, "avg": stats.avg, "max": stats.max}
+                for target, stats in self.latency.items()
+            },
+        }
@@ -1,26 +1,53 @@
-from typing import Any, Union
+from struct import error as StructError
+from typing import Any, Optional, Union
 
+from aiokafka.structs import ConsumerRecord
 from orjson import dumps, loads
+from src.infrastructure.amqp.broker.headers import (CONTENT_TYPE_HEADER,
+                                                    get_header)
+from src.infrastructure.amqp.codecs import CodecRegistry, codec_registry
 from src.infrastructure.exceptions.mq_exceptions import (DeserializationError,
                                                          SerializationError)
 
 
 class BrokerSerializeMixin:
+    codecs: CodecRegistry = codec_registry
 
     @classmethod
-    def serialize_message(cls, message: Union[str, bytes, list, dict]) -> bytes:
+    def serialize_message(
+        cls,
+        message: Union[str, bytes, list, dict],
+        content_type: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> bytes:
         try:
+            if content_type and not isinstance(message, (bytes, memoryview)):
+                return cls.codecs.get(content_type).encode(message, schema=schema)
             if isinstance(message, str):
                 return message.encode("utf-8")
             if isinstance(message, (list, dict)):
                 return dumps(message)
             return message
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, KeyError, AttributeError, StructError):
             raise SerializationError(data=message)
 
     @classmethod
-    def deserialize_message(cls, message: bytes) -> Any:
+    def deserialize_message(
+        cls,
+        message: Union[bytes, memoryview],
+        content_type: Optional[str] = None,
+    ) -> Any:
         try:
+            if content_type:
+                return cls.codecs.get(content_type).decode(message)
             return loads(message)
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, KeyError, AttributeError, StructError):
             raise DeserializationError(data=message)
+
+    @classmethod
+    def deserialize_record(cls, msg: ConsumerRecord) -> Any:
+        content_type = get_header(msg, CONTENT_TYPE_HEADER)
+        return cls.deserialize_message(
+            msg.value,
+            content_type=content_type.decode("utf-8") if content_type else None,
+        )
@@ -1,9 +1,56 @@
-from sqlalchemy import AsyncAdaptedQueuePool, Pool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import logging
+from asyncio import CancelledError, Task, create_task, gather, sleep
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from itertools import count
+from time import monotonic, perf_counter
+from typing import Any, AsyncIterator, Optional
+from uuid import uuid4
+
+from sqlalchemy import Pool, QueuePool, text
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+from src.infrastructure.base.base_metrics import RoutingStats
 from src.infrastructure.base.singleton import Singleton
+from src.infrastructure.database.gateways.alchemy_pool import \
+    InstrumentedQueuePool
+from src.infrastructure.server.caller import current_caller
+
+PRIMARY = "primary"
+
+_REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END",
+)
+
+
+class _Replica:
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine.execution_options(isolation_level="AUTOCOMMIT"))
+        self.transactional_session = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self.lag: Optional[float] = None
 
 
 class AlchemyGateway(Singleton):
+    """
+    Sessions to the primary and, when configured, to read replicas.
+
+    Reads go round-robin to replicas whose replay lag is within
+    `max_replica_lag`; they fall back to the primary when no replica
+    qualifies or when the same caller wrote less than
+    `read_your_writes_window` seconds ago. Writes outside of a request
+    count for every read of the process outside of a request.
+
+    Replica lag is measured by a background task started with `start`
+    every `lag_check_interval` seconds, reads only look at the last
+    measurement and treat one older than three intervals as unknown.
+
+    With `pgbouncer` the asyncpg statement caches are disabled and prepared
+    statements get unique names, which is what transaction pooling needs.
+    """
+
     def __init__(
         self,
         host: str,
@@ -13,7 +60,16 @@ class AlchemyGateway(Singleton):
         password: str,
         database: str,
         echo: bool,
-        poolclass: Pool = AsyncAdaptedQueuePool,
+        poolclass: Pool = InstrumentedQueuePool,
+        pool_min_size: int = 5,
+        pool_max_size: int = 15,
+        pool_timeout: float = 30.0,
+        pgbouncer: bool = False,
+        replicas: Optional[list[str]] = None,
+        max_replica_lag: float = 5.0,
+        lag_check_interval: float = 5.0,
+        read_your_writes_window: float = 5.0,
+        max_tracked_writers: int = 100_000,
     ):
         self.dialect = dialect
         self.login = login
@@ -22,12 +78,17 @@ class AlchemyGateway(Singleton):
         self.port = port
         self.echo = echo
         self.database = database
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_timeout = pool_timeout
+        self.pgbouncer = pgbouncer
+        self.max_replica_lag = max_replica_lag
+        self.lag_check_interval = lag_check_interval
+        self.read_your_writes_window = read_your_writes_window
+        self.max_tracked_writers = max_tracked_writers
+        self.stats = RoutingStats()
 
-        self._engine = create_async_engine(
-            url=self._db_url,
-            echo=self.echo,
-            poolclass=poolclass,
-        )
+        self._engine = self._create_engine(self._db_url, poolclass)
         self._autocommit_session = self._engine.execution_options(
             isolation_level="AUTOCOMMIT",
         )
@@ -36,6 +97,49 @@ class AlchemyGateway(Singleton):
             expire_on_commit=False,
         )
         self._async_session_factory = async_sessionmaker(self._autocommit_session)
+        self._replicas = [
+            _Replica(
+                name=f"replica-{number}",
+                engine=self._create_engine(url, poolclass),
+            )
+            for number, url in enumerate(replicas or [])
+        ]
+        self._round_robin = count()
+        self._lag_checked_at = float("-inf")
+        self._lag_monitor: Optional[Task] = None
+        self._last_writes: OrderedDict[Optional[str], float] = OrderedDict()
+
+    def _create_engine(self, url: str, poolclass: Pool) -> AsyncEngine:
+        options: dict[str, Any] = {}
+        if issubclass(poolclass, QueuePool):
+            options.update(
+                pool_size=self.pool_min_size,
+                max_overflow=max(self.pool_max_size - self.pool_min_size, 0),
+                pool_timeout=self.pool_timeout,
+            )
+        if self.pgbouncer:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return create_async_engine(url=url, echo=self.echo, poolclass=poolclass, **options)
+
+    @property
+    def _engines(self) -> dict[str, AsyncEngine]:
+        return {PRIMARY: self._engine, **{replica.name: replica.engine for replica in self._replicas}}
+
+    async def _open_connections(self, engine: AsyncEngine, number: int) -> None:
+        connections = await gather(*[engine.connect() for _ in range(number)])
+        await gather(*[connection.close() for connection in connections])
+
+    async def warm_up(self) -> None:
+        for name, engine in self._engines.items():
+            try:
+                await self._open_connections(engine, self.pool_min_size)
+            except Exception as e:
+                logging.error(f"Не удалось прогреть пул соединений {name}: {e}")
+        logging.info(f"Пулы Postgres прогреты до {self.pool_min_size} соединений")
 
     @property
     def _db_url(self) -> str:
@@ -48,3 +152,97 @@ class AlchemyGateway(Singleton):
     @property
     def async_session_factory(self):
         return self._async_session_factory
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            **self.stats.snapshot(),
+            "replica_lag": {replica.name: replica.lag for replica in self._replicas},
+            "pools": {
+                name: engine.pool.stats.snapshot()
+                for name, engine in self._engines.items()
+                if isinstance(engine.pool, InstrumentedQueuePool)
+            },
+        }
+
+    async def _check_lag(self, replica: _Replica) -> None:
+        try:
+            async with replica.engine.connect() as connection:
+                replica.lag = float((await connection.execute(_REPLICA_LAG_QUERY)).scalar())
+        except Exception as e:
+            replica.lag = None
+            logging.warning(f"Реплика {replica.name} недоступна: {e}")
+
+    async def _monitor_lag(self) -> None:
+        while True:
+            await gather(*[self._check_lag(replica) for replica in self._replicas])
+            self._lag_checked_at = monotonic()
+            await sleep(self.lag_check_interval)
+
+    async def start(self) -> None:
+        if self._replicas and self._lag_monitor is None:
+            self._lag_monitor = create_task(self._monitor_lag())
+
+    async def close(self) -> None:
+        if self._lag_monitor:
+            self._lag_monitor.cancel()
+            try:
+                await self._lag_monitor
+            except CancelledError:
+                pass
+            self._lag_monitor = None
+
+    def _record_write(self) -> None:
+        caller = current_caller()
+        self._last_writes[caller] = monotonic()
+        self._last_writes.move_to_end(caller)
+        while len(self._last_writes) > self.max_tracked_writers:
+            self._last_writes.popitem(last=False)
+
+    def _wrote_recently(self) -> bool:
+        written_at = self._last_writes.get(current_caller())
+        return written_at is not None and monotonic() - written_at < self.read_your_writes_window
+
+    async def _reader(self, transactional: bool) -> tuple[str, str, async_sessionmaker]:
+        primary = self._transactional_session if transactional else self._async_session_factory
+        if not self._replicas:
+            return PRIMARY, "no_replicas", primary
+        if self._wrote_recently():
+            return PRIMARY, "read_your_writes", primary
+        if monotonic() - self._lag_checked_at > 3 * self.lag_check_interval:
+            return PRIMARY, "replica_lag", primary
+        healthy = [
+            replica
+            for replica in self._replicas
+            if replica.lag is not None and replica.lag <= self.max_replica_lag
+        ]
+        if not healthy:
+            return PRIMARY, "replica_lag", primary
+        replica = healthy[next(self._round_robin) % len(healthy)]
+        return replica.name, "replica", replica.transactional_session if transactional else replica.session_factory
+
+    @asynccontextmanager
+    async def read_session(self, transactional: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        `transactional` sessions run inside a transaction, which server-side
+        cursors need
+        """
+        name, reason, session_factory = await self._reader(transactional)
+        started = perf_counter()
+        async with session_factory() as session:
+            if transactional:
+                async with session.begin():
+                    yield session
+            else:
+                yield session
+        self.stats.observe(name, reason, perf_counter() - started)
+
+    @asynccontextmanager
+    async def write_session(self) -> AsyncIterator[AsyncSession]:
+        started = perf_counter()
+        try:
+            async with self._transactional_session() as session:
+                yield session
+        finally:
+            self._record_write()
+        self.stats.observe(PRIMARY, "write", perf_counter() - started)
@@ -0,0 +1,33 @@
+from time import perf_counter
+
+from sqlalchemy import AsyncAdaptedQueuePool, exc
+from src.infrastructure.base.base_metrics import PoolStats
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkouts, time spent waiting for a connection,
+    checkout timeouts and overflow usage
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats(size=self.size())
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.wait.observe(perf_counter() - started)
+        self.stats.checkouts += 1
+        self.stats.in_use = self.checkedout()
+        self.stats.overflow = max(self.overflow(), 0)
+        return connection
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self.stats.in_use = self.checkedout()
+        self.stats.overflow = max(self.overflow(), 0)
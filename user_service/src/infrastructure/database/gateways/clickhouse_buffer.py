@@ -0,0 +1,109 @@
+import logging
+from asyncio import CancelledError, Event, Lock, Task, create_task, sleep
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from src.infrastructure.base.base_metrics import BatchStats
+from src.infrastructure.database.gateways.clickhouse_pool import ClickHousePool
+
+
+class ClickHouseInsertBuffer:
+    """
+    Collects rows of one table column by column and writes them
+    as a single native columnar block on size or on timer
+    """
+
+    def __init__(
+        self,
+        pool: ClickHousePool,
+        database: str,
+        table: str,
+        columns: tuple[str, ...],
+        max_rows: int = 10000,
+        flush_interval: float = 1.0,
+        max_buffered_rows: int = 100000,
+        on_flush: Optional[Callable[[str], Awaitable]] = None,
+    ) -> None:
+        self.pool = pool
+        self.database = database
+        self.table = table
+        self.columns = columns
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_buffered_rows = max_buffered_rows
+        self.on_flush = on_flush
+        self.stats = BatchStats()
+        self._data: dict[str, list] = {column: [] for column in columns}
+        self._rows = 0
+        self._flushing = 0
+        self._space = Event()
+        self._lock = Lock()
+        self._timer: Optional[Task] = None
+        self._query = f"INSERT INTO {database}.{table} ({', '.join(columns)}) VALUES"
+
+    @property
+    def buffered_rows(self) -> int:
+        return self._rows + self._flushing
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Ошибка записи буфера {self.table} в ClickHouse: {e}")
+
+    async def add(self, row: dict) -> None:
+        """
+        Waits for room in the buffer before taking the row. Once the row
+        is buffered `add` does not raise: a failed flush keeps the rows and
+        is retried by the timer, so a caller never retries a row that will
+        be written anyway.
+        """
+        values = [row[column] for column in self.columns]
+        while self.buffered_rows >= self.max_buffered_rows:
+            self._space.clear()
+            await self._space.wait()
+        for column, value in zip(self.columns, values):
+            self._data[column].append(value)
+        self._rows += 1
+        if self._timer is None:
+            self._timer = create_task(self._flush_periodically())
+        if self._rows >= self.max_rows:
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Ошибка записи буфера {self.table} в ClickHouse: {e}")
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._rows:
+                return 0
+            data, rows = self._data, self._rows
+            self._data = {column: [] for column in self.columns}
+            self._rows, self._flushing = 0, rows
+            started = perf_counter()
+            try:
+                await self.pool.execute(self._query, list(data.values()), columnar=True)
+            except Exception:
+                for column, values in data.items():
+                    self._data[column][:0] = values
+                self._rows += rows
+                raise
+            finally:
+                self._flushing = 0
+                self._space.set()
+            self.stats.observe(size=rows, latency=perf_counter() - started)
+            if self.on_flush:
+                await self.on_flush(self.table)
+            return rows
+
+    async def close(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except CancelledError:
+                pass
+            self._timer = None
+        await self.flush()
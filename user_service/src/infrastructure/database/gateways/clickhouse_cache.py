@@ -0,0 +1,160 @@
+import logging
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from hashlib import sha1
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+import msgpack
+from redis.asyncio import Redis
+from src.infrastructure.database.gateways.clickhouse_query import \
+    CompiledQuery
+
+_MISS = object()
+
+_UUID, _DATETIME, _DATE, _DECIMAL = 1, 2, 3, 4
+
+
+def _encode_value(value: Any) -> msgpack.ExtType:
+    if isinstance(value, UUID):
+        return msgpack.ExtType(_UUID, value.bytes)
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_DATE, value.isoformat().encode())
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_DECIMAL, str(value).encode())
+    raise TypeError(f"Unsupported type {type(value)}")
+
+
+def _decode_value(code: int, data: bytes) -> Any:
+    if code == _UUID:
+        return UUID(bytes=data)
+    if code == _DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _DATE:
+        return date.fromisoformat(data.decode())
+    if code == _DECIMAL:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def dump_result(result: Any) -> bytes:
+    return msgpack.packb(result, default=_encode_value, use_bin_type=True)
+
+
+def load_result(payload: bytes) -> Any:
+    return msgpack.unpackb(payload, ext_hook=_decode_value, raw=False)
+
+
+class ClickHouseResultCache:
+    """
+    Two-tier cache of query results: an in-process LRU in front of Redis,
+    where results are stored as msgpack and zlib-compressed. Rows come
+    back from Redis as lists.
+
+    Keys include the version of the table, so bumping the version after
+    an insert or mutation makes every cached result of the table stale
+    in all processes. Each process reads a table version from Redis at
+    most once per `version_ttl`, so other processes see a bump within
+    that interval. `redis_client` must not decode responses.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        prefix: str = "chcache",
+        ttl: int = 60,
+        table_ttl: Optional[dict[str, int]] = None,
+        local_size: int = 1024,
+        compress_level: int = 6,
+        version_ttl: float = 1.0,
+    ) -> None:
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.table_ttl = dict(table_ttl or {})
+        self.local_size = local_size
+        self.compress_level = compress_level
+        self.version_ttl = version_ttl
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, tuple[float, int]] = {}
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "local_size": len(self._local),
+        }
+
+    def _ttl(self, table: str) -> int:
+        return self.table_ttl.get(table, self.ttl)
+
+    async def version(self, table: str) -> int:
+        if (entry := self._versions.get(table)) is not None and entry[0] > monotonic():
+            return entry[1]
+        version = int(await self.redis_client.get(f"{self.prefix}:version:{table}") or 0)
+        self._versions[table] = (monotonic() + self.version_ttl, version)
+        return version
+
+    async def bump(self, table: str) -> None:
+        try:
+            version = await self.redis_client.incr(f"{self.prefix}:version:{table}")
+            self._versions[table] = (monotonic() + self.version_ttl, version)
+        except Exception as e:
+            logging.error(f"Не удалось сбросить кэш запросов {table}: {e}")
+
+    async def key(self, table: str, query: CompiledQuery) -> str:
+        digest = sha1(f"{query.sql}\n{sorted(query.params.items())!r}".encode()).hexdigest()
+        return f"{self.prefix}:{table}:{await self.version(table)}:{digest}"
+
+    def _remember(self, key: str, table: str, result: Any) -> None:
+        self._local[key] = (monotonic() + self._ttl(table), result)
+        self._local.move_to_end(key)
+        if len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str, table: str) -> Any:
+        if (entry := self._local.get(key)) is not None:
+            expires, result = entry
+            if expires > monotonic():
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return result
+            del self._local[key]
+        if (payload := await self.redis_client.get(key)) is None:
+            self.misses += 1
+            return _MISS
+        result = load_result(zlib.decompress(payload))
+        self.redis_hits += 1
+        self._remember(key, table, result)
+        return result
+
+    async def set(self, key: str, table: str, result: Any) -> None:
+        self._remember(key, table, result)
+        payload = zlib.compress(dump_result(result), self.compress_level)
+        await self.redis_client.set(name=key, value=payload, ex=self._ttl(table))
+
+    async def fetch(self, table: str, query: CompiledQuery, load: Callable[[], Awaitable]) -> Any:
+        try:
+            key = await self.key(table, query)
+            result = await self.get(key, table)
+        except Exception as e:
+            logging.error(f"Кэш запросов недоступен: {e}")
+            return await load()
+        if result is not _MISS:
+            return result
+        result = await load()
+        try:
+            await self.set(key, table, result)
+        except Exception as e:
+            logging.error(f"Не удалось сохранить результат в кэш запросов: {e}")
+        return result
@@ -1,12 +1,20 @@
 import logging
-from typing import Any, Optional, Union
+from typing import Any, AsyncIterator, Optional, Union
 from uuid import UUID
 
-from clickhouse_driver import Client
-from pypika import Query, Table
-from src.infrastructure.database.models import Base
+from src.infrastructure.database.gateways.clickhouse_buffer import \
+    ClickHouseInsertBuffer
+from src.infrastructure.database.gateways.clickhouse_cache import \
+    ClickHouseResultCache
+from src.infrastructure.database.gateways.clickhouse_mutations import \
+    ClickHouseMutationQueue
+from src.infrastructure.database.gateways.clickhouse_pool import ClickHousePool
+from src.infrastructure.database.gateways.clickhouse_query import (
+    ClickHouseQueryCompiler, ClickHouseQuerySpec, CompiledQuery)
+from src.infrastructure.database.gateways.clickhouse_schema import \
+    ClickHouseSchemaSync
+from src.infrastructure.database.models import DELETED_COLUMN, Base
 from src.infrastructure.server.config import settings
-from src.infrastructure.utils.asyncio_utils import run_in_executor
 
 
 class ClickHouseManager:
@@ -18,6 +26,18 @@ class ClickHouseManager:
         user: str,
         password: str,
         logger: logging.Logger = logging,
+        pool_size: int = 8,
+        acquire_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        insert_max_rows: int = 10000,
+        insert_flush_interval: float = 1.0,
+        insert_max_buffered_rows: int = 100000,
+        query_cache_size: int = 512,
+        select_limit: int = 10000,
+        mutation_flush_interval: float = 5.0,
+        max_running_mutations: int = 8,
+        mutation_max_branches: int = 100,
+        result_cache: Optional[ClickHouseResultCache] = None,
     ) -> None:
         logging.basicConfig(level=logging.INFO)
         self.host = host
@@ -26,118 +46,254 @@ class ClickHouseManager:
         self.user = user
         self.password = password
         self.logger = logger
-        self.client = Client(
+        self.pool = ClickHousePool(
+            size=pool_size,
+            acquire_timeout=acquire_timeout,
+            health_check_interval=health_check_interval,
             host=self.host,
             port=self.port,
             user=self.user,
             password=self.password,
             database=self.database,
         )
-        self._options = settings.CLICKHOUSE.TYPES
+        self.insert_max_rows = insert_max_rows
+        self.insert_flush_interval = insert_flush_interval
+        self.insert_max_buffered_rows = insert_max_buffered_rows
+        self._buffers: dict[tuple[str, tuple[str, ...]], ClickHouseInsertBuffer] = {}
+        self.compiler = ClickHouseQueryCompiler(cache_size=query_cache_size)
+        self.select_limit = select_limit
+        self.result_cache = result_cache
+        self.mutations = ClickHouseMutationQueue(
+            pool=self.pool,
+            compiler=self.compiler,
+            database=self.database,
+            flush_interval=mutation_flush_interval,
+            max_running_mutations=max_running_mutations,
+            max_branches=mutation_max_branches,
+            before_apply=self.flush_inserts,
+            on_apply=self.bump_version,
+        )
+        for mapper in Base.registry.mappers:
+            model = mapper.class_
+            self.compiler.sort_keys[model.__tablename__] = model.__clickhouse__.order_by
+        self._options = dict(settings.CLICKHOUSE.TYPES)
+        self.schema = ClickHouseSchemaSync(
+            pool=self.pool,
+            database=self.database,
+            types=self._options,
+            logger=self.logger,
+        )
+
+    @property
+    def metrics(self) -> dict:
+        inserts: dict[str, dict] = {}
+        for (table, _), buffer in self._buffers.items():
+            inserts[table] = {**buffer.stats.snapshot(), "buffered_rows": buffer.buffered_rows}
+        return {
+            "pool": self.pool.stats.snapshot(),
+            "inserts": inserts,
+            "query_cache": {"hits": self.compiler.hits, "misses": self.compiler.misses},
+            "mutations": {
+                **self.mutations.stats.snapshot(),
+                "pending": self.mutations.pending,
+                "backlog": self.mutations.backlog,
+            },
+            "result_cache": self.result_cache.metrics if self.result_cache else None,
+        }
+
+    async def bump_version(self, table: str) -> None:
+        if self.result_cache:
+            await self.result_cache.bump(table)
+
+    async def flush_inserts(self, table: str) -> None:
+        for (buffered_table, _), buffer in list(self._buffers.items()):
+            if buffered_table == table:
+                await buffer.flush()
+
+    async def flush(self) -> None:
+        for buffer in list(self._buffers.values()):
+            await buffer.flush()
+        await self.mutations.flush()
+
+    async def close(self) -> None:
+        for buffer in list(self._buffers.values()):
+            try:
+                await buffer.close()
+            except Exception as e:
+                self.logger.error(f"Не удалось записать буфер {buffer.table}: {e}")
+        try:
+            await self.mutations.close()
+        except Exception as e:
+            self.logger.error(f"Не удалось применить мутации: {e}")
+        self.pool.close()
 
     @property
     def clickhouse_types(self) -> dict:
-        return dict(self._options)
+        return self._options
 
-    @staticmethod
-    def __build_filter_query(query: Any, filters: Any, table: Table) -> str:
-        search_params = filters.__dict__
-        for key, value in search_params.items():
-            if value and table[key]:
-                query = query.where(table[key] == value)
-        return str(query)
+    async def _latest(self, table: str, spec: ClickHouseQuerySpec) -> ClickHouseQuerySpec:
+        """
+        FINAL only works on the collapsing MergeTree family, tables created
+        before their model declared such an engine are read without it.
+        Tombstoned rows are dropped after the versions are collapsed.
+        """
+        if not spec.final:
+            return spec
+        entry = await self.schema.table(table)
+        if entry is None or not entry.supports_final:
+            return spec.model_copy(update={"final": False})
+        if DELETED_COLUMN not in entry.columns:
+            return spec
+        return spec.model_copy(update={"filters": {**spec.filters, DELETED_COLUMN: 0}})
+
+    async def live_source(self, table: str) -> str:
+        """
+        FROM target for hand-written queries with the same semantics as
+        `final=True` selects
+        """
+        entry = await self.schema.table(table)
+        source = f"{self.database}.{table}"
+        if entry is None or not entry.supports_final:
+            return source
+        if DELETED_COLUMN not in entry.columns:
+            return f"{source} FINAL"
+        return f"(SELECT * FROM {source} FINAL WHERE {DELETED_COLUMN} = 0)"
 
     async def select_object(self, table: str, uuid: Union[str, UUID]):
-        table = Table(table)
-        query = Query.from_(table).select("*").where(table.uuid == uuid)
-        query = str(query)
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
+        query = self.compiler.select(
+            table=table,
+            spec=await self._latest(table, ClickHouseQuerySpec(filters={"uuid": uuid}, limit=1, final=True)),
         )
+        return await self.pool.execute(query.sql, query.params)
 
-    async def select_objects(self, table: str, filters: Optional[Any] = None):
-        table = Table(table)
-        query = Query.from_(table).select("*")
-        if filters:
-            query = self.__build_filter_query(query=query, filters=filters, table=table)
-        query = str(query)
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
+    async def select_objects(
+        self,
+        table: str,
+        filters: Optional[Any] = None,
+        columns: Optional[list[str]] = None,
+        order_by: Optional[list[str]] = None,
+        limit: Optional[int] = None,
+        after: Optional[list[Any]] = None,
+        sample: Optional[float] = None,
+        final: bool = False,
+        cached: bool = True,
+    ):
+        """
+        Selects without an explicit limit are capped at `select_limit` rows,
+        one extra row is fetched to tell a full result from a truncated one
+        and a truncated result is logged
+        """
+        spec = ClickHouseQuerySpec.from_filter(filters)
+        capped = not (limit or spec.limit)
+        spec = spec.model_copy(
+            update={
+                "order_by": order_by or spec.order_by,
+                "limit": self.select_limit + 1 if capped else limit or spec.limit,
+                "after": after if after is not None else spec.after,
+                "sample": sample if sample is not None else spec.sample,
+                "final": final or spec.final,
+            },
         )
-
-    async def insert_object(self, table: str, data: dict):
-        t = Table(table)
-        query = Query.into(t).columns(*data.keys()).insert(*data.values())
-        query = str(query)
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
+        spec = await self._latest(table, spec)
+        query = self.compiler.select(
+            table=table,
+            spec=spec,
+            columns=tuple(columns) if columns else None,
         )
+        if not cached or self.result_cache is None:
+            rows = await self.pool.execute(query.sql, query.params)
+        else:
+            rows = await self.result_cache.fetch(
+                table,
+                query,
+                lambda: self.pool.execute(query.sql, query.params),
+            )
+        if capped and len(rows) > self.select_limit:
+            self.logger.warning(
+                f"Выборка из {table} обрезана до {self.select_limit} строк, используйте limit или stream_objects",
+            )
+            return rows[:self.select_limit]
+        return rows
 
-    async def update_object(self, table: str, update_data: dict, filters: Any):
-        table = Table(table)
-        query = Query.update(table)
-
-        for key, value in update_data.items():
-            query = query.set(table[key], value)
-        if filters:
-            query = self.__build_filter_query(query=query, filters=filters, table=table)
+    async def query(self, sql: str, params: Optional[dict] = None, table: Optional[str] = None):
+        if table is None or self.result_cache is None:
+            return await self.pool.execute(sql, params)
+        return await self.result_cache.fetch(
+            table,
+            CompiledQuery(sql, params or {}),
+            lambda: self.pool.execute(sql, params),
+        )
 
-        query = str(query)
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
+    async def stream_objects(
+        self,
+        table: str,
+        filters: Optional[Any] = None,
+        columns: Optional[list[str]] = None,
+        block_size: int = 10000,
+        prefetch: int = 4,
+        final: bool = True,
+    ) -> AsyncIterator[list[tuple]]:
+        """
+        Streams the current state of the rows like a `final=True` select:
+        one version per key and no tombstoned rows
+        """
+        spec = ClickHouseQuerySpec.from_filter(filters)
+        spec = await self._latest(table, spec.model_copy(update={"final": final or spec.final}))
+        query = self.compiler.select(
+            table=table,
+            spec=spec,
+            columns=tuple(columns) if columns else None,
         )
+        async for block in self.pool.iterate(
+            query.sql,
+            query.params,
+            block_size=block_size,
+            prefetch=prefetch,
+        ):
+            yield block
 
-    async def delete_object(self, table: str, filters: Any):
-        table = Table(table)
-        query = Query.from_(table).delete()
+    def _buffer(self, table: str, columns: tuple[str, ...]) -> ClickHouseInsertBuffer:
+        key = (table, columns)
+        if key not in self._buffers:
+            self._buffers[key] = ClickHouseInsertBuffer(
+                pool=self.pool,
+                database=self.database,
+                table=table,
+                columns=columns,
+                max_rows=self.insert_max_rows,
+                flush_interval=self.insert_flush_interval,
+                max_buffered_rows=self.insert_max_buffered_rows,
+                on_flush=self.bump_version,
+            )
+        return self._buffers[key]
 
-        if filters:
-            query = self.__build_filter_query(query=query, filters=filters, table=table)
+    async def insert_object(self, table: str, data: dict) -> None:
+        await self._buffer(table, tuple(data)).add(data)
 
-        query = str(query)
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
-        )
+    async def insert_columns(self, table: str, data: dict[str, list]) -> None:
+        query = f"INSERT INTO {self.database}.{table} ({', '.join(data)}) VALUES"
+        await self.pool.execute(query, list(data.values()), columnar=True)
+        await self.bump_version(table)
 
-    async def __create_table(self, table_name: str, columns: dict, **kwargs) -> None:
-        self.logger.info(f"Инициализация создания таблицы {table_name}")
-        columns_definition = ", ".join(
-            [f"{col_name} {col_type}" for col_name, col_type in columns.items()],
+    async def update_object(self, table: str, update_data: dict, filters: Any) -> None:
+        self.mutations.update(
+            table=table,
+            values=update_data,
+            filters=ClickHouseQuerySpec.from_filter(filters).filters,
         )
-        query = f"""
-                CREATE TABLE IF NOT EXISTS
-                {self.database}.{table_name}
-                ({columns_definition})
-                ENGINE = MergeTree ORDER BY uuid
-                """
-        await run_in_executor(
-            func=self.client.execute,
-            query=query,
-            **kwargs,
+
+    async def delete_object(self, table: str, filters: Any) -> None:
+        self.mutations.delete(
+            table=table,
+            filters=ClickHouseQuerySpec.from_filter(filters).filters,
         )
-        self.logger.info(f"Таблицы {table_name} успешно создана")
 
     async def create_table(self, model: Base) -> None:
-        table_name = model.__tablename__
-        columns = {}
-        existing_tables = await self.get_tables()
-        if table_name not in existing_tables:
-            for column in model.__table__.columns:
-                column_name = column.name
-                column_type = str(column.type)
-                columns[column_name] = self.clickhouse_types[column_type]
-            await self.__create_table(table_name, columns)
-        self.logger.debug(f"{table_name} already exists")
+        await self.sync_schema([model])
+
+    async def sync_schema(self, models: Optional[list[Base]] = None) -> list[str]:
+        return await self.schema.sync(models)
 
     async def get_tables(self, **kwargs) -> list:
         query = f"SHOW TABLES FROM {self.database}"
-        return await run_in_executor(
-            func=self.client.execute,
-            query=query,
-            **kwargs,
-        )
+        return await self.pool.execute(query, **kwargs)
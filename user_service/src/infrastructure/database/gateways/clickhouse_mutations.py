@@ -0,0 +1,196 @@
+import logging
+from asyncio import CancelledError, Lock, Task, create_task, sleep
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from src.infrastructure.base.base_metrics import BatchStats
+from src.infrastructure.database.gateways.clickhouse_pool import ClickHousePool
+from src.infrastructure.database.gateways.clickhouse_query import \
+    ClickHouseQueryCompiler
+
+UPDATE = "update"
+DELETE = "delete"
+
+
+def _freeze(filters: dict[str, Any]) -> Hashable:
+    return tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in filters.items())
+
+
+def _keeps_rows(values: dict[str, Any], filters: dict[str, Any]) -> bool:
+    return not set(values) & set(filters)
+
+
+class ClickHouseMutationQueue:
+    """
+    Coalesces updates and deletes per table and applies them on a timer.
+
+    Pending operations are kept per table as phases in submission order,
+    consecutive operations of one kind share a phase and are keyed by their
+    filters there: later updates are merged into earlier ones and a delete
+    drops the updates of the same rows right before it. Updates that change
+    a column they filter on select other rows afterwards and are neither
+    merged nor dropped. A flush applies the phases in order, an update phase
+    as one ALTER TABLE ... UPDATE per set of columns and a delete phase as
+    lightweight DELETEs, each covering at most `max_branches` operations.
+    Tables that still have more than `max_running_mutations` unfinished
+    mutations are skipped until ClickHouse catches up.
+
+    `before_apply` runs for a table right before its mutations are
+    submitted, the gateway flushes the table's insert buffers there so
+    mutations never miss rows that were written before them.
+    """
+
+    def __init__(
+        self,
+        pool: ClickHousePool,
+        compiler: ClickHouseQueryCompiler,
+        database: str,
+        flush_interval: float = 5.0,
+        max_running_mutations: int = 8,
+        max_branches: int = 100,
+        before_apply: Optional[Callable[[str], Awaitable]] = None,
+        on_apply: Optional[Callable[[str], Awaitable]] = None,
+    ) -> None:
+        self.pool = pool
+        self.compiler = compiler
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_running_mutations = max_running_mutations
+        self.max_branches = max_branches
+        self.before_apply = before_apply
+        self.on_apply = on_apply
+        self.stats = BatchStats()
+        self.backlog: dict[str, int] = {}
+        self._phases: dict[str, list[tuple[str, dict[Hashable, Any]]]] = {}
+        self._lock = Lock()
+        self._timer: Optional[Task] = None
+
+    @property
+    def pending(self) -> dict[str, int]:
+        return {table: sum(len(operations) for _, operations in phases) for table, phases in self._phases.items()}
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Ошибка применения мутаций в ClickHouse: {e}")
+
+    def _last(self, table: str, kind: str) -> Optional[dict[Hashable, Any]]:
+        phases = self._phases.get(table)
+        if phases and phases[-1][0] == kind:
+            return phases[-1][1]
+        return None
+
+    def _phase(self, table: str, kind: str) -> dict[Hashable, Any]:
+        operations = self._last(table, kind)
+        if operations is None:
+            operations = {}
+            self._phases.setdefault(table, []).append((kind, operations))
+        return operations
+
+    def update(self, table: str, values: dict[str, Any], filters: dict[str, Any]) -> None:
+        key = _freeze(filters)
+        updates = self._phase(table, UPDATE)
+        if key not in updates:
+            updates[key] = (dict(values), filters)
+        elif _keeps_rows(updates[key][0], filters):
+            updates[key][0].update(values)
+        else:
+            self._phases[table].append((UPDATE, {key: (dict(values), filters)}))
+        self._schedule()
+
+    def delete(self, table: str, filters: dict[str, Any]) -> None:
+        key = _freeze(filters)
+        updates = self._last(table, UPDATE)
+        if updates and key in updates and _keeps_rows(updates[key][0], filters):
+            del updates[key]
+            if not updates:
+                self._phases[table].pop()
+        self._phase(table, DELETE)[key] = filters
+        self._schedule()
+
+    def _restore(self, table: str, phases: list[tuple[str, dict[Hashable, Any]]]) -> None:
+        self._phases[table] = phases + self._phases.get(table, [])
+
+    async def refresh_backlog(self) -> dict[str, int]:
+        rows = await self.pool.execute(
+            "SELECT table, count() FROM system.mutations "
+            "WHERE database = %(database)s AND NOT is_done GROUP BY table",
+            {"database": self.database},
+        )
+        self.backlog = dict(rows)
+        return self.backlog
+
+    def _chunks(self, items: list) -> list[list]:
+        return [items[start:start + self.max_branches] for start in range(0, len(items), self.max_branches)]
+
+    async def _apply_updates(self, table: str, updates: list[tuple[dict, dict]]) -> None:
+        by_columns: dict[tuple[str, ...], list[tuple[dict, dict]]] = {}
+        for values, filters in updates:
+            by_columns.setdefault(tuple(sorted(values)), []).append((values, filters))
+        for columns, group in by_columns.items():
+            for chunk in self._chunks(group):
+                query = self.compiler.alter_update(self.database, table, columns, chunk)
+                await self.pool.execute(query.sql, query.params)
+
+    async def _apply_deletes(self, table: str, deletes: list[dict]) -> None:
+        for chunk in self._chunks(deletes):
+            query = self.compiler.lightweight_delete(self.database, table, chunk)
+            await self.pool.execute(query.sql, query.params)
+
+    async def _apply(self, table: str, phases: list[tuple[str, dict[Hashable, Any]]]) -> None:
+        """
+        Applies the phases in order, the ones not applied yet are queued
+        again in front of the operations submitted meanwhile if one fails
+        """
+        for position, (kind, operations) in enumerate(phases):
+            try:
+                if kind == UPDATE:
+                    await self._apply_updates(table, list(operations.values()))
+                else:
+                    await self._apply_deletes(table, list(operations.values()))
+            except Exception:
+                self._restore(table, phases[position:])
+                raise
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._phases:
+                return 0
+            backlog = await self.refresh_backlog()
+            applied = 0
+            for table in list(self._phases):
+                if backlog.get(table, 0) > self.max_running_mutations:
+                    logging.warning(f"Мутации {table} отложены, в очереди ClickHouse: {backlog[table]}")
+                    continue
+                phases = self._phases.pop(table)
+                size = sum(len(operations) for _, operations in phases)
+                started = perf_counter()
+                if self.before_apply:
+                    try:
+                        await self.before_apply(table)
+                    except Exception:
+                        self._restore(table, phases)
+                        raise
+                await self._apply(table, phases)
+                self.stats.observe(size=size, latency=perf_counter() - started)
+                applied += size
+                if self.on_apply:
+                    await self.on_apply(table)
+            return applied
+
+    async def close(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except CancelledError:
+                pass
+            self._timer = None
+        await self.flush()
@@ -0,0 +1,177 @@
+import logging
+import threading
+from asyncio import (CancelledError, Future, Queue, get_running_loop,
+                     run_coroutine_threadsafe, shield, wait_for)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from time import monotonic, perf_counter
+from typing import Any, AsyncIterator, Callable, Optional
+
+from clickhouse_driver import Client
+from src.infrastructure.base.base_metrics import PoolStats
+from src.infrastructure.exceptions.clickhouse_exceptions import \
+    ClickHouseUnavailable
+
+
+_END = object()
+
+
+class ClickHousePool:
+    """
+    Bounded set of native ClickHouse clients.
+
+    A client is used by one query at a time, queries run on a dedicated
+    executor with one thread per client. When the awaiting coroutine is
+    cancelled, the client goes back to the pool only after its thread
+    has finished with it.
+    """
+
+    def __init__(
+        self,
+        size: int = 8,
+        acquire_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        **client_options,
+    ) -> None:
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.client_options = client_options
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="clickhouse")
+        self.stats = PoolStats()
+        self._idle: Queue = Queue()
+        self._last_used: dict[int, float] = {}
+        self._detached: set[int] = set()
+
+    def _new_client(self) -> Client:
+        self.stats.size += 1
+        return Client(**self.client_options)
+
+    @staticmethod
+    def _ping(client: Client) -> bool:
+        if not client.connection.connected:
+            return True
+        return client.connection.ping()
+
+    async def _checkout(self) -> Client:
+        if self._idle.empty() and self.stats.size < self.size:
+            return self._new_client()
+        try:
+            return await wait_for(self._idle.get(), self.acquire_timeout)
+        except TimeoutError:
+            self.stats.timeouts += 1
+            raise ClickHouseUnavailable
+
+    def _release(self, client: Client, disconnect: bool = False) -> None:
+        if disconnect:
+            client.disconnect()
+        self.stats.in_use -= 1
+        self._last_used[id(client)] = monotonic()
+        self._idle.put_nowait(client)
+
+    def _release_when_done(self, client: Client, future: Future, disconnect: bool = False) -> None:
+        def release(_: Future) -> None:
+            if not future.cancelled():
+                future.exception()
+            self._detached.discard(id(client))
+            self._release(client, disconnect)
+
+        self._detached.add(id(client))
+        future.add_done_callback(release)
+
+    async def _call(self, client: Client, func: Callable[..., Any], *args, **kwargs) -> Any:
+        future = get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+        try:
+            return await shield(future)
+        except CancelledError:
+            self._release_when_done(client, future)
+            raise
+
+    async def _acquire(self) -> Client:
+        started = perf_counter()
+        client = await self._checkout()
+        self.stats.wait.observe(perf_counter() - started)
+        self.stats.checkouts += 1
+        self.stats.in_use += 1
+        if monotonic() - self._last_used.get(id(client), 0) < self.health_check_interval:
+            return client
+        try:
+            healthy = await self._call(client, self._ping, client)
+        except CancelledError:
+            raise
+        except Exception:
+            healthy = False
+        if not healthy:
+            self.stats.failed_health_checks += 1
+            logging.warning("Соединение с ClickHouse не прошло проверку, переподключение")
+            client.disconnect()
+        return client
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Client]:
+        client = await self._acquire()
+        try:
+            yield client
+        finally:
+            if id(client) not in self._detached:
+                self._release(client)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        async with self.acquire() as client:
+            return await self._call(client, func, client, *args, **kwargs)
+
+    async def execute(self, query: str, *args, **kwargs) -> Any:
+        return await self.run(Client.execute, query, *args, **kwargs)
+
+    async def iterate(
+        self,
+        query: str,
+        params: Optional[dict] = None,
+        block_size: int = 10000,
+        prefetch: int = 4,
+    ) -> AsyncIterator[list[tuple]]:
+        """
+        Streams the result in blocks of `block_size` rows, at most
+        `prefetch` blocks are read ahead of the consumer
+        """
+        loop = get_running_loop()
+        queue: Queue = Queue(maxsize=prefetch)
+        stopped = threading.Event()
+
+        async with self.acquire() as client:
+
+            def produce() -> None:
+                try:
+                    for block in client.execute_iter(
+                        query,
+                        params,
+                        settings={"max_block_size": block_size},
+                        chunk_size=block_size,
+                    ):
+                        if stopped.is_set():
+                            return
+                        run_coroutine_threadsafe(queue.put(block), loop).result()
+                    item = _END
+                except Exception as e:
+                    item = e
+                if not stopped.is_set():
+                    run_coroutine_threadsafe(queue.put(item), loop).result()
+
+            producer = loop.run_in_executor(self.executor, produce)
+            try:
+                while (item := await queue.get()) is not _END:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                if not producer.done():
+                    stopped.set()
+                    while not queue.empty():
+                        queue.get_nowait()
+                    self._release_when_done(client, producer, disconnect=True)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().disconnect()
+        self.executor.shutdown(wait=False)
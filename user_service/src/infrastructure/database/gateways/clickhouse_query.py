@@ -0,0 +1,244 @@
+import re
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from pydantic import BaseModel, Field
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_OPERATORS: dict[str, str] = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "in": "IN",
+    "not_in": "NOT IN",
+}
+
+
+class CompiledQuery(NamedTuple):
+    sql: str
+    params: dict[str, Any]
+
+
+class ClickHouseQuerySpec(BaseModel):
+    """
+    Filters use `<column>__<lookup>` keys: eq (default), neq, gt, gte,
+    lt, lte, in, not_in, prefix. `order_by` takes column names, `-` prefix
+    for descending; `after` holds the order_by values of the last row
+    of the previous page.
+    """
+
+    filters: dict[str, Any] = Field(default_factory=dict)
+    order_by: list[str] = Field(default_factory=list)
+    limit: Optional[int] = None
+    after: Optional[list[Any]] = None
+    sample: Optional[float] = None
+    final: bool = False
+
+    @classmethod
+    def from_filter(cls, filters: Any = None, **kwargs) -> "ClickHouseQuerySpec":
+        if filters is None:
+            return cls(**kwargs)
+        if isinstance(filters, cls):
+            return filters
+        if isinstance(filters, dict):
+            return cls(filters=filters, **kwargs)
+        values = filters.model_dump(exclude_none=True)
+        ordering_field = filters.Constants.ordering_field_name
+        order_by = values.pop(ordering_field, None) or []
+        values = {key: value for key, value in values.items() if not isinstance(value, dict)}
+        return cls(filters=values, order_by=order_by, **kwargs)
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name {name}")
+    return f'"{name}"'
+
+
+def _split_lookup(key: str) -> tuple[str, str]:
+    column, _, lookup = key.partition("__")
+    lookup = lookup or "eq"
+    if lookup not in _OPERATORS and lookup != "prefix":
+        raise ValueError(f"Unsupported lookup {lookup}")
+    return column, lookup
+
+
+class ClickHouseQueryCompiler:
+    """
+    Renders each query shape once into a template with `%(name)s`
+    placeholders and keeps the templates in an LRU cache,
+    values are bound by the driver at execution time.
+
+    Predicates on the leading sort key columns of a table go to PREWHERE:
+    the longest prefix of the sort key whose every column is filtered on,
+    so PREWHERE always narrows the primary index range.
+    """
+
+    def __init__(self, cache_size: int = 512) -> None:
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.sort_keys: dict[str, tuple[str, ...]] = {}
+        self._cache: OrderedDict[tuple, str] = OrderedDict()
+
+    def _template(self, key: tuple, build: Callable[[], str]) -> str:
+        if (sql := self._cache.get(key)) is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return sql
+        self.misses += 1
+        sql = self._cache[key] = build()
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return sql
+
+    @staticmethod
+    def _predicate(key: str, number: int, prefix: str = "f") -> str:
+        column, lookup = _split_lookup(key)
+        if lookup == "prefix":
+            return f"startsWith({_identifier(column)}, %({prefix}_{number})s)"
+        return f"{_identifier(column)} {_OPERATORS[lookup]} %({prefix}_{number})s"
+
+    @staticmethod
+    def _bind(filters: dict[str, Any], prefix: str = "f") -> dict[str, Any]:
+        params = {}
+        for number, (key, value) in enumerate(filters.items()):
+            if _split_lookup(key)[1] in ("in", "not_in"):
+                value = tuple(value) or (None,)
+            params[f"{prefix}_{number}"] = value
+        return params
+
+    def _conditions(self, table: str, filters: dict[str, Any]) -> tuple[list[str], list[str]]:
+        filtered = {_split_lookup(key)[0] for key in filters}
+        leading = set()
+        for column in self.sort_keys.get(table, ("uuid",)):
+            if column not in filtered:
+                break
+            leading.add(column)
+        prewhere, where = [], []
+        for number, key in enumerate(filters):
+            column, _ = _split_lookup(key)
+            (prewhere if column in leading else where).append(self._predicate(key, number))
+        return prewhere, where
+
+    @staticmethod
+    def _ordering(order_by: list[str]) -> tuple[list[str], Optional[str]]:
+        columns, directions = [], set()
+        for field in order_by:
+            descending = field.startswith("-")
+            directions.add(descending)
+            columns.append(f"{_identifier(field.lstrip('-+'))} {'DESC' if descending else 'ASC'}")
+        if len(directions) > 1:
+            return columns, None
+        return columns, ("<" if directions == {True} else ">")
+
+    def select(
+        self,
+        table: str,
+        spec: ClickHouseQuerySpec,
+        columns: Optional[tuple[str, ...]] = None,
+    ) -> CompiledQuery:
+        shape = (
+            "select",
+            table,
+            columns,
+            tuple(spec.filters),
+            tuple(spec.order_by),
+            spec.limit is not None,
+            spec.after is not None,
+            spec.sample,
+            spec.final,
+        )
+
+        def build() -> str:
+            prewhere, where = self._conditions(table, spec.filters)
+            ordering, keyset = self._ordering(spec.order_by)
+            if spec.after is not None:
+                if keyset is None or len(spec.after) != len(spec.order_by):
+                    raise ValueError("Keyset cursor needs one value per order_by column and one direction")
+                fields = ", ".join(_identifier(field.lstrip("-+")) for field in spec.order_by)
+                values = ", ".join(f"%(a_{number})s" for number in range(len(spec.after)))
+                where.append(f"({fields}) {keyset} ({values})")
+            selected = ", ".join(_identifier(column) for column in columns) if columns else "*"
+            sql = [f"SELECT {selected} FROM {_identifier(table)}"]
+            if spec.final:
+                sql.append("FINAL")
+            if spec.sample is not None:
+                sql.append(f"SAMPLE {float(spec.sample)}")
+            if prewhere:
+                sql.append(f"PREWHERE {' AND '.join(prewhere)}")
+            if where:
+                sql.append(f"WHERE {' AND '.join(where)}")
+            if ordering:
+                sql.append(f"ORDER BY {', '.join(ordering)}")
+            if spec.limit is not None:
+                sql.append("LIMIT %(limit)s")
+            return " ".join(sql)
+
+        sql = self._template(shape, build)
+        params = self._bind(spec.filters)
+        if spec.after is not None:
+            params.update({f"a_{number}": value for number, value in enumerate(spec.after)})
+        if spec.limit is not None:
+            params["limit"] = spec.limit
+        return CompiledQuery(sql, params)
+
+    def _condition(self, filters: dict[str, Any], group: int) -> str:
+        if not filters:
+            return "1"
+        return " AND ".join(self._predicate(key, number, f"f{group}") for number, key in enumerate(filters))
+
+    def _bind_groups(self, filters: list[dict[str, Any]]) -> dict[str, Any]:
+        params = {}
+        for group, group_filters in enumerate(filters):
+            params.update(self._bind(group_filters, f"f{group}"))
+        return params
+
+    def alter_update(
+        self,
+        database: str,
+        table: str,
+        columns: tuple[str, ...],
+        updates: list[tuple[dict[str, Any], dict[str, Any]]],
+    ) -> CompiledQuery:
+        """
+        One mutation for many (values, filters) pairs: every column is set
+        through multiIf over the filters, rows matching none keep their value.
+        The statement grows with every pair, callers bound the batch size.
+        """
+        shape = tuple((tuple(values), tuple(filters)) for values, filters in updates)
+
+        def build() -> str:
+            conditions = [self._condition(filters, group) for group, (_, filters) in enumerate(updates)]
+            assignments = []
+            for column in columns:
+                branches = [
+                    f"{condition}, %(v{group}_{column})s"
+                    for group, (condition, (values, _)) in enumerate(zip(conditions, updates))
+                    if column in values
+                ]
+                assignments.append(f"{_identifier(column)} = multiIf({', '.join(branches)}, {_identifier(column)})")
+            where = " OR ".join(f"({condition})" for condition in conditions)
+            return f"ALTER TABLE {database}.{_identifier(table)} UPDATE {', '.join(assignments)} WHERE {where}"
+
+        sql = self._template(("alter_update", database, table, columns, shape), build)
+        params = self._bind_groups([filters for _, filters in updates])
+        for group, (values, _) in enumerate(updates):
+            params.update({f"v{group}_{column}": value for column, value in values.items()})
+        return CompiledQuery(sql, params)
+
+    def lightweight_delete(self, database: str, table: str, filters: list[dict[str, Any]]) -> CompiledQuery:
+        shape = tuple(tuple(group_filters) for group_filters in filters)
+
+        def build() -> str:
+            where = " OR ".join(
+                f"({self._condition(group_filters, group)})" for group, group_filters in enumerate(filters)
+            )
+            return f"DELETE FROM {database}.{_identifier(table)} WHERE {where}"
+
+        sql = self._template(("delete", database, table, shape), build)
+        return CompiledQuery(sql, self._bind_groups(filters))
@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.infrastructure.base.base_metrics import ReplicationStats
+from src.infrastructure.database.gateways.alchemy_gateway import AlchemyGateway
+from src.infrastructure.database.gateways.clickhouse_gateway import \
+    ClickHouseManager
+from src.infrastructure.database.models import DELETED_COLUMN, Base
+
+
+class ClickHouseReplicator:
+    """
+    Incrementally copies Postgres rows into their ClickHouse mirrors.
+
+    Rows are read past an (updated_at, uuid) watermark through a server-side
+    cursor in watermark order and written as columnar blocks. The watermark
+    is stored in ClickHouse after every block, so a restart re-sends at most
+    one block, which the ReplacingMergeTree mirrors collapse. Rows younger
+    than `settle_interval` are left for the next run so that transactions
+    still in flight with an earlier updated_at are not skipped.
+
+    Deletes are captured by a Postgres trigger into `tombstones` with the
+    old row and replayed the same way past their own (deleted_at, uuid)
+    watermark as row versions with `is_deleted` set and `deleted_at` as
+    their version. Replayed tombstones are pruned from Postgres.
+
+    Columns the model excludes from its mirror, such as the password hash,
+    are never read.
+    """
+
+    def __init__(
+        self,
+        session_manager: AlchemyGateway,
+        clickhouse: ClickHouseManager,
+        models: list[type[Base]],
+        batch_size: int = 5000,
+        settle_interval: float = 5.0,
+        watermark_table: str = "replication_watermarks",
+        tombstones: str = "replication_tombstones",
+        logger: logging.Logger = logging,
+    ) -> None:
+        self.transactional_session: async_sessionmaker = session_manager.transactional_session
+        self.clickhouse = clickhouse
+        self.models = models
+        self.batch_size = batch_size
+        self.settle_interval = timedelta(seconds=settle_interval)
+        self.watermark_table = f"{clickhouse.database}.{watermark_table}"
+        self.tombstones = tombstones
+        self.logger = logger
+        self.stats: dict[str, ReplicationStats] = {model.__tablename__: ReplicationStats() for model in models}
+        self._watermarks: Optional[dict[str, tuple[datetime, UUID]]] = None
+
+    @property
+    def metrics(self) -> dict:
+        return {table: stats.snapshot() for table, stats in self.stats.items()}
+
+    async def _read_watermarks(self) -> dict[str, tuple[datetime, UUID]]:
+        await self.clickhouse.pool.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.watermark_table} "
+            "(table String, updated_at DateTime64(6), uuid UUID, replicated_at DateTime64(6)) "
+            "ENGINE = ReplacingMergeTree(replicated_at) ORDER BY table",
+        )
+        rows = await self.clickhouse.pool.execute(
+            f"SELECT table, updated_at, uuid FROM {self.watermark_table} FINAL",
+        )
+        return {table: (updated_at, uuid) for table, updated_at, uuid in rows}
+
+    async def _load_watermarks(self) -> dict[str, tuple[datetime, UUID]]:
+        if self._watermarks is None:
+            self._watermarks = await self._read_watermarks()
+        return self._watermarks
+
+    async def _latest_changes(self) -> dict[str, Optional[datetime]]:
+        latest = {}
+        async with self.transactional_session() as session:
+            for model in self.models:
+                table = model.__table__
+                latest[table.name] = await session.scalar(select(func.max(table.c.updated_at)))
+                latest[self._deletes(table.name)] = await session.scalar(
+                    text(f"SELECT max(deleted_at) FROM {self.tombstones} WHERE table_name = :table"),
+                    {"table": table.name},
+                )
+        return latest
+
+    async def lag(self) -> dict[str, Optional[float]]:
+        """
+        Seconds between each table's stored watermark, read from ClickHouse
+        so that any process can report it, and the latest change in Postgres.
+        A table with nothing pending reports 0, one that was never
+        replicated None.
+        """
+        watermarks = await self._read_watermarks()
+        lag = {}
+        for table, latest in (await self._latest_changes()).items():
+            if latest is None:
+                lag[table] = 0.0
+            elif table not in watermarks:
+                lag[table] = None
+            else:
+                lag[table] = max((latest - watermarks[table][0]).total_seconds(), 0.0)
+        return lag
+
+    async def _save_watermark(self, table: str, updated_at: datetime, uuid: UUID) -> None:
+        await self.clickhouse.pool.execute(
+            f"INSERT INTO {self.watermark_table} (table, updated_at, uuid, replicated_at) VALUES",
+            [[table], [updated_at], [uuid], [datetime.now()]],
+            columnar=True,
+        )
+        self._watermarks[table] = (updated_at, uuid)
+
+    @staticmethod
+    def _deletes(table: str) -> str:
+        return f"{table}:deleted"
+
+    @staticmethod
+    def _columns(model: type[Base]) -> list:
+        return [column for column in model.__table__.columns if column.name not in model.__clickhouse__.excluded]
+
+    @staticmethod
+    def _block(columns: list, rows: list) -> dict[str, list]:
+        block = {}
+        for position, column in enumerate(columns):
+            values = [row[position] for row in rows]
+            if isinstance(column.type, JSONB):
+                values = [orjson.dumps(value).decode("utf-8") for value in values]
+            block[column.name] = values
+        return block
+
+    async def replicate(self, model: type[Base]) -> int:
+        table = model.__table__
+        columns = self._columns(model)
+        stats = self.stats[table.name]
+        query = (
+            select(*columns)
+            .where(table.c.updated_at < func.now() - self.settle_interval)
+            .order_by(table.c.updated_at, table.c.uuid)
+            .execution_options(yield_per=self.batch_size)
+        )
+        if watermark := (await self._load_watermarks()).get(table.name):
+            query = query.where(tuple_(table.c.updated_at, table.c.uuid) > tuple_(*watermark))
+        replicated = 0
+        async with self.transactional_session() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                started = perf_counter()
+                await self.clickhouse.insert_columns(table.name, self._block(columns, rows))
+                last = rows[-1]
+                await self._save_watermark(table.name, last.updated_at, last.uuid)
+                stats.observe(len(rows), last.updated_at, perf_counter() - started)
+                replicated += len(rows)
+        stats.caught_up_at = datetime.now()
+        return replicated
+
+    async def replicate_deletes(self, model: type[Base]) -> int:
+        table = model.__table__
+        stats = self.stats[table.name]
+        key = self._deletes(table.name)
+        columns = self._columns(model)
+        selected = ", ".join(f'deleted."{column.name}"' for column in columns)
+        conditions = [
+            "tombstone.table_name = :table",
+            "tombstone.deleted_at < now() - CAST(:settle AS interval)",
+        ]
+        params = {"table": table.name, "settle": self.settle_interval}
+        if watermark := (await self._load_watermarks()).get(key):
+            conditions.append(
+                "(tombstone.deleted_at, tombstone.uuid) > (CAST(:deleted_at AS timestamp), CAST(:uuid AS uuid))",
+            )
+            params.update(deleted_at=watermark[0], uuid=watermark[1])
+        query = text(
+            f"SELECT tombstone.deleted_at, tombstone.uuid, {selected} FROM {self.tombstones} AS tombstone, "
+            f"jsonb_populate_record(NULL::{table.name}, tombstone.data) AS deleted "
+            f"WHERE {' AND '.join(conditions)} ORDER BY tombstone.deleted_at, tombstone.uuid",
+        ).execution_options(yield_per=self.batch_size)
+        deleted = 0
+        async with self.transactional_session() as session:
+            result = await session.stream(query, params)
+            async for rows in result.partitions():
+                block = self._block(columns, [row[2:] for row in rows])
+                block["updated_at"] = [row[0] for row in rows]
+                block[DELETED_COLUMN] = [1] * len(rows)
+                await self.clickhouse.insert_columns(table.name, block)
+                deleted_at, uuid = rows[-1][0], rows[-1][1]
+                await self._save_watermark(key, deleted_at, uuid)
+                stats.deleted += len(rows)
+                deleted += len(rows)
+        if deleted:
+            async with self.transactional_session() as session:
+                await session.execute(
+                    text(
+                        f"DELETE FROM {self.tombstones} WHERE table_name = :table "
+                        "AND (deleted_at, uuid) <= (CAST(:deleted_at AS timestamp), CAST(:uuid AS uuid))",
+                    ),
+                    {"table": table.name, "deleted_at": deleted_at, "uuid": uuid},
+                )
+                await session.commit()
+        return deleted
+
+    async def run(self) -> int:
+        replicated = 0
+        for model in self.models:
+            if rows := await self.replicate(model):
+                self.logger.info(f"В Clickhouse реплицировано {rows} строк {model.__tablename__}")
+            if deleted := await self.replicate_deletes(model):
+                self.logger.info(f"В Clickhouse реплицировано {deleted} удалений {model.__tablename__}")
+            replicated += rows + deleted
+        return replicated
@@ -0,0 +1,250 @@
+import logging
+import re
+from asyncio import Lock
+from hashlib import sha1
+from time import monotonic
+from typing import Iterable, NamedTuple, Optional
+
+from src.infrastructure.database.gateways.clickhouse_pool import ClickHousePool
+from src.infrastructure.database.models import (RETIRED, ROLLUPS, Base,
+                                                ClickHouseOptions,
+                                                ClickHouseRollup)
+
+_ENGINE_CLAUSES = re.compile(r"\s+(?:PARTITION BY|PRIMARY KEY|ORDER BY|SAMPLE BY|TTL|SETTINGS)\s")
+_FINAL_ENGINES = re.compile(r"(?:Replacing|Collapsing|Summing|Aggregating)MergeTree")
+_REPLACING_ENGINE = re.compile(r"ReplacingMergeTree")
+
+
+class ClickHouseTable(NamedTuple):
+    engine: str
+    sorting_key: tuple[str, ...]
+    columns: frozenset[str]
+
+    @property
+    def supports_final(self) -> bool:
+        return bool(_FINAL_ENGINES.search(self.engine))
+
+
+class ClickHouseSchemaSync:
+    """
+    Brings ClickHouse tables in line with the SQLAlchemy models.
+
+    The catalog is read from `system.tables` and `system.columns`, diffed against
+    the models and only the missing CREATE TABLE / ADD COLUMN statements
+    are applied. Tables whose engine or sort key differ from the model are
+    rebuilt, a rebuild interrupted by an error or a timeout is finished by
+    the next run. Missing rollups are created together with their view
+    and backfilled from the source table once, retired ones are dropped. Runs whose models and
+    catalog match the last applied fingerprint do nothing.
+    """
+
+    def __init__(
+        self,
+        pool: ClickHousePool,
+        database: str,
+        types: dict[str, str],
+        rollups: Iterable[ClickHouseRollup] = ROLLUPS,
+        retired: Iterable[str] = RETIRED,
+        logger: logging.Logger = logging,
+        catalog_ttl: float = 60.0,
+    ) -> None:
+        self.pool = pool
+        self.database = database
+        self.types = types
+        self.rollups = tuple(rollups)
+        self.retired = tuple(retired)
+        self.logger = logger
+        self.catalog_ttl = catalog_ttl
+        self.catalog: dict[str, ClickHouseTable] = {}
+        self._fingerprints: dict[frozenset[str], str] = {}
+        self._loaded_at: Optional[float] = None
+        self._catalog_lock = Lock()
+
+    @staticmethod
+    def models() -> list[type[Base]]:
+        return [mapper.class_ for mapper in Base.registry.mappers]
+
+    def columns(self, model: type[Base]) -> dict[str, str]:
+        options = model.__clickhouse__
+        columns = {
+            column.name: self.types[str(column.type)]
+            for column in model.__table__.columns
+            if column.name not in options.excluded
+        }
+        return {**columns, **options.columns}
+
+    def fingerprint(self, models: Iterable[type[Base]], catalog: dict[str, ClickHouseTable]) -> str:
+        """
+        Digest of the models together with the catalog entries they map to,
+        so a table dropped or altered by hand changes it as well
+        """
+        digest = sha1()
+        for model in sorted(models, key=lambda model: model.__tablename__):
+            digest.update(model.__tablename__.encode())
+            digest.update(repr(sorted(self.columns(model).items())).encode())
+            digest.update(model.__clickhouse__.model_dump_json().encode())
+            digest.update(repr(self._entry(catalog, model.__tablename__)).encode())
+            digest.update(repr(self._entry(catalog, self.staging(model.__tablename__))).encode())
+        for rollup in self.rollups:
+            digest.update(rollup.model_dump_json().encode())
+            digest.update(repr(self._entry(catalog, rollup.name)).encode())
+            digest.update(repr(self._entry(catalog, rollup.view)).encode())
+        for table in self.retired:
+            digest.update(repr(self._entry(catalog, table)).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _entry(catalog: dict[str, ClickHouseTable], table: str) -> Optional[tuple]:
+        if (entry := catalog.get(table)) is None:
+            return None
+        return entry.engine, entry.sorting_key, tuple(sorted(entry.columns))
+
+    async def load_catalog(self) -> dict[str, ClickHouseTable]:
+        params = {"database": self.database}
+        tables = await self.pool.execute(
+            "SELECT name, engine_full, sorting_key FROM system.tables WHERE database = %(database)s",
+            params,
+        )
+        rows = await self.pool.execute(
+            "SELECT table, name FROM system.columns WHERE database = %(database)s",
+            params,
+        )
+        columns: dict[str, set[str]] = {}
+        for table, column in rows:
+            columns.setdefault(table, set()).add(column)
+        self.catalog = {
+            table: ClickHouseTable(
+                engine=_ENGINE_CLAUSES.split(engine_full, maxsplit=1)[0].strip(),
+                sorting_key=tuple(column.strip() for column in sorting_key.split(",") if column.strip()),
+                columns=frozenset(columns.get(table, ())),
+            )
+            for table, engine_full, sorting_key in tables
+        }
+        self._loaded_at = monotonic()
+        return self.catalog
+
+    async def table(self, name: str) -> Optional[ClickHouseTable]:
+        """
+        Catalog entry of a table, re-read once it is older than `catalog_ttl`
+        so that processes that do not run the sync see migrations
+        """
+        async with self._catalog_lock:
+            if self._loaded_at is None or monotonic() - self._loaded_at > self.catalog_ttl:
+                await self.load_catalog()
+        return self.catalog.get(name)
+
+    @staticmethod
+    def drifted(options: ClickHouseOptions, entry: ClickHouseTable) -> bool:
+        return (
+            re.sub(r"\s+", "", entry.engine) != re.sub(r"\s+", "", options.engine)
+            or entry.sorting_key != options.order_by
+        )
+
+    @staticmethod
+    def staging(table: str) -> str:
+        return f"{table}__rebuild"
+
+    def rebuild(
+        self,
+        table: str,
+        options: ClickHouseOptions,
+        columns: dict[str, str],
+        entry: ClickHouseTable,
+    ) -> list[str]:
+        """
+        Engine and sort key cannot be altered in place: the table is created
+        anew under a staging name, filled from the live table and swapped
+        with it. The old table then stays under the staging name until the
+        rows written to it during the fill are copied over, see `resume`.
+
+        A staging table left behind while the live table still has the old
+        engine is dropped, the live table holds every row.
+        """
+        staging = f"{self.database}.{self.staging(table)}"
+        copied = ", ".join(name for name in columns if name in entry.columns)
+        return [
+            f"DROP TABLE IF EXISTS {staging}",
+            options.table_definition(self.database, self.staging(table), columns),
+            f"INSERT INTO {staging} ({copied}) SELECT {copied} FROM {self.database}.{table}",
+            f"EXCHANGE TABLES {staging} AND {self.database}.{table}",
+            *self.resume(table, columns, entry.columns),
+        ]
+
+    def resume(self, table: str, columns: Iterable[str], staged: frozenset[str]) -> list[str]:
+        """
+        Copies the old table kept under the staging name into the rebuilt
+        one and drops it. Rows copied twice are versions of the same key
+        and collapse, so the copy can be repeated after a failure.
+        """
+        staging = f"{self.database}.{self.staging(table)}"
+        copied = ", ".join(name for name in columns if name in staged)
+        return [
+            f"INSERT INTO {self.database}.{table} ({copied}) SELECT {copied} FROM {staging}",
+            f"DROP TABLE {staging}",
+        ]
+
+    def diff(self, models: Iterable[type[Base]], catalog: dict[str, ClickHouseTable]) -> list[str]:
+        statements = []
+        for model in models:
+            table, options = model.__tablename__, model.__clickhouse__
+            columns = self.columns(model)
+            if table not in catalog:
+                statements.append(options.table_definition(self.database, table, columns))
+                continue
+            entry = catalog[table]
+            if self.drifted(options, entry):
+                if not _REPLACING_ENGINE.search(options.engine):
+                    self.logger.error(
+                        f"Таблица Clickhouse {table} расходится с моделью, но {options.engine} не схлопывает "
+                        "повторно скопированные строки, таблицу нужно пересоздать вручную",
+                    )
+                    continue
+                self.logger.warning(
+                    f"Таблица Clickhouse {table} создана как {entry.engine} ORDER BY ({', '.join(entry.sorting_key)}), "
+                    f"модель объявляет {options.engine} ORDER BY ({', '.join(options.order_by)}), таблица будет "
+                    "пересоздана",
+                )
+                statements.extend(self.rebuild(table, options, columns, entry))
+                continue
+            if (staged := catalog.get(self.staging(table))) is not None:
+                self.logger.warning(f"Завершение прерванного пересоздания таблицы Clickhouse {table}")
+                live = [name for name in columns if name in entry.columns]
+                statements.extend(self.resume(table, live, staged.columns))
+            for name, kind in columns.items():
+                if name in entry.columns:
+                    continue
+                codec = f" CODEC({options.codecs[name]})" if name in options.codecs else ""
+                statements.append(
+                    f"ALTER TABLE {self.database}.{table} ADD COLUMN IF NOT EXISTS {name} {kind}{codec}",
+                )
+            for name in options.excluded:
+                if name in entry.columns:
+                    statements.append(f"ALTER TABLE {self.database}.{table} DROP COLUMN IF EXISTS {name}")
+        tables = set(catalog) | {model.__tablename__ for model in models}
+        for rollup in self.rollups:
+            if rollup.source not in tables:
+                continue
+            if rollup.name not in catalog:
+                statements.extend(rollup.definitions(self.database))
+            elif rollup.view not in catalog:
+                statements.append(rollup.view_definition(self.database))
+        for table in self.retired:
+            if table in catalog:
+                statements.append(f"DROP TABLE IF EXISTS {self.database}.{table}")
+        return statements
+
+    async def sync(self, models: Optional[Iterable[type[Base]]] = None) -> list[str]:
+        models = list(models or self.models())
+        tables = frozenset(model.__tablename__ for model in models)
+        catalog = await self.load_catalog()
+        if self._fingerprints.get(tables) == self.fingerprint(models, catalog):
+            self.logger.debug("Схема Clickhouse не изменилась")
+            return []
+        statements = self.diff(models, catalog)
+        for statement in statements:
+            self.logger.info(f"Применение изменения схемы Clickhouse: {statement}")
+            await self.pool.execute(statement)
+        if statements:
+            catalog = await self.load_catalog()
+        self._fingerprints[tables] = self.fingerprint(models, catalog)
+        return statements
@@ -0,0 +1,29 @@
+"""0002_updated_at_index
+
+Revision ID: 4c1d2a9e7f3b
+Revises: b09f7f767549
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c1d2a9e7f3b"
+down_revision: Union[str, None] = "b09f7f767549"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("permissions", "roles", "users", "role_permissions", "user_roles")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(op.f(f"ix_{table}_updated_at"), table, ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(op.f(f"ix_{table}_updated_at"), table_name=table)
@@ -0,0 +1,25 @@
+"""0003_users_keyset_index
+
+Revision ID: 9e2b6f0c1a57
+Revises: 4c1d2a9e7f3b
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2b6f0c1a57"
+down_revision: Union[str, None] = "4c1d2a9e7f3b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_at_uuid", "users", ["created_at", "uuid"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_at_uuid", table_name="users")
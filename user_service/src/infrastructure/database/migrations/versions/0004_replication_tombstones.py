@@ -0,0 +1,58 @@
+"""0004_replication_tombstones
+
+Revision ID: 2f8a4c6d9b13
+Revises: 9e2b6f0c1a57
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "2f8a4c6d9b13"
+down_revision: Union[str, None] = "9e2b6f0c1a57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("permissions", "roles", "users", "role_permissions", "user_roles")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "replication_tombstones",
+        sa.Column("uuid", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(
+        "ix_replication_tombstones_table_deleted_at",
+        "replication_tombstones",
+        ["table_name", "deleted_at", "uuid"],
+        unique=False,
+    )
+    op.execute(
+        "CREATE FUNCTION record_replication_tombstone() RETURNS trigger AS $$ "
+        "BEGIN "
+        "INSERT INTO replication_tombstones (table_name, data) VALUES (TG_TABLE_NAME, to_jsonb(OLD)); "
+        "RETURN OLD; "
+        "END; $$ LANGUAGE plpgsql",
+    )
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_replication_tombstone AFTER DELETE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION record_replication_tombstone()",
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_replication_tombstone ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_replication_tombstone()")
+    op.drop_index("ix_replication_tombstones_table_deleted_at", table_name="replication_tombstones")
+    op.drop_table("replication_tombstones")
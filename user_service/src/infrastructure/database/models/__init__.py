@@ -1,5 +1,7 @@
 from .association import RolePermission, UserRole
 from .base import Base
+from .clickhouse import (DELETED_COLUMN, RETIRED, ROLLUPS, ClickHouseOptions,
+                         ClickHouseRollup)
 from .permission import Permission
 from .role import Role
 from .user import User
@@ -9,6 +11,11 @@ __all__: tuple[str] = (
     "Role",
     "User",
     "Base",
+    "ClickHouseOptions",
+    "ClickHouseRollup",
+    "ROLLUPS",
+    "RETIRED",
+    "DELETED_COLUMN",
     "UserRole",
     "RolePermission",
 )
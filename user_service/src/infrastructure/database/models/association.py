@@ -3,6 +3,9 @@ from uuid import UUID
 from sqlalchemy import ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from src.infrastructure.database.models.base import Base
+from src.infrastructure.database.models.clickhouse import (TOMBSTONE_COLUMNS,
+                                                           TOMBSTONE_ENGINE,
+                                                           ClickHouseOptions)
 
 
 class UserRole(Base):
@@ -11,6 +14,11 @@ class UserRole(Base):
         UniqueConstraint("user_uuid", "role_uuid", name="idx_unique_user_role"),
         {"extend_existing": True},
     )
+    __clickhouse__ = ClickHouseOptions(
+        engine=TOMBSTONE_ENGINE,
+        order_by=("user_uuid", "role_uuid"),
+        columns=TOMBSTONE_COLUMNS,
+    )
 
     user_uuid: Mapped[UUID] = mapped_column(ForeignKey("users.uuid"), primary_key=True)
     role_uuid: Mapped[UUID] = mapped_column(ForeignKey("roles.uuid"), primary_key=True)
@@ -26,6 +34,11 @@ class RolePermission(Base):
         ),
         {"extend_existing": True},
     )
+    __clickhouse__ = ClickHouseOptions(
+        engine=TOMBSTONE_ENGINE,
+        order_by=("role_uuid", "permission_uuid"),
+        columns=TOMBSTONE_COLUMNS,
+    )
 
     permission_uuid: Mapped[UUID] = mapped_column(
         ForeignKey("permissions.uuid"),
@@ -4,11 +4,13 @@ from datetime import datetime
 from sqlalchemy import UUID, func
 from sqlalchemy.orm import (DeclarativeBase, Mapped, declared_attr,
                             mapped_column)
+from src.infrastructure.database.models.clickhouse import ClickHouseOptions
 
 
 class Base(DeclarativeBase):
 
     __abstract__ = True
+    __clickhouse__ = ClickHouseOptions()
 
     @declared_attr.directive
     def __tablename__(cls) -> str:
@@ -22,13 +24,14 @@ class Base(DeclarativeBase):
 
     created_at: Mapped[datetime] = mapped_column(
         server_default=func.now(),
-        default=datetime.now(),
+        default=func.now(),
     )
 
     updated_at: Mapped[datetime] = mapped_column(
         server_default=func.now(),
-        default=datetime.now(),
-        onupdate=datetime.now(),
+        default=func.now(),
+        onupdate=func.now(),
+        index=True,
     )
 
     def as_dict(self):
@@ -0,0 +1,103 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ClickHouseOptions(BaseModel):
+    """
+    How a model is laid out in ClickHouse, declared on the model
+    as `__clickhouse__`. `codecs` maps column names to codec expressions,
+    e.g. {"created_at": "Delta, ZSTD(1)"}, `columns` declares mirror-only
+    columns that have no Postgres counterpart and `excluded` names Postgres
+    columns that are never mirrored, such as secrets.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    engine: str = "MergeTree"
+    order_by: tuple[str, ...] = ("uuid",)
+    partition_by: Optional[str] = None
+    ttl: Optional[str] = None
+    codecs: dict[str, str] = Field(default_factory=dict)
+    columns: dict[str, str] = Field(default_factory=dict)
+    excluded: tuple[str, ...] = ()
+
+    def table_definition(self, database: str, table: str, columns: dict[str, str]) -> str:
+        columns_definition = ", ".join(
+            f"{name} {kind} CODEC({self.codecs[name]})" if name in self.codecs else f"{name} {kind}"
+            for name, kind in columns.items()
+        )
+        clauses = [
+            f"CREATE TABLE IF NOT EXISTS {database}.{table} ({columns_definition})",
+            f"ENGINE = {self.engine}",
+        ]
+        if self.partition_by:
+            clauses.append(f"PARTITION BY {self.partition_by}")
+        clauses.append(f"ORDER BY ({', '.join(self.order_by)})")
+        if self.ttl:
+            clauses.append(f"TTL {self.ttl}")
+        return " ".join(clauses)
+
+
+DELETED_COLUMN = "is_deleted"
+TOMBSTONE_COLUMNS = {DELETED_COLUMN: "UInt8 DEFAULT 0"}
+TOMBSTONE_ENGINE = f"ReplacingMergeTree(updated_at, {DELETED_COLUMN})"
+
+MUTABLE_ENTITY = ClickHouseOptions(engine=TOMBSTONE_ENGINE, columns=TOMBSTONE_COLUMNS)
+
+
+class ClickHouseRollup(BaseModel):
+    """
+    AggregatingMergeTree table kept up to date by a materialized view
+    over `source`. `select` produces the aggregate states, `{source}` is
+    replaced with the qualified source table.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    source: str
+    columns: dict[str, str]
+    order_by: tuple[str, ...]
+    select: str
+
+    @property
+    def view(self) -> str:
+        return f"{self.name}_mv"
+
+    def view_definition(self, database: str) -> str:
+        select = self.select.format(source=f"{database}.{self.source}")
+        return f"CREATE MATERIALIZED VIEW IF NOT EXISTS {database}.{self.view} TO {database}.{self.name} AS {select}"
+
+    def definitions(self, database: str) -> list[str]:
+        columns_definition = ", ".join(f"{name} {kind}" for name, kind in self.columns.items())
+        select = self.select.format(source=f"{database}.{self.source}")
+        return [
+            f"CREATE TABLE IF NOT EXISTS {database}.{self.name} ({columns_definition}) "
+            f"ENGINE = AggregatingMergeTree ORDER BY ({', '.join(self.order_by)})",
+            self.view_definition(database),
+            f"INSERT INTO {database}.{self.name} {select}",
+        ]
+
+
+USER_REGISTRATIONS = ClickHouseRollup(
+    name="user_daily_registrations",
+    source="users",
+    columns={
+        "day": "Date",
+        "registered": "AggregateFunction(uniqExact, UUID)",
+        "verified": "AggregateFunction(uniqExactIf, UUID, UInt8)",
+    },
+    order_by=("day",),
+    select=(
+        "SELECT toDate(created_at) AS day, uniqExactState(uuid) AS registered, "
+        "uniqExactIfState(uuid, toUInt8(is_verified)) AS verified FROM {source} GROUP BY day"
+    ),
+)
+
+ROLLUPS = (USER_REGISTRATIONS,)
+
+# Objects of rollups that were replaced by query-time aggregation, dropped by
+# the schema sync. users_per_role only ever added role memberships and could
+# not subtract removals.
+RETIRED = ("users_per_role_mv", "users_per_role")
@@ -4,12 +4,14 @@ from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.infrastructure.database.models.base import Base
+from src.infrastructure.database.models.clickhouse import MUTABLE_ENTITY
 
 if TYPE_CHECKING:
     from src.infrastructure.database.models.role import Role
 
 
 class Permission(Base):
+    __clickhouse__ = MUTABLE_ENTITY
 
     name: Mapped[str] = mapped_column(
         String,
@@ -4,6 +4,7 @@ from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.infrastructure.database.models.base import Base
+from src.infrastructure.database.models.clickhouse import MUTABLE_ENTITY
 
 if TYPE_CHECKING:
     from src.infrastructure.database.models.permission import Permission
@@ -11,6 +12,7 @@ if TYPE_CHECKING:
 
 
 class Role(Base):
+    __clickhouse__ = MUTABLE_ENTITY
 
     name: Mapped[str] = mapped_column(String, unique=True, comment="Название")
 
@@ -1,14 +1,26 @@
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Boolean, Integer, String, Text
+from sqlalchemy import Boolean, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.infrastructure.database.models import Base
+from src.infrastructure.database.models.clickhouse import (TOMBSTONE_COLUMNS,
+                                                           TOMBSTONE_ENGINE,
+                                                           ClickHouseOptions)
 
 if TYPE_CHECKING:
     from src.infrastructure.database.models.role import Role
 
 
 class User(Base):
+    __table_args__ = (Index("ix_users_created_at_uuid", "created_at", "uuid"),)
+    __clickhouse__ = ClickHouseOptions(
+        engine=TOMBSTONE_ENGINE,
+        order_by=("created_at", "uuid"),
+        partition_by="toYYYYMM(created_at)",
+        codecs={"created_at": "Delta, ZSTD(1)", "updated_at": "Delta, ZSTD(1)"},
+        columns=TOMBSTONE_COLUMNS,
+        excluded=("password",),
+    )
 
     first_name: Mapped[str] = mapped_column(
         String,
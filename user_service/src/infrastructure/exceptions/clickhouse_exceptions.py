@@ -0,0 +1,7 @@
+from fastapi import status
+from src.infrastructure.base.base_exception import BaseAPIException
+
+
+class ClickHouseUnavailable(BaseAPIException):
+    message = "ClickHouse connection pool is exhausted"
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
@@ -21,3 +21,25 @@ class DeserializationError(Exception):
 
     def __str__(self) -> str:
         return f"DeserializationError: {self._message} - Data: {self.data}"
+
+
+class RpcRemoteError(Exception):
+    _message = "RPC handler failed"
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+        super().__init__(self._message)
+
+    def __str__(self) -> str:
+        return f"RpcRemoteError: {self._message} - Data: {self.data}"
+
+
+class MessageInProgress(Exception):
+    _message = "Message is being processed by another consumer"
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+        super().__init__(self._message)
+
+    def __str__(self) -> str:
+        return f"MessageInProgress: {self._message} - Data: {self.data}"
@@ -15,3 +15,8 @@ class UserAlreadyExists(BaseAPIException):
 class WrongPassword(BaseAPIException):
     message = "Wrong password"
     status_code = status.HTTP_401_UNAUTHORIZED
+
+
+class InvalidCursor(BaseAPIException):
+    message = "Invalid pagination cursor"
+    status_code = status.HTTP_400_BAD_REQUEST
@@ -1,11 +1,13 @@
-from typing import Any, List, Optional, Union
+from typing import Any, AsyncIterator, List, Optional, Union
 from uuid import UUID
 
 from asyncpg import UniqueViolationError
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import delete, insert, select, tuple_, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import noload
 from src.domain.user.interface import UserReadRepository, UserWriteRepository
+from src.domain.user.models import UserCursor
 from src.infrastructure.database.gateways.alchemy_gateway import AlchemyGateway
 from src.infrastructure.database.models import User
 from src.infrastructure.exceptions.user_exceptions import UserAlreadyExists
@@ -22,32 +24,49 @@ class ReadRepository(UserReadRepository):
         self.async_session_factory: async_sessionmaker = (
             session_manager.async_session_factory
         )
+        self.read_session = session_manager.read_session
 
     @classmethod
-    def __set_filter(cls, query: select, filters: Any = None) -> select:
+    def __set_filter(cls, query: select, filters: Any = None, sort: bool = True) -> select:
         if filters:
             query = filters.filter(query)
+            if sort:
+                query = filters.sort(query)
         return query
 
     async def find(
         self,
         filters: Any = None,
+        limit: Optional[int] = None,
+        after: Optional[UserCursor] = None,
     ) -> Union[list, select]:
-        query = select(self.model)
-        query = self.__set_filter(query, filters)
-        async with self.async_session_factory() as session:
+        query = select(self.model).options(noload(self.model.roles))
+        query = self.__set_filter(query, filters, sort=limit is None)
+        if limit is not None:
+            query = query.order_by(self.model.created_at, self.model.uuid).limit(limit)
+        if after is not None:
+            query = query.where(tuple_(self.model.created_at, self.model.uuid) > (after.created_at, after.uuid))
+        async with self.read_session() as session:
             result = await session.execute(query)
             return result.scalars().unique().all()
 
+    async def stream(self, filters: Any = None, batch_size: int = 1000) -> AsyncIterator[list]:
+        query = select(self.model).options(noload(self.model.roles))
+        query = self.__set_filter(query, filters).execution_options(yield_per=batch_size)
+        async with self.read_session(transactional=True) as session:
+            result = await session.stream_scalars(query)
+            async for users in result.partitions():
+                yield users
+
     async def get(self, user_uuid: UUID) -> Optional[User]:
-        async with self.async_session_factory() as session:
+        async with self.read_session() as session:
             stmt = select(self.model).filter(self.model.uuid == user_uuid)
             answer = await session.execute(stmt)
             result = answer.scalars().unique().first()
         return result
 
     async def get_by_login(self, login: str) -> Optional[User]:
-        async with self.async_session_factory() as session:
+        async with self.read_session() as session:
             stmt = select(self.model).filter(self.model.login == login)
             answer = await session.execute(stmt)
             result = answer.scalars().unique().first()
@@ -64,10 +83,11 @@ class WriteRepository(UserWriteRepository):
         self.async_session_factory: async_sessionmaker = (
             session_manager.async_session_factory
         )
+        self.write_session = session_manager.write_session
 
     async def create(self, **kwargs) -> Optional[User]:
         try:
-            async with self.transactional_session() as session:
+            async with self.write_session() as session:
                 stmt = insert(self.model).values(kwargs).returning(self.model)
                 result = await session.execute(stmt)
                 await session.commit()
@@ -80,7 +100,7 @@ class WriteRepository(UserWriteRepository):
         self,
         **kwargs,
     ) -> Optional[User]:
-        async with self.transactional_session() as session:
+        async with self.write_session() as session:
             stmt = (
                 update(self.model)
                 .values(kwargs)
@@ -93,7 +113,7 @@ class WriteRepository(UserWriteRepository):
         return answer
 
     async def delete(self, user_uuid: UUID) -> Optional[User]:
-        async with self.transactional_session() as session:
+        async with self.write_session() as session:
             stmt = (
                 delete(self.model)
                 .where(self.model.uuid == user_uuid)
@@ -0,0 +1,38 @@
+from contextvars import ContextVar
+from hashlib import sha1
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from src.infrastructure.server.config import settings
+
+_CALLER: ContextVar[Optional[str]] = ContextVar("caller", default=None)
+
+
+def current_caller() -> Optional[str]:
+    """
+    Identity of the client whose request is being served, None outside
+    of a request (background tasks, consumers)
+    """
+    return _CALLER.get()
+
+
+def caller_of(
+    request: Request,
+    headers: tuple[str, ...] = ("authorization", settings.AUTH.API_X_KEY_HEADER),
+) -> str:
+    for header in headers:
+        if value := request.headers.get(header):
+            return sha1(value.encode()).hexdigest()
+    return request.client.host if request.client else "anonymous"
+
+
+async def bind_caller(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """
+    HTTP middleware: the caller is identified by its credentials, hashed,
+    and by its address when it sent none
+    """
+    token = _CALLER.set(caller_of(request))
+    try:
+        return await call_next(request)
+    finally:
+        _CALLER.reset(token)
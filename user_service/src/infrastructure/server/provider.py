@@ -2,11 +2,21 @@ import time
 
 from redis.asyncio import Redis
 from src.application.service.auth import AuthHandler
+from src.application.service.query_router import QueryRouter
+from src.infrastructure.amqp.broker.idempotency import DedupStore
 from src.infrastructure.amqp.broker.kafka import KafkaConsumer, KafkaProducer
+from src.infrastructure.amqp.broker.pool import KafkaProducerPool
+from src.infrastructure.amqp.broker.retry import FailureRouter
 from src.infrastructure.base.singleton import OnlyContainer, Singleton
 from src.infrastructure.database.gateways.alchemy_gateway import AlchemyGateway
+from src.infrastructure.database.gateways.clickhouse_cache import \
+    ClickHouseResultCache
 from src.infrastructure.database.gateways.clickhouse_gateway import \
     ClickHouseManager
+from src.infrastructure.database.gateways.clickhouse_replicator import \
+    ClickHouseReplicator
+from src.infrastructure.database.models import (Permission, Role,
+                                                RolePermission, User, UserRole)
 from src.infrastructure.repositories.user_repository import (ReadRepository,
                                                              WriteRepository)
 from src.infrastructure.server.config import settings
@@ -20,6 +30,11 @@ class Provider(Singleton):
         decode_responses=True,
     )
 
+    binary_redis = OnlyContainer(
+        Redis,
+        **settings.REDIS,
+    )
+
     alchemy_manager = OnlyContainer(
         AlchemyGateway,
         dialect=settings.POSTGRES.dialect,
@@ -29,6 +44,25 @@ class Provider(Singleton):
         port=settings.POSTGRES.port,
         database=settings.POSTGRES.database,
         echo=settings.POSTGRES.echo,
+        pool_min_size=settings.POSTGRES.pool_min_size,
+        pool_max_size=settings.POSTGRES.pool_max_size,
+        pool_timeout=settings.POSTGRES.pool_timeout,
+        pgbouncer=settings.POSTGRES.pgbouncer,
+        replicas=settings.POSTGRES.replicas,
+        max_replica_lag=settings.POSTGRES.max_replica_lag,
+        lag_check_interval=settings.POSTGRES.lag_check_interval,
+        read_your_writes_window=settings.POSTGRES.read_your_writes_window,
+    )
+
+    clickhouse_result_cache = OnlyContainer(
+        ClickHouseResultCache,
+        redis_client=binary_redis(),
+        prefix=settings.CLICKHOUSE.result_cache.prefix,
+        ttl=settings.CLICKHOUSE.result_cache.ttl,
+        table_ttl=settings.CLICKHOUSE.result_cache.table_ttl,
+        local_size=settings.CLICKHOUSE.result_cache.local_size,
+        compress_level=settings.CLICKHOUSE.result_cache.compress_level,
+        version_ttl=settings.CLICKHOUSE.result_cache.version_ttl,
     )
 
     clickhouse_manager = OnlyContainer(
@@ -38,6 +72,39 @@ class Provider(Singleton):
         password=settings.CLICKHOUSE.password,
         port=settings.CLICKHOUSE.port,
         database=settings.CLICKHOUSE.database,
+        pool_size=settings.CLICKHOUSE.pool_size,
+        acquire_timeout=settings.CLICKHOUSE.acquire_timeout,
+        health_check_interval=settings.CLICKHOUSE.health_check_interval,
+        insert_max_rows=settings.CLICKHOUSE.insert_max_rows,
+        insert_flush_interval=settings.CLICKHOUSE.insert_flush_interval,
+        insert_max_buffered_rows=settings.CLICKHOUSE.insert_max_buffered_rows,
+        query_cache_size=settings.CLICKHOUSE.query_cache_size,
+        select_limit=settings.CLICKHOUSE.select_limit,
+        mutation_flush_interval=settings.CLICKHOUSE.mutation_flush_interval,
+        max_running_mutations=settings.CLICKHOUSE.max_running_mutations,
+        mutation_max_branches=settings.CLICKHOUSE.mutation_max_branches,
+        result_cache=clickhouse_result_cache(),
+    )
+
+    clickhouse_replicator = OnlyContainer(
+        ClickHouseReplicator,
+        session_manager=alchemy_manager(),
+        clickhouse=clickhouse_manager(),
+        models=[User, Role, Permission, RolePermission, UserRole],
+        batch_size=settings.CLICKHOUSE.replication.batch_size,
+        settle_interval=settings.CLICKHOUSE.replication.settle_interval,
+        watermark_table=settings.CLICKHOUSE.replication.watermark_table,
+        tombstones=settings.CLICKHOUSE.replication.tombstones_table,
+    )
+
+    user_query_router = OnlyContainer(
+        QueryRouter,
+        model=User,
+        clickhouse=clickhouse_manager(),
+        redis_client=redis(),
+        oltp_max_rows=settings.CLICKHOUSE.routing.oltp_max_rows,
+        freshness_window=settings.CLICKHOUSE.routing.freshness_window,
+        stats_ttl=settings.CLICKHOUSE.routing.stats_ttl,
     )
 
     auth_handler = OnlyContainer(
@@ -52,14 +119,50 @@ class Provider(Singleton):
         redis_client=redis(),
     )
 
-    producer_client = OnlyContainer(
+    producer_pool = OnlyContainer(
+        KafkaProducerPool,
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        acks=settings.KAFKA.acks,
+        transactional_id_prefix=settings.KAFKA.transactional_id,
+        size=settings.KAFKA.producer_pool_size,
+        logging_config=settings.LOG_LEVEL,
+        linger_ms=settings.KAFKA.linger_ms,
+        max_batch_size=settings.KAFKA.max_batch_size,
+        compression_type=settings.KAFKA.compression_type,
+        max_in_flight_bytes=settings.KAFKA.max_in_flight_bytes,
+    )
+
+    rpc_producer_client = OnlyContainer(
         KafkaProducer,
         host=settings.KAFKA.host,
         port=settings.KAFKA.port,
-        topics=settings.KAFKA.topics,
         logging_config=settings.LOG_LEVEL,
         acks=settings.KAFKA.acks,
-        transactional_id=settings.KAFKA.transactional_id,
+        linger_ms=settings.KAFKA.linger_ms,
+        max_batch_size=settings.KAFKA.max_batch_size,
+        compression_type=settings.KAFKA.compression_type,
+        max_in_flight_bytes=settings.KAFKA.max_in_flight_bytes,
+    )
+
+    retry_producer_client = OnlyContainer(
+        KafkaProducer,
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        logging_config=settings.LOG_LEVEL,
+        acks=settings.KAFKA.acks,
+        linger_ms=settings.KAFKA.linger_ms,
+        max_batch_size=settings.KAFKA.max_batch_size,
+        compression_type=settings.KAFKA.compression_type,
+        max_in_flight_bytes=settings.KAFKA.max_in_flight_bytes,
+    )
+
+    failure_router = OnlyContainer(
+        FailureRouter,
+        producer=retry_producer_client(),
+        delays=settings.KAFKA.retry.delays,
+        retry_suffix=settings.KAFKA.retry.retry_suffix,
+        dead_letter_suffix=settings.KAFKA.retry.dead_letter_suffix,
     )
 
     consumer_client = OnlyContainer(
@@ -68,6 +171,28 @@ class Provider(Singleton):
         port=settings.KAFKA.port,
         topics=[settings.KAFKA.topics.register_topic],
         logging_config=settings.LOG_LEVEL,
+        group_id=settings.KAFKA.group_id,
+        commit_interval=settings.KAFKA.commit_interval,
+        failure_router=failure_router(),
+    )
+
+    rpc_consumer_client = OnlyContainer(
+        KafkaConsumer,
+        host=settings.KAFKA.host,
+        port=settings.KAFKA.port,
+        topics=[settings.KAFKA.rpc.request_topic],
+        logging_config=settings.LOG_LEVEL,
+        group_id=settings.KAFKA.rpc.group_id,
+        enable_auto_commit=True,
+    )
+
+    dedup_store = OnlyContainer(
+        DedupStore,
+        redis_client=redis(),
+        prefix=settings.KAFKA.dedup.prefix,
+        ttl=settings.KAFKA.dedup.ttl,
+        processing_ttl=settings.KAFKA.dedup.processing_ttl,
+        local_size=settings.KAFKA.dedup.local_size,
     )
 
     user_read_registry = OnlyContainer(
@@ -17,6 +17,7 @@ class ApiServer(Singleton):
         routers: list[APIRouter] = None,
         start_callbacks: list[callable] = None,
         stop_callbacks: list[callable] = None,
+        middlewares: list[callable] = None,
         logging_config: Optional[dict] = None,
         engine: Optional[AsyncEngine] = None,
         session_maker: Optional[AsyncSession] = None,
@@ -30,6 +31,8 @@ class ApiServer(Singleton):
         self.admin = Admin(app=self.app, engine=engine, session_maker=session_maker)
         self.routers = routers or []
         self._init_routers()
+        self.middlewares = middlewares or []
+        self._init_middlewares()
         self.start_callbacks = start_callbacks or []
         self.stop_callbacks = stop_callbacks or []
 
@@ -38,6 +41,10 @@ class ApiServer(Singleton):
             self.app.include_router(router)
         logging.info("Инициализация routers прошла успешно")
 
+    def _init_middlewares(self):
+        for middleware in self.middlewares:
+            self.app.middleware("http")(middleware)
+
     def _init_logger(self) -> None:
         logging.config.dictConfig(self.logging_config)
         logging.info("Инициализация logger прошла успешно")
@@ -1,15 +1,20 @@
 import logging
 from asyncio import Task, create_task, sleep, wait_for
+from typing import Awaitable, Callable
 
 from tenacity import retry, wait_random
 
 
-async def repeat(coro_or_future: callable, repeat_timeout: int):
+async def repeat(
+    task_factory: Callable[[], Awaitable],
+    repeat_timeout: int,
+    timeout: float = 5,
+):
     while True:
         try:
-            await wait_for(coro_or_future, timeout=5)
+            await wait_for(task_factory(), timeout=timeout)
         except TimeoutError:
-            logging.error(f"Task {coro_or_future.__name__} timed out")
+            logging.error(f"Task {task_factory.__name__} timed out")
         except Exception as e:
             raise e
         finally:
@@ -17,9 +22,10 @@ async def repeat(coro_or_future: callable, repeat_timeout: int):
 
 
 def scheduled_task(
-    coro_or_future: callable,
+    task_factory: Callable[[], Awaitable],
     repeat_timeout: int,
+    timeout: float = 5,
 ) -> Task:
     return create_task(
-        retry(wait=wait_random(min=1, max=10))(repeat)(coro_or_future, repeat_timeout)
+        retry(wait=wait_random(min=1, max=10))(repeat)(task_factory, repeat_timeout, timeout),
     )
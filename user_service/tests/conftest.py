@@ -0,0 +1,31 @@
+from typing import Callable, Optional
+
+import pytest
+from aiokafka.structs import ConsumerRecord
+
+
+@pytest.fixture
+def make_record() -> Callable[..., ConsumerRecord]:
+    def make(
+        value: bytes = b"{}",
+        topic: str = "register",
+        partition: int = 0,
+        offset: int = 0,
+        key: Optional[bytes] = None,
+        headers: tuple = (),
+    ) -> ConsumerRecord:
+        return ConsumerRecord(
+            topic=topic,
+            partition=partition,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=key,
+            value=value,
+            checksum=None,
+            serialized_key_size=len(key or b""),
+            serialized_value_size=len(value),
+            headers=headers,
+        )
+
+    return make
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from src.infrastructure.database.gateways.clickhouse_buffer import \
+    ClickHouseInsertBuffer
+
+
+class FlakyPool:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.blocks: list[list] = []
+
+    async def execute(self, sql, params=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("clickhouse is down")
+        self.blocks.append(params)
+        return []
+
+
+def make_buffer(pool: FlakyPool) -> ClickHouseInsertBuffer:
+    return ClickHouseInsertBuffer(pool=pool, database="db", table="users", columns=("uuid", "age"), max_rows=2)
+
+
+def test_failed_flush_keeps_the_row_without_failing_add():
+    async def run():
+        pool = FlakyPool(failures=1)
+        buffer = make_buffer(pool)
+        await buffer.add({"uuid": "a", "age": 1})
+        await buffer.add({"uuid": "b", "age": 2})
+        assert buffer.buffered_rows == 2
+        await buffer.close()
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.blocks == [[["a", "b"], [1, 2]]]
+
+
+def test_incomplete_row_is_rejected_before_buffering():
+    async def run():
+        buffer = make_buffer(FlakyPool(failures=0))
+        with pytest.raises(KeyError):
+            await buffer.add({"uuid": "a"})
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.buffered_rows == 0
+    assert buffer._data == {"uuid": [], "age": []}
@@ -0,0 +1,11 @@
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import uuid4
+
+from src.infrastructure.database.gateways.clickhouse_cache import (dump_result,
+                                                                   load_result)
+
+
+def test_result_round_trip():
+    rows = [(uuid4(), datetime(2024, 5, 1, 12, 0, 0, 15), date(2024, 5, 1), Decimal("1.50"), "login", 3, None, True)]
+    assert load_result(dump_result(rows)) == [list(row) for row in rows]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from src.infrastructure.database.gateways.clickhouse_gateway import \
+    ClickHouseManager
+from src.infrastructure.database.gateways.clickhouse_schema import \
+    ClickHouseTable
+from src.infrastructure.server.config import settings
+
+TOMBSTONED = ClickHouseTable(
+    engine="ReplacingMergeTree(updated_at, is_deleted)",
+    sorting_key=("uuid",),
+    columns=frozenset({"uuid", "login", "is_deleted"}),
+)
+
+
+class RecordingPool:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, dict]] = []
+
+    async def execute(self, sql, params=None, **kwargs):
+        self.statements.append((sql, params))
+        return []
+
+    async def iterate(self, sql, params=None, **kwargs):
+        self.statements.append((sql, params))
+        yield [("a", "login")]
+
+
+class Catalog:
+    def __init__(self, tables: dict[str, ClickHouseTable]) -> None:
+        self.tables = tables
+
+    async def table(self, name: str):
+        return self.tables.get(name)
+
+
+@pytest.fixture
+def gateway():
+    settings.set("CLICKHOUSE.TYPES", {})
+
+    async def build():
+        return ClickHouseManager(host="localhost", port=9000, database="db", user="default", password="")
+
+    manager = asyncio.run(build())
+    manager.pool = RecordingPool()
+    manager.schema = Catalog({"users": TOMBSTONED})
+    return manager
+
+
+def test_stream_reads_the_latest_live_rows(gateway):
+    async def run():
+        return [block async for block in gateway.stream_objects("users", columns=["uuid", "login"])]
+
+    assert asyncio.run(run()) == [[("a", "login")]]
+    sql, params = gateway.pool.statements[0]
+    assert sql == 'SELECT "uuid", "login" FROM "users" FINAL WHERE "is_deleted" = %(f_0)s'
+    assert params == {"f_0": 0}
+
+
+def test_stream_without_final_on_plain_tables(gateway):
+    gateway.schema = Catalog({"users": TOMBSTONED._replace(engine="MergeTree")})
+
+    async def run():
+        return [block async for block in gateway.stream_objects("users")]
+
+    asyncio.run(run())
+    assert gateway.pool.statements[0][0] == 'SELECT * FROM "users"'
@@ -0,0 +1,127 @@
+import asyncio
+
+from src.infrastructure.database.gateways.clickhouse_mutations import \
+    ClickHouseMutationQueue
+from src.infrastructure.database.gateways.clickhouse_query import \
+    ClickHouseQueryCompiler
+
+
+class RecordingPool:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, dict]] = []
+
+    async def execute(self, sql, params=None, **kwargs):
+        self.statements.append((sql, params))
+        return []
+
+
+async def flush(queue: ClickHouseMutationQueue) -> int:
+    try:
+        return await queue.flush()
+    finally:
+        await queue.close()
+
+
+def test_updates_are_coalesced_and_dropped_by_deletes():
+    pool = RecordingPool()
+    queue = ClickHouseMutationQueue(pool=pool, compiler=ClickHouseQueryCompiler(), database="db")
+
+    async def run():
+        queue.update("users", {"age": 1}, {"uuid": "a"})
+        queue.update("users", {"age": 2}, {"uuid": "a"})
+        queue.update("users", {"age": 3}, {"uuid": "b"})
+        queue.delete("users", {"uuid": "b"})
+        return await flush(queue)
+
+    assert asyncio.run(run()) == 2
+    updates = [(sql, params) for sql, params in pool.statements if sql.startswith("ALTER")]
+    deletes = [sql for sql, _ in pool.statements if sql.startswith("DELETE")]
+    assert len(updates) == 1 and updates[0][1] == {"f0_0": "a", "v0_age": 2}
+    assert deletes == ['DELETE FROM db."users" WHERE ("uuid" = %(f0_0)s)']
+
+
+def test_flushes_inserts_first_and_caps_statement_size():
+    pool = RecordingPool()
+    flushed = []
+
+    async def flush_inserts(table):
+        flushed.append((table, len(pool.statements)))
+
+    queue = ClickHouseMutationQueue(
+        pool=pool,
+        compiler=ClickHouseQueryCompiler(),
+        database="db",
+        max_branches=2,
+        before_apply=flush_inserts,
+    )
+
+    async def run():
+        for number in range(5):
+            queue.update("users", {"age": number}, {"uuid": number})
+        return await flush(queue)
+
+    assert asyncio.run(run()) == 5
+    assert flushed == [("users", 1)]
+    assert [sql.count("multiIf") for sql, _ in pool.statements[1:]] == [1, 1, 1]
+
+
+def test_operations_are_applied_in_submission_order():
+    pool = RecordingPool()
+    queue = ClickHouseMutationQueue(pool=pool, compiler=ClickHouseQueryCompiler(), database="db")
+
+    async def run():
+        queue.delete("users", {"uuid": "a"})
+        queue.update("users", {"age": 1}, {"uuid": "a"})
+        queue.update("users", {"age": 2}, {"uuid": "b"})
+        queue.delete("users", {"uuid": "c"})
+        return await flush(queue)
+
+    assert asyncio.run(run()) == 4
+    statements = [sql.split()[0] for sql, _ in pool.statements[1:]]
+    assert statements == ["DELETE", "ALTER", "DELETE"]
+    assert pool.statements[2][1] == {"f0_0": "a", "f1_0": "b", "v0_age": 1, "v1_age": 2}
+
+
+def test_updates_of_their_own_filter_columns_are_kept_apart():
+    pool = RecordingPool()
+    queue = ClickHouseMutationQueue(pool=pool, compiler=ClickHouseQueryCompiler(), database="db")
+
+    async def run():
+        queue.update("users", {"age": 5}, {"age": 1})
+        queue.update("users", {"age": 6}, {"age": 1})
+        queue.delete("users", {"age": 1})
+        return await flush(queue)
+
+    assert asyncio.run(run()) == 3
+    assert [sql.split()[0] for sql, _ in pool.statements[1:]] == ["ALTER", "ALTER", "DELETE"]
+
+
+def test_failed_phases_are_queued_again_in_order():
+    class FailingPool(RecordingPool):
+        failures = 1
+
+        async def execute(self, sql, params=None, **kwargs):
+            result = await super().execute(sql, params, **kwargs)
+            if sql.startswith("DELETE") and self.failures:
+                self.failures -= 1
+                raise ConnectionError
+            return result
+
+    pool = FailingPool()
+    queue = ClickHouseMutationQueue(pool=pool, compiler=ClickHouseQueryCompiler(), database="db")
+
+    async def run():
+        queue.update("users", {"age": 1}, {"uuid": "a"})
+        queue.delete("users", {"uuid": "a"})
+        queue.update("users", {"age": 2}, {"uuid": "a"})
+        try:
+            await queue.flush()
+        except ConnectionError:
+            pass
+        queue.delete("users", {"uuid": "b"})
+        assert queue.pending == {"users": 3}
+        return await flush(queue)
+
+    assert asyncio.run(run()) == 3
+    applied = [sql.split()[0] for sql, _ in pool.statements if not sql.startswith("SELECT")]
+    assert applied == ["DELETE", "DELETE", "ALTER", "DELETE"]
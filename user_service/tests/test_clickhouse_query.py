@@ -0,0 +1,86 @@
+import pytest
+from src.infrastructure.database.gateways.clickhouse_query import (
+    ClickHouseQueryCompiler, ClickHouseQuerySpec)
+
+
+@pytest.fixture
+def compiler() -> ClickHouseQueryCompiler:
+    compiler = ClickHouseQueryCompiler()
+    compiler.sort_keys["users"] = ("created_at", "uuid")
+    return compiler
+
+
+def test_select_binds_filters_and_limit(compiler):
+    query = compiler.select(
+        table="users",
+        spec=ClickHouseQuerySpec(filters={"age__gte": 18, "login__in": ["a", "b"]}, limit=10),
+        columns=("uuid", "login"),
+    )
+    assert query.sql == (
+        'SELECT "uuid", "login" FROM "users" WHERE "age" >= %(f_0)s AND "login" IN %(f_1)s LIMIT %(limit)s'
+    )
+    assert query.params == {"f_0": 18, "f_1": ("a", "b"), "limit": 10}
+
+
+def test_select_puts_leading_sort_key_into_prewhere(compiler):
+    query = compiler.select(
+        table="users",
+        spec=ClickHouseQuerySpec(filters={"created_at__gt": 1, "uuid": 2, "age": 3}),
+    )
+    assert query.sql == (
+        'SELECT * FROM "users" PREWHERE "created_at" > %(f_0)s AND "uuid" = %(f_1)s WHERE "age" = %(f_2)s'
+    )
+
+
+def test_select_keeps_non_leading_sort_key_in_where(compiler):
+    query = compiler.select(table="users", spec=ClickHouseQuerySpec(filters={"uuid": 1}))
+    assert query.sql == 'SELECT * FROM "users" WHERE "uuid" = %(f_0)s'
+
+
+def test_select_keyset_page(compiler):
+    query = compiler.select(
+        table="users",
+        spec=ClickHouseQuerySpec(order_by=["created_at", "uuid"], after=["2024-01-01", "u"], limit=5, final=True),
+    )
+    assert query.sql == (
+        'SELECT * FROM "users" FINAL WHERE ("created_at", "uuid") > (%(a_0)s, %(a_1)s) '
+        'ORDER BY "created_at" ASC, "uuid" ASC LIMIT %(limit)s'
+    )
+    assert query.params == {"a_0": "2024-01-01", "a_1": "u", "limit": 5}
+
+
+def test_select_keyset_needs_one_direction(compiler):
+    with pytest.raises(ValueError):
+        compiler.select(table="users", spec=ClickHouseQuerySpec(order_by=["created_at", "-uuid"], after=[1, 2]))
+
+
+def test_select_rejects_invalid_identifiers(compiler):
+    with pytest.raises(ValueError):
+        compiler.select(table="users", spec=ClickHouseQuerySpec(filters={'age"; DROP': 1}))
+
+
+def test_templates_are_cached_per_shape(compiler):
+    compiler.select(table="users", spec=ClickHouseQuerySpec(filters={"age": 1}))
+    query = compiler.select(table="users", spec=ClickHouseQuerySpec(filters={"age": 2}))
+    assert (compiler.misses, compiler.hits) == (1, 1)
+    assert query.params == {"f_0": 2}
+
+
+def test_alter_update_uses_one_multiif_per_column(compiler):
+    query = compiler.alter_update(
+        database="db",
+        table="users",
+        columns=("age",),
+        updates=[({"age": 20}, {"uuid": "a"}), ({"age": 30}, {"uuid": "b"})],
+    )
+    assert query.sql == (
+        'ALTER TABLE db."users" UPDATE "age" = multiIf("uuid" = %(f0_0)s, %(v0_age)s, '
+        '"uuid" = %(f1_0)s, %(v1_age)s, "age") WHERE ("uuid" = %(f0_0)s) OR ("uuid" = %(f1_0)s)'
+    )
+    assert query.params == {"f0_0": "a", "f1_0": "b", "v0_age": 20, "v1_age": 30}
+
+
+def test_lightweight_delete(compiler):
+    query = compiler.lightweight_delete(database="db", table="users", filters=[{"uuid": "a"}, {"login__prefix": "x"}])
+    assert query.sql == 'DELETE FROM db."users" WHERE ("uuid" = %(f0_0)s) OR (startsWith("login", %(f1_0)s))'
+    assert query.params == {"f0_0": "a", "f1_0": "x"}
@@ -0,0 +1,146 @@
+import asyncio
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src.infrastructure.database.gateways.clickhouse_replicator import \
+    ClickHouseReplicator
+from src.infrastructure.database.models import User
+
+MIRRORED = [column.name for column in User.__table__.columns if column.name != "password"]
+Row = namedtuple("Row", MIRRORED)
+WATERMARK = (datetime(2024, 1, 1), uuid4())
+
+
+def user(updated_at: datetime) -> Row:
+    values = {name: None for name in MIRRORED}
+    return Row(**{**values, "uuid": uuid4(), "updated_at": updated_at})
+
+
+class Result:
+    def __init__(self, blocks: list[list]) -> None:
+        self.blocks = blocks
+
+    async def partitions(self):
+        for block in self.blocks:
+            yield block
+
+
+class Session:
+    def __init__(self, source: "Source") -> None:
+        self.source = source
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def stream(self, query, params=None):
+        self.source.queries.append((str(query), params))
+        return Result(self.source.blocks)
+
+    async def execute(self, query, params=None):
+        self.source.queries.append((str(query), params))
+
+    async def scalar(self, query, params=None):
+        return self.source.latest.pop(0)
+
+    async def commit(self):
+        self.source.commits += 1
+
+
+class Source:
+    def __init__(self, blocks: list[list] = (), latest: list = ()) -> None:
+        self.blocks = list(blocks)
+        self.latest = list(latest)
+        self.queries: list[tuple[str, dict]] = []
+        self.commits = 0
+
+    def transactional_session(self) -> Session:
+        return Session(self)
+
+
+class Mirror:
+    database = "db"
+
+    def __init__(self, watermarks: list[tuple] = ()) -> None:
+        self.watermarks = list(watermarks)
+        self.saved: list[list] = []
+        self.inserted: list[tuple[str, dict]] = []
+        self.pool = self
+
+    async def execute(self, sql, params=None, **kwargs):
+        if sql.startswith("SELECT"):
+            return self.watermarks
+        if sql.startswith("INSERT"):
+            self.saved.append(params)
+        return []
+
+    async def insert_columns(self, table: str, data: dict) -> None:
+        self.inserted.append((table, data))
+
+
+def replicator(source: Source, mirror: Mirror) -> ClickHouseReplicator:
+    return ClickHouseReplicator(
+        session_manager=SimpleNamespace(transactional_session=source.transactional_session),
+        clickhouse=mirror,
+        models=[User],
+    )
+
+
+@pytest.fixture
+def mirror() -> Mirror:
+    return Mirror([("users", *WATERMARK)])
+
+
+def test_rows_are_copied_past_the_watermark_without_the_password(mirror):
+    first, second = user(datetime(2024, 1, 2)), user(datetime(2024, 1, 3))
+    source = Source(blocks=[[first], [second]])
+    service = replicator(source, mirror)
+
+    assert asyncio.run(service.replicate(User)) == 2
+    (query, _), = source.queries
+    assert "password" not in query
+    assert "(users.updated_at, users.uuid) >" in query
+    assert [table for table, _ in mirror.inserted] == ["users", "users"]
+    assert all(list(block) == MIRRORED for _, block in mirror.inserted)
+    assert mirror.saved == [
+        [["users"], [first.updated_at], [first.uuid], mirror.saved[0][3]],
+        [["users"], [second.updated_at], [second.uuid], mirror.saved[1][3]],
+    ]
+    assert service.stats["users"].rows == 2
+    assert service.stats["users"].lag == 0.0
+
+
+def test_tombstones_are_replayed_as_deleted_versions_and_pruned(mirror):
+    deleted_at, uuid = datetime(2024, 1, 4), uuid4()
+    source = Source(blocks=[[(deleted_at, uuid, *user(datetime(2024, 1, 2)))]])
+    service = replicator(source, mirror)
+
+    assert asyncio.run(service.replicate_deletes(User)) == 1
+    (select, _), (prune, params) = source.queries
+    assert 'deleted."password"' not in select
+    assert 'deleted."login"' in select
+    (_, block), = mirror.inserted
+    assert block["updated_at"] == [deleted_at]
+    assert block["is_deleted"] == [1]
+    assert "password" not in block
+    assert mirror.saved[0][:3] == [["users:deleted"], [deleted_at], [uuid]]
+    assert prune.startswith("DELETE FROM replication_tombstones")
+    assert params == {"table": "users", "deleted_at": deleted_at, "uuid": uuid}
+    assert source.commits == 1
+
+
+def test_lag_is_measured_against_the_latest_source_change(mirror):
+    updated_at = WATERMARK[0] + timedelta(seconds=3)
+    service = replicator(Source(latest=[updated_at, None]), mirror)
+    assert asyncio.run(service.lag()) == {"users": 3.0, "users:deleted": 0.0}
+
+    idle = replicator(Source(latest=[WATERMARK[0], None]), mirror)
+    assert asyncio.run(idle.lag()) == {"users": 0.0, "users:deleted": 0.0}
+
+    fresh = replicator(Source(latest=[updated_at, updated_at]), Mirror())
+    assert asyncio.run(fresh.lag()) == {"users": None, "users:deleted": None}
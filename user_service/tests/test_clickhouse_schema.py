@@ -0,0 +1,70 @@
+import pytest
+from src.infrastructure.database.gateways.clickhouse_schema import (
+    ClickHouseSchemaSync, ClickHouseTable)
+from src.infrastructure.database.models import ClickHouseOptions, Role, User
+
+TYPES = {
+    "BOOLEAN": "Bool",
+    "DATETIME": "DateTime",
+    "INTEGER": "Int32",
+    "JSONB": "String",
+    "TEXT": "String",
+    "UUID": "UUID",
+    "VARCHAR": "String",
+}
+
+
+@pytest.fixture
+def schema() -> ClickHouseSchemaSync:
+    return ClickHouseSchemaSync(pool=None, database="db", types=TYPES, rollups=(), retired=())
+
+
+@pytest.fixture
+def columns(schema) -> list[str]:
+    return list(schema.columns(Role))
+
+
+def live(columns, engine: str = Role.__clickhouse__.engine, order_by=Role.__clickhouse__.order_by) -> ClickHouseTable:
+    return ClickHouseTable(engine=engine, sorting_key=tuple(order_by), columns=frozenset(columns))
+
+
+def test_creates_missing_tables_and_columns(schema, columns):
+    assert schema.diff([Role], {}) == [Role.__clickhouse__.table_definition("db", "roles", schema.columns(Role))]
+    statements = schema.diff([Role], {"roles": live(columns[:-1])})
+    assert statements == [f"ALTER TABLE db.roles ADD COLUMN IF NOT EXISTS {columns[-1]} UInt8 DEFAULT 0"]
+    assert schema.diff([Role], {"roles": live(columns)}) == []
+
+
+def test_drifted_table_is_filled_before_the_exchange(schema, columns):
+    statements = schema.diff([Role], {"roles": live(columns, engine="MergeTree")})
+    copied = ", ".join(columns)
+    assert statements == [
+        "DROP TABLE IF EXISTS db.roles__rebuild",
+        Role.__clickhouse__.table_definition("db", "roles__rebuild", schema.columns(Role)),
+        f"INSERT INTO db.roles__rebuild ({copied}) SELECT {copied} FROM db.roles",
+        "EXCHANGE TABLES db.roles__rebuild AND db.roles",
+        f"INSERT INTO db.roles ({copied}) SELECT {copied} FROM db.roles__rebuild",
+        "DROP TABLE db.roles__rebuild",
+    ]
+
+
+def test_interrupted_rebuild_is_finished_instead_of_dropped(schema, columns):
+    catalog = {"roles": live(columns), "roles__rebuild": live(columns[:-1], engine="MergeTree")}
+    copied = ", ".join(columns[:-1])
+    assert schema.diff([Role], catalog) == [
+        f"INSERT INTO db.roles ({copied}) SELECT {copied} FROM db.roles__rebuild",
+        "DROP TABLE db.roles__rebuild",
+    ]
+    assert schema.fingerprint([Role], catalog) != schema.fingerprint([Role], {"roles": catalog["roles"]})
+
+
+def test_drift_to_an_engine_that_does_not_collapse_copies_is_not_rebuilt(schema, columns, monkeypatch):
+    monkeypatch.setattr(Role, "__clickhouse__", ClickHouseOptions(engine="SummingMergeTree", order_by=("uuid",)))
+    assert schema.diff([Role], {"roles": live(columns, engine="MergeTree")}) == []
+
+
+def test_excluded_columns_are_not_mirrored(schema):
+    columns = schema.columns(User)
+    assert "password" not in columns
+    entry = live([*columns, "password"], engine=User.__clickhouse__.engine, order_by=User.__clickhouse__.order_by)
+    assert schema.diff([User], {"users": entry}) == ["ALTER TABLE db.users DROP COLUMN IF EXISTS password"]
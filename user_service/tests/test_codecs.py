@@ -0,0 +1,51 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from src.domain.user.events import USER_REGISTERED, register_user_events
+from src.infrastructure.amqp.codecs import (JSON_CONTENT_TYPE,
+                                            MSGPACK_CONTENT_TYPE,
+                                            SCHEMA_CONTENT_TYPE, EventSchema,
+                                            SchemaCodec, codec_registry)
+
+
+def registered_user() -> dict:
+    return {
+        "uuid": uuid4(),
+        "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456),
+        "age": 30,
+        "is_verified": True,
+        "login": "user",
+        "email": "user@example.com",
+        "first_name": "Имя",
+        "last_name": "Фамилия",
+        "phone_number": "+70000000000",
+    }
+
+
+@pytest.mark.parametrize("content_type", [JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE])
+def test_generic_codecs_round_trip(content_type):
+    codec = codec_registry.get(content_type)
+    message = {"login": "user", "age": 30, "roles": ["admin"]}
+    assert codec.decode(codec.encode(message)) == message
+
+
+def test_schema_codec_round_trip():
+    codec = SchemaCodec()
+    register_user_events(codec)
+    message = registered_user()
+    payload = codec.encode(message, schema=USER_REGISTERED.name)
+    assert codec.decode(memoryview(payload)) == message
+
+
+def test_schema_codec_rejects_a_second_schema_with_the_same_id():
+    codec = SchemaCodec()
+    codec.register(USER_REGISTERED)
+    with pytest.raises(ValueError):
+        codec.register(EventSchema(name="other", schema_id=USER_REGISTERED.schema_id, fields=[("age", "int")]))
+
+
+def test_registry_rejects_unknown_content_type():
+    assert SCHEMA_CONTENT_TYPE in codec_registry.content_types
+    with pytest.raises(ValueError):
+        codec_registry.get("text/plain")
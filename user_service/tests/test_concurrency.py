@@ -0,0 +1,16 @@
+from src.infrastructure.amqp.broker.concurrency import OffsetTracker
+
+
+def test_commits_only_up_to_the_oldest_unfinished_offset():
+    tracker = OffsetTracker()
+    for offset in (10, 11, 12):
+        tracker.start(offset)
+    tracker.complete(11)
+    tracker.complete(12)
+    assert tracker.committable() == 10
+    tracker.complete(10)
+    assert tracker.committable() == 13
+
+
+def test_nothing_started():
+    assert OffsetTracker().committable() is None
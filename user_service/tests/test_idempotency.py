@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from src.infrastructure.amqp.broker.headers import MESSAGE_ID_HEADER
+from src.infrastructure.amqp.broker.idempotency import (DONE, DedupStore,
+                                                        IdempotentHandler)
+from src.infrastructure.exceptions.mq_exceptions import MessageInProgress
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    async def set(self, name, value, ex=None, nx=False):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value.encode("utf-8") if isinstance(value, str) else value
+        return True
+
+    async def get(self, name):
+        return self.values.get(name)
+
+    async def delete(self, name):
+        self.values.pop(name, None)
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+def test_claim_complete_and_duplicate(redis):
+    store = DedupStore(redis, prefix="d")
+    assert asyncio.run(store.claim("1")) is True
+    asyncio.run(store.complete("1"))
+    assert redis.values["d:1"] == DONE.encode("utf-8")
+    other = DedupStore(redis, prefix="d")
+    assert asyncio.run(other.claim("1")) is False
+    assert other.duplicates == 1
+
+
+def test_claim_while_another_consumer_processes(redis):
+    asyncio.run(DedupStore(redis, prefix="d").claim("1"))
+    with pytest.raises(MessageInProgress):
+        asyncio.run(DedupStore(redis, prefix="d").claim("1"))
+
+
+def test_failed_handler_releases_the_claim(redis, make_record):
+    async def fail(msg):
+        raise RuntimeError
+
+    handler = IdempotentHandler(fail, store=DedupStore(redis, prefix="d"))
+    msg = make_record(headers=((MESSAGE_ID_HEADER, b"1"),))
+    with pytest.raises(RuntimeError):
+        asyncio.run(handler(msg))
+    assert "d:1" not in redis.values
+
+
+def test_handler_skips_duplicates(redis, make_record):
+    handled = []
+
+    async def handle(msg):
+        handled.append(msg.offset)
+
+    store = DedupStore(redis, prefix="d")
+    handler = IdempotentHandler(handle, store=store)
+    asyncio.run(handler(make_record(offset=0, headers=((MESSAGE_ID_HEADER, b"1"),))))
+    asyncio.run(handler(make_record(offset=7, headers=((MESSAGE_ID_HEADER, b"1"),))))
+    assert handled == [0]
+    assert store.duplicates == 1
@@ -0,0 +1,34 @@
+import asyncio
+from multiprocessing import current_process
+
+import pytest
+from src.infrastructure.amqp.broker.identity import (transactional_id_for,
+                                                     worker_identity)
+from src.infrastructure.amqp.broker.pool import KafkaProducerPool
+
+
+@pytest.fixture
+def background_process():
+    process = current_process()
+    name, process.name = process.name, "background"
+    yield
+    process.name = name
+
+
+def test_processes_of_one_worker_get_their_own_ids(background_process):
+    assert worker_identity() == worker_identity()
+    assert worker_identity().endswith("-background")
+    assert transactional_id_for("users", 0) == f"users-{worker_identity()}-0"
+
+
+def test_main_process_id():
+    assert worker_identity().endswith("-MainProcess")
+
+
+def test_pool_maps_each_topic_to_one_producer():
+    async def run():
+        return KafkaProducerPool(host="localhost", port=9092, acks="all", transactional_id_prefix="users", size=3)
+
+    pool = asyncio.run(run())
+    assert len({producer.transactional_id for producer in pool.producers}) == 3
+    assert pool.for_topic("register", 1) is pool.for_topic("register", 1)
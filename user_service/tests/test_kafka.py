@@ -0,0 +1,113 @@
+import asyncio
+from time import time
+
+from aiokafka.structs import TopicPartition
+from src.infrastructure.amqp.broker.headers import NOT_BEFORE_HEADER
+from src.infrastructure.amqp.broker.kafka import KafkaConsumer, KafkaProducer
+
+
+def test_split_by_bytes(make_record):
+    records = [make_record(value=b"x" * size, offset=offset) for offset, size in enumerate((4, 4, 4, 10, 1))]
+    chunks = KafkaConsumer._split_by_bytes(records, max_bytes=8)
+    assert [[msg.offset for msg in chunk] for chunk in chunks] == [[0, 1], [2], [3], [4]]
+
+
+def test_send_many_submits_whole_batches():
+    async def run():
+        producer = KafkaProducer(host="localhost", port=9092, acks="all", max_batch_size=300)
+        client = producer._KafkaProducer__producer
+        submitted = []
+
+        async def partitions_for(topic):
+            return {0, 1, 2}
+
+        async def send_batch(batch, topic, partition):
+            submitted.append((topic, partition, batch.record_count()))
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(partition)
+            return future
+
+        client.partitions_for = partitions_for
+        client.send_batch = send_batch
+        await producer.send_many([{"n": "x" * 50}] * 10, topic="events", key=b"user")
+        return producer, submitted
+
+    producer, submitted = asyncio.run(run())
+    assert len(submitted) > 1
+    assert sum(records for _, _, records in submitted) == 10
+    assert len({partition for _, partition, _ in submitted}) == 1
+    metrics = producer.metrics["events"]
+    assert (metrics["sent"], metrics["delivered"], metrics["in_flight"]) == (10, 10, 0)
+    assert metrics["batches"]["batches"] == len(submitted)
+    assert producer.in_flight_bytes == 0
+
+
+class PausingConsumer:
+    """
+    Serves one partition the way AIOKafkaConsumer does: paused partitions
+    are not fetched, seek rewinds the position
+    """
+
+    def __init__(self, records) -> None:
+        self.tp = TopicPartition("register.retry.5s", 0)
+        self.records = records
+        self.position = 0
+        self.paused = False
+        self.pauses = 0
+        self.committed = {}
+
+    def assignment(self) -> set:
+        return {self.tp}
+
+    async def getmany(self, timeout_ms: int) -> dict:
+        if self.paused or self.position >= len(self.records):
+            await asyncio.sleep(timeout_ms / 1000)
+            return {}
+        batch = self.records[self.position:]
+        self.position = len(self.records)
+        return {self.tp: batch}
+
+    def seek(self, tp, offset: int) -> None:
+        self.position = offset
+
+    def pause(self, *partitions) -> None:
+        self.paused = True
+        self.pauses += 1
+
+    def resume(self, *partitions) -> None:
+        if partitions:
+            self.paused = False
+
+    async def commit(self, offsets) -> None:
+        self.committed.update(offsets)
+
+
+def test_retry_consuming_pauses_until_records_are_due(make_record):
+    not_before = str(int((time() + 0.2) * 1000)).encode("utf-8")
+    records = [
+        make_record(offset=0),
+        make_record(offset=1, headers=((NOT_BEFORE_HEADER, not_before),)),
+        make_record(offset=2, headers=((NOT_BEFORE_HEADER, not_before),)),
+    ]
+
+    async def run():
+        consumer = KafkaConsumer(host="localhost", port=9092, topics=["register.retry.5s"])
+        fake = PausingConsumer(records)
+        consumer._KafkaConsumer__consumer = fake
+        handled = []
+
+        async def handle(msg):
+            handled.append((msg.offset, time()))
+
+        started = time()
+        task = asyncio.create_task(consumer.init_retry_consuming(handle, poll_timeout_ms=50))
+        while len(handled) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return fake, handled, started
+
+    fake, handled, started = asyncio.run(asyncio.wait_for(run(), 5))
+    assert [offset for offset, _ in handled] == [0, 1, 2]
+    assert handled[0][1] - started < 0.15 <= handled[1][1] - started
+    assert fake.pauses == 1
+    assert fake.committed == {fake.tp: 3}
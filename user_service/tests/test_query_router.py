@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from src.application.service.query_router import (CLICKHOUSE, POSTGRES,
+                                                  QueryRoute, QueryRouter)
+from src.infrastructure.database.models import User
+from src.infrastructure.server.caller import _CALLER
+
+
+class StatisticsPool:
+    def __init__(self, total: int, distinct: dict[str, int]) -> None:
+        self.total = total
+        self.distinct = distinct
+        self.statements: list[str] = []
+
+    async def execute(self, sql, params=None, **kwargs):
+        self.statements.append(sql)
+        if sql.startswith("SELECT count()"):
+            return [(self.total,)]
+        column = sql.split('"')[1]
+        return [(self.distinct[column],)]
+
+
+class Redis:
+    def __init__(self) -> None:
+        self.keys: dict[str, int] = {}
+
+    async def set(self, name, value, ex=None):
+        self.keys[name] = value
+
+    async def exists(self, name):
+        return int(name in self.keys)
+
+
+@pytest.fixture
+def router() -> QueryRouter:
+    pool = StatisticsPool(total=100000, distinct={"age": 100, "first_name": 10})
+    return QueryRouter(
+        model=User,
+        clickhouse=SimpleNamespace(database="db", pool=pool),
+        redis_client=Redis(),
+        oltp_max_rows=1000,
+    )
+
+
+def test_estimate_uses_distinct_counts_and_range_placeholders(router):
+    assert router.estimate({"age": 30}, 100000, {"age": 100}) == 1000.0
+    assert router.estimate({"age__in": [1, 2]}, 100000, {"age": 100}) == 2000.0
+    assert router.estimate({"age__neq": 30}, 100000, {"age": 100}) == 99000.0
+    assert router.estimate({"age__gte": 30, "first_name": "a"}, 100000, {"first_name": 10}) == pytest.approx(3000.0)
+
+
+def test_route_chooses_the_backend_by_estimated_size(router):
+    assert asyncio.run(router.route({"login": "a"})) == QueryRoute(POSTGRES, "unique")
+    assert asyncio.run(router.route({"email__in": ["a"]})) == QueryRoute(POSTGRES, "narrow")
+    assert asyncio.run(router.route({"age": 30})) == QueryRoute(POSTGRES, "selective", 1000.0)
+    assert asyncio.run(router.route({"first_name": "a"})) == QueryRoute(CLICKHOUSE, "wide", 10000.0)
+    asyncio.run(router.route({"age": 31}))
+    assert router.clickhouse.pool.statements == [
+        "SELECT count() FROM db.users",
+        'SELECT uniq("age") FROM db.users',
+        'SELECT uniq("first_name") FROM db.users',
+    ]
+
+
+def test_cursor_pins_the_backend_of_the_first_page(router):
+    assert asyncio.run(router.route({"first_name": "a"}, pinned=POSTGRES)) == QueryRoute(POSTGRES, "cursor")
+    assert asyncio.run(router.route({"login": "a"}, pinned=CLICKHOUSE)) == QueryRoute(CLICKHOUSE, "cursor")
+    assert asyncio.run(router.route({"first_name": "a"}, pinned="other")).target == CLICKHOUSE
+
+
+def test_reads_stay_on_postgres_after_the_callers_own_writes(router):
+    async def as_caller(caller: str, filters: dict, write: bool = False) -> QueryRoute:
+        token = _CALLER.set(caller)
+        try:
+            if write:
+                await router.record_write()
+            return await router.route(filters)
+        finally:
+            _CALLER.reset(token)
+
+    assert asyncio.run(as_caller("a", {"first_name": "a"}, write=True)) == QueryRoute(POSTGRES, "fresh")
+    assert asyncio.run(as_caller("b", {"first_name": "a"})).target == CLICKHOUSE
+    assert asyncio.run(router.route({"first_name": "a"})).target == CLICKHOUSE
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from src.infrastructure.amqp.broker.headers import (NOT_BEFORE_HEADER,
+                                                    ORIGINAL_TOPIC_HEADER,
+                                                    RETRY_ATTEMPT_HEADER)
+from src.infrastructure.amqp.broker.retry import FailureRouter
+
+
+class RecordingProducer:
+    def __init__(self) -> None:
+        self.sent: list[dict] = []
+
+    async def send(self, value, topic, key=None, headers=None):
+        self.sent.append({"value": value, "topic": topic, "key": key, "headers": headers})
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+
+@pytest.fixture
+def router() -> FailureRouter:
+    return FailureRouter(producer=RecordingProducer(), delays=[5, 30])
+
+
+def route(router, msg) -> dict:
+    asyncio.run(router.route(msg, ValueError("boom")))
+    return router.producer.sent[-1]
+
+
+def test_topics(router):
+    assert router.retry_topics("register") == ["register.retry.5s", "register.retry.30s"]
+    assert router.dead_letter_topic("register") == "register.dlq"
+
+
+def test_first_failure_goes_to_the_first_tier(router, make_record):
+    sent = route(router, make_record(key=b"k"))
+    assert sent["topic"] == "register.retry.5s"
+    assert sent["key"] == b"k"
+    headers = dict(sent["headers"])
+    assert headers[RETRY_ATTEMPT_HEADER] == b"1"
+    assert headers[ORIGINAL_TOPIC_HEADER] == b"register"
+    assert NOT_BEFORE_HEADER in headers
+
+
+def test_retried_record_moves_to_the_next_tier(router, make_record):
+    msg = make_record(
+        topic="register.retry.5s",
+        headers=((RETRY_ATTEMPT_HEADER, b"1"), (ORIGINAL_TOPIC_HEADER, b"register")),
+    )
+    sent = route(router, msg)
+    assert sent["topic"] == "register.retry.30s"
+    assert dict(sent["headers"])[RETRY_ATTEMPT_HEADER] == b"2"
+
+
+def test_record_past_the_last_tier_is_dead_lettered(router, make_record):
+    msg = make_record(
+        topic="register.retry.30s",
+        headers=((RETRY_ATTEMPT_HEADER, b"2"), (ORIGINAL_TOPIC_HEADER, b"register")),
+    )
+    sent = route(router, msg)
+    assert sent["topic"] == "register.dlq"
+    assert NOT_BEFORE_HEADER not in dict(sent["headers"])
+    assert router.snapshot() == {"routed": 0, "dead_lettered": 1}
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+from src.infrastructure.amqp.broker.headers import (CORRELATION_ID_HEADER,
+                                                    REPLY_TO_HEADER, RPC_OK,
+                                                    RPC_STATUS_HEADER)
+from src.infrastructure.amqp.broker.rpc import KafkaRpcClient
+
+
+class FakeConsumer:
+    def __init__(self, topic: str) -> None:
+        self.topic = topic
+        self.replies: asyncio.Queue = asyncio.Queue()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def assignment(self) -> set:
+        return {(self.topic, 0)}
+
+    async def position(self, tp) -> int:
+        return 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        reply = await self.replies.get()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+class EchoProducer:
+    def __init__(self, make_record, consumer: FakeConsumer) -> None:
+        self.make_record = make_record
+        self.consumer = consumer
+        self.requests = []
+
+    async def send(self, message, topic, key=None, headers=None, content_type=None, schema=None):
+        headers = dict(headers)
+        self.requests.append((topic, message, headers))
+        reply = self.make_record(
+            topic=headers[REPLY_TO_HEADER].decode("utf-8"),
+            value=json.dumps({"echo": message}).encode("utf-8"),
+            headers=((CORRELATION_ID_HEADER, headers[CORRELATION_ID_HEADER]), (RPC_STATUS_HEADER, RPC_OK)),
+        )
+        await self.consumer.replies.put(reply)
+
+
+async def connected(make_record) -> tuple[KafkaRpcClient, FakeConsumer, EchoProducer]:
+    client = KafkaRpcClient(host="localhost", port=9092, producer=None, timeout=1)
+    consumer = FakeConsumer(client.reply_topic)
+    client._KafkaRpcClient__consumer = consumer
+    client.producer = EchoProducer(make_record, consumer)
+    await client.connect()
+    return client, consumer, client.producer
+
+
+def test_request_reply_round_trip(make_record):
+    async def run():
+        client, _, producer = await connected(make_record)
+        try:
+            return await client.request({"uuid": "a"}, topic="user_rpc"), producer.requests, client
+        finally:
+            await client.disconnect()
+
+    response, requests, client = asyncio.run(run())
+    assert response == {"echo": {"uuid": "a"}}
+    assert requests[0][0] == "user_rpc"
+    assert requests[0][2][REPLY_TO_HEADER] == client.reply_topic.encode("utf-8")
+    assert client.in_flight == 0
+
+
+def test_reply_topic_survives_restarts():
+    async def run():
+        return [KafkaRpcClient(host="localhost", port=9092, producer=None).reply_topic for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert first == second
+
+
+def test_dead_listener_fails_pending_requests(make_record):
+    async def run():
+        client, consumer, _ = await connected(make_record)
+        future = client.loop.create_future()
+        client._pending[b"1"] = future
+        await consumer.replies.put(RuntimeError("broker gone"))
+        with pytest.raises(RuntimeError):
+            await future
+        with pytest.raises(ConnectionError):
+            await client.request({"uuid": "a"}, topic="user_rpc")
+        await client.disconnect()
+
+    asyncio.run(run())
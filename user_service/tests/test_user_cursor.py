@@ -0,0 +1,17 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from src.domain.user.models import UserCursor
+from src.infrastructure.exceptions.user_exceptions import InvalidCursor
+
+
+def test_cursor_round_trip_keeps_backend():
+    cursor = UserCursor(created_at=datetime(2024, 5, 1, 12, 0, 0, 1), uuid=uuid4(), backend="clickhouse")
+    assert UserCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize("value", ["not base64!", "e30=", ""])
+def test_invalid_cursor(value):
+    with pytest.raises(InvalidCursor):
+        UserCursor.decode(value)